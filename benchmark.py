@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks
+Measures database and UI hot paths against a throwaway database
+
+Usage:
+    python benchmark.py              # run every benchmark
+    python benchmark.py barcode      # run a single benchmark by name
+"""
+
+import csv
+import itertools
+import math
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.database import DatabaseManager, STORAGE_PROFILES
+
+def make_database(product_count=1000, storage_profile='balanced', product_cache_size=4096):
+    """Create a temporary database seeded with products"""
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db = DatabaseManager(db_path, storage_profile=storage_profile, product_cache_size=product_cache_size)
+    
+    now = datetime.now().isoformat()
+    conn = db.get_connection()
+    with conn:
+        conn.executemany('''
+            INSERT INTO products (barcode, name, description, category, cost_price,
+                                  selling_price, quantity, min_quantity, created_date, updated_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            # Stock for every sale a benchmark makes, since add_sale refuses to oversell
+            (f"BC{i:08d}", f"Product {i}", "", "Other", 5.0, 8.0, 1000000, 10, now, now)
+            for i in range(product_count)
+        ])
+    return db, db_path
+
+def add_sales(db, sale_count, product_count=1000, days=3 * 365):
+    """Record sales spread evenly over the last few years"""
+    start = datetime.now() - timedelta(days=days)
+    conn = db.get_connection()
+    with conn:
+        conn.executemany('''
+            INSERT INTO sales (product_id, quantity, unit_price, total_amount, sale_date, unit_cost)
+            VALUES (?, ?, ?, ?, ?, 5.0)
+        ''', (
+            (1 + i % product_count, 1 + i % 3, 8.0, 8.0 * (1 + i % 3),
+             (start + timedelta(seconds=i * days * 86400 // sale_count)).isoformat())
+            for i in range(sale_count)
+        ))
+
+def drop_database(db, db_path):
+    """Close and delete a temporary database"""
+    db.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+def report(label, seconds, calls):
+    """Print per-call latency for a timed loop"""
+    print(f"  {label:<40} {seconds / calls * 1e6:10.1f} us/call  ({calls} calls)")
+
+def bench_barcode(calls=5000):
+    """Barcode lookup latency: connection per call vs persistent connection"""
+    db, db_path = make_database(product_cache_size=0)
+    barcodes = [f"BC{i % 1000:08d}" for i in range(calls)]
+    
+    # Previous behaviour: open, query and close a connection for every scan
+    start = time.perf_counter()
+    for barcode in barcodes:
+        conn = sqlite3.connect(db_path)
+        conn.execute('SELECT * FROM products WHERE barcode = ?', (barcode,)).fetchone()
+        conn.close()
+    report("connect per call", time.perf_counter() - start, calls)
+    
+    start = time.perf_counter()
+    for barcode in barcodes:
+        db.get_product_by_barcode(barcode)
+    report("persistent connection", time.perf_counter() - start, calls)
+    
+    drop_database(db, db_path)
+
+def bench_scan(calls=20000):
+    """Scan-to-display lookup latency with and without the product cache"""
+    for label, cache_size in (("no cache", 0), ("LRU product cache", 4096)):
+        db, db_path = make_database(product_count=10000, product_cache_size=cache_size)
+        # A till sees the same few hundred products over and over
+        barcodes = [f"BC{(i * 7919) % 500:08d}" for i in range(calls)]
+        
+        start = time.perf_counter()
+        for barcode in barcodes:
+            db.get_product_by_barcode(barcode)
+        report(label, time.perf_counter() - start, calls)
+        
+        stats = db.product_cache.stats()
+        print(f"  {'':<40} hits={stats['hits']} misses={stats['misses']} hit rate={stats['hit_rate']:.1%}")
+        drop_database(db, db_path)
+
+def bench_inventory(sizes=(1000, 10000, 100000), visible_rows=30):
+    """Inventory refresh time: QTableWidget items vs lazily formatted table model"""
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+        from PyQt5.QtCore import Qt
+        from src.inventory_tab import ProductTableModel
+    except ImportError as e:
+        print(f"  skipped: {e}")
+        return
+    _ = QApplication.instance() or QApplication(sys.argv)  # held so Qt keeps the application alive
+    
+    for product_count in sizes:
+        db, db_path = make_database(product_count=product_count)
+        
+        # Previous behaviour: eight QTableWidgetItems per product on every refresh
+        table = QTableWidget()
+        table.setColumnCount(8)
+        start = time.perf_counter()
+        products = db.get_all_products()
+        table.setRowCount(len(products))
+        for row, product in enumerate(products):
+            for column, key in enumerate(('id', 'barcode', 'name', 'category', 'cost_price',
+                                          'selling_price', 'quantity', 'min_quantity')):
+                table.setItem(row, column, QTableWidgetItem(str(product[key])))
+        widget_seconds = time.perf_counter() - start
+        
+        # Model refresh plus formatting the cells a view would actually paint
+        model = ProductTableModel()
+        start = time.perf_counter()
+        model.set_products(db.get_product_rows())
+        for row in range(min(visible_rows, model.rowCount())):
+            for column in range(model.columnCount()):
+                model.data(model.index(row, column), Qt.DisplayRole)
+                model.data(model.index(row, column), Qt.BackgroundRole)
+        model_seconds = time.perf_counter() - start
+        
+        print(f"  {product_count:>7} products   QTableWidget {widget_seconds * 1e3:9.1f} ms   "
+              f"table model {model_seconds * 1e3:8.1f} ms")
+        table.deleteLater()
+        drop_database(db, db_path)
+
+def bench_filter(product_count=100000):
+    """Inventory search latency per keystroke on the filter proxy"""
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication
+        from src.inventory_tab import ProductTableModel, ProductFilterProxyModel
+    except ImportError as e:
+        print(f"  skipped: {e}")
+        return
+    _ = QApplication.instance() or QApplication(sys.argv)  # held so Qt keeps the application alive
+    
+    db, db_path = make_database(product_count=product_count)
+    model = ProductTableModel()
+    model.set_products(db.get_product_rows())
+    proxy = ProductFilterProxyModel()
+    proxy.setSourceModel(model)
+    
+    for search_text, category in (("p", None), ("pr", None), ("product 9", None),
+                                  ("product 99", None), ("", "Other"), ("", None)):
+        start = time.perf_counter()
+        proxy.set_filter(search_text, category)
+        elapsed = time.perf_counter() - start
+        print(f"  {search_text!r:<14} {str(category):<8} {elapsed * 1e3:8.2f} ms  ({proxy.rowCount()} visible)")
+    drop_database(db, db_path)
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def bench_concurrency(duration=3.0):
+    """Read latency while a register is writing sales, per storage profile"""
+    for profile in STORAGE_PROFILES:
+        db, db_path = make_database(product_count=5000, storage_profile=profile)
+        stop = threading.Event()
+        writes = [0]
+        
+        def writer():
+            while not stop.is_set():
+                db.add_sale(1 + writes[0] % 5000, 1, 8.0)
+                writes[0] += 1
+        
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        
+        # Reader plays the role of the refresh timer on the GUI thread
+        latencies = []
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            db.get_all_products()
+            latencies.append(time.perf_counter() - start)
+        
+        stop.set()
+        writer_thread.join()
+        
+        print(f"  {profile:<14} reads={len(latencies):5d}  "
+              f"p50={percentile(latencies, 0.50) * 1e3:7.2f} ms  "
+              f"p99={percentile(latencies, 0.99) * 1e3:7.2f} ms  "
+              f"max={max(latencies) * 1e3:7.2f} ms  writes={writes[0]}")
+        drop_database(db, db_path)
+
+def bench_reports(sale_count=1000000):
+    """Report totals over every sale: GROUP BY on raw sales vs the daily rollup"""
+    db, db_path = make_database()
+    start = time.perf_counter()
+    add_sales(db, sale_count, product_count=200)  # a shop selling its regular lines every day
+    print(f"  seeded {sale_count} sales in {time.perf_counter() - start:.1f} s")
+    conn = db.get_connection()
+    
+    # Previous behaviour: aggregate the sales table itself
+    start = time.perf_counter()
+    conn.execute('''
+        SELECT s.product_id, SUM(s.quantity), SUM(s.total_amount), SUM(s.quantity * p.cost_price)
+        FROM sales s JOIN products p ON s.product_id = p.id GROUP BY s.product_id
+    ''').fetchall()
+    conn.execute('''
+        SELECT substr(s.sale_date, 1, 10) AS day, SUM(s.total_amount), SUM(s.quantity * p.cost_price)
+        FROM sales s JOIN products p ON s.product_id = p.id GROUP BY day
+    ''').fetchall()
+    print(f"  {'raw sales GROUP BY':<40} {(time.perf_counter() - start) * 1e3:10.1f} ms")
+    
+    start = time.perf_counter()
+    db.get_product_sales_summary()
+    days = db.get_daily_sales_summary()
+    rollup_rows = conn.execute('SELECT COUNT(*) FROM daily_product_sales').fetchone()[0]
+    print(f"  {'daily rollup':<40} {(time.perf_counter() - start) * 1e3:10.1f} ms  "
+          f"({rollup_rows} rollup rows, {len(days)} days)")
+    drop_database(db, db_path)
+
+def bench_frame(sale_count=1000000):
+    """Report computation over every sale: tuples and Python sums vs the columnar sales frame"""
+    from src.sales_frame import NUMPY_AVAILABLE, load_sales_frame
+    db, db_path = make_database()
+    add_sales(db, sale_count, product_count=200)
+    
+    # Previous behaviour: one list of tuples, summed and grouped by each report view
+    start = time.perf_counter()
+    sales_data = db.get_sales_report()
+    read_seconds = time.perf_counter() - start
+    total_sales = sum(row[4] for row in sales_data)
+    total_cost = sum(row[2] * row[7] for row in sales_data)
+    daily, products = {}, {}
+    for row in sales_data:
+        day = daily.setdefault(str(row[5])[:10], [0, 0])
+        day[0] += row[4]
+        day[1] += row[2] * row[7]
+        product = products.setdefault(row[6], [0, 0, 0])
+        product[0] += row[2]
+        product[1] += row[2] * row[3]
+        product[2] += row[2] * row[7]
+    print(f"  {'tuples + Python group-bys':<40} {(time.perf_counter() - start) * 1e3:10.1f} ms  "
+          f"(read {read_seconds * 1e3:.1f} ms)")
+    del sales_data
+    
+    start = time.perf_counter()
+    sales = load_sales_frame(db)
+    read_seconds = time.perf_counter() - start
+    totals = sales.totals()
+    sales.by_day()
+    sales.by_product()
+    label = "NumPy sales frame" if NUMPY_AVAILABLE else "sales frame (no NumPy)"
+    print(f"  {label:<40} {(time.perf_counter() - start) * 1e3:10.1f} ms  "
+          f"(read {read_seconds * 1e3:.1f} ms)")
+    if not (math.isclose(totals['revenue'], total_sales) and math.isclose(totals['cost'], total_cost)):
+        print("  warning: sales frame totals differ from the tuple sums")
+    del sales
+    
+    # Memory held by each form of the data once it has been read
+    for label, read in (("tuples", db.get_sales_report), ("sales frame", lambda: load_sales_frame(db))):
+        tracemalloc.start()
+        data = read()
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del data
+        print(f"  {label:<40} {held / (1024 * 1024):10.1f} MiB held")
+    drop_database(db, db_path)
+
+def bench_streaming(sale_count=5000000):
+    """Peak memory walking every sale: get_sales_data list vs iter_sales"""
+    db, db_path = make_database()
+    add_sales(db, sale_count)
+    
+    def walk_list():
+        return sum(sale['profit'] for sale in db.get_sales_data())
+    
+    def walk_stream():
+        return sum(sale['profit'] for sale in db.iter_sales(batch_size=1000))
+    
+    for label, walk in (("get_sales_data (list of dicts)", walk_list), ("iter_sales (fetchmany)", walk_stream)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        walk()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:<40} peak {peak / (1024 * 1024):9.1f} MiB  {elapsed:6.1f} s  ({sale_count} sales)")
+    drop_database(db, db_path)
+
+def bench_records(product_count=100000):
+    """Memory held by the full product list: per-row dicts vs slotted Product records"""
+    from src.database import Product
+    db, db_path = make_database(product_count=product_count)
+    conn = db.get_connection()
+    
+    def as_dicts():
+        # Previous behaviour: an 11-key dict per row
+        return [dict(zip(Product.__slots__, row)) for row in
+                conn.execute('SELECT * FROM products ORDER BY name').fetchall()]
+    
+    for label, read in (("dicts", as_dicts), ("Product records", db.get_all_products)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        products = read()
+        elapsed = time.perf_counter() - start
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  {label:<40} {held / (1024 * 1024):8.1f} MiB held  "
+              f"{held / len(products):6.0f} B/product  {elapsed * 1e3:7.1f} ms")
+        del products
+    drop_database(db, db_path)
+
+def bench_paging(sale_count=1000000, page_size=200):
+    """Time to read a page of sales history near the start and deep into it: OFFSET vs keyset"""
+    db, db_path = make_database()
+    add_sales(db, sale_count)
+    conn = db.get_connection()
+    
+    for depth in (0, sale_count // 2, sale_count - page_size):
+        start = time.perf_counter()
+        conn.execute('''
+            SELECT s.id, s.sale_date FROM sales s JOIN products p ON s.product_id = p.id
+            ORDER BY s.sale_date DESC, s.id DESC LIMIT ? OFFSET ?
+        ''', (page_size, depth)).fetchall()
+        offset_time = time.perf_counter() - start
+        
+        # The keyset of the row just above the page, as the previous page would have left it
+        after = conn.execute('''
+            SELECT sale_date, id FROM sales ORDER BY sale_date DESC, id DESC LIMIT 1 OFFSET ?
+        ''', (max(depth - 1, 0),)).fetchone() if depth else None
+        start = time.perf_counter()
+        db.get_sales_page(after=after, limit=page_size)
+        keyset_time = time.perf_counter() - start
+        print(f"  row {depth:>8}: OFFSET {offset_time * 1e3:8.1f} ms  keyset {keyset_time * 1e3:6.1f} ms")
+    drop_database(db, db_path)
+
+def bench_import(product_count=200000, baseline_count=20000):
+    """Catalog import throughput: add_product per row vs chunked executemany upserts"""
+    from src.product_import import import_products, OPENPYXL_AVAILABLE
+    header = ["Barcode", "Name", "Category", "Cost Price", "Selling Price", "Quantity"]
+    rows = [(f"IMP{i:08d}", f"Imported product {i}", "Other", 5.0, 8.0, i % 50)
+            for i in range(product_count)]
+    paths = []
+    
+    fd, csv_path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    paths.append(("CSV", csv_path))
+    if OPENPYXL_AVAILABLE:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        fd, xlsx_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        workbook.save(xlsx_path)
+        paths.append(("XLSX", xlsx_path))
+    
+    db, db_path = make_database(product_count=0)
+    start = time.perf_counter()
+    for barcode, name, category, cost_price, selling_price, quantity in rows[:baseline_count]:
+        db.add_product({'barcode': barcode, 'name': name, 'category': category, 'cost_price': cost_price,
+                        'selling_price': selling_price, 'quantity': quantity})
+    elapsed = time.perf_counter() - start
+    print(f"  {'add_product per row':<40} {baseline_count / elapsed:10.0f} rows/s  ({baseline_count} rows)")
+    drop_database(db, db_path)
+    
+    for label, path in paths:
+        db, db_path = make_database(product_count=0)
+        for action in ("insert", "update"):
+            start = time.perf_counter()
+            result = import_products(db, path)
+            elapsed = time.perf_counter() - start
+            print(f"  {label + ' import, ' + action:<40} {result['imported'] / elapsed:10.0f} rows/s  "
+                  f"({result['imported']} rows)")
+        drop_database(db, db_path)
+        os.remove(path)
+
+def bench_export(sale_count=1000000, legacy_count=200000):
+    """Excel export of the sales sheet: in-memory Workbook of table text vs streaming write-only export"""
+    from src.report_export import export_reports, OPENPYXL_AVAILABLE
+    if not OPENPYXL_AVAILABLE:
+        print("  openpyxl is not installed")
+        return
+    from openpyxl import Workbook
+    db, db_path = make_database()
+    add_sales(db, sale_count)
+    fd, xlsx_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    
+    def legacy():
+        # Previous behaviour: every cell as the formatted text shown in the sales table
+        workbook = Workbook()
+        sheet = workbook.active
+        for sale in itertools.islice(db.iter_sales(), legacy_count):
+            sheet.append([sale['sale_date'][:10], sale['product_name'], str(sale['quantity']),
+                          f"${sale['unit_price']:,.2f}", f"${sale['total_price']:,.2f}", f"${sale['profit']:,.2f}"])
+        workbook.save(xlsx_path)
+        return legacy_count
+    
+    def streaming():
+        return export_reports(db, xlsx_path)
+    
+    for label, export in (("Workbook from table text", legacy), ("write-only from cursors", streaming)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = export()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:<40} {rows / elapsed:8.0f} rows/s  {peak / (1024 * 1024):8.1f} MiB peak  "
+              f"({rows} rows, {os.path.getsize(xlsx_path) / (1024 * 1024):.1f} MiB file)")
+    os.remove(xlsx_path)
+    drop_database(db, db_path)
+
+def bench_backup(size_mb=2048, sale_interval=0.01):
+    """Backup time and register latency on a multi-GB database: file copy vs online backup API"""
+    import shutil
+    from src.backup import backup_database, available_compressions
+    db, db_path = make_database()
+    add_sales(db, 1000000)
+    conn = db.get_connection()
+    with conn:
+        conn.execute("UPDATE products SET quantity = 1000000000 WHERE id = 1")
+        conn.execute("CREATE TABLE bench_padding (data BLOB)")
+    # Half random, half zeros: roughly as compressible as real table pages
+    while os.path.getsize(db_path) < size_mb * 1024 * 1024:
+        with conn:
+            conn.executemany("INSERT INTO bench_padding VALUES (randomblob(2000) || zeroblob(2000))",
+                             [()] * 25000)
+    db.checkpoint()
+    print(f"  database: {os.path.getsize(db_path) / (1024 * 1024):.0f} MiB")
+    
+    def register(stop, latencies):
+        # The checkout counter keeps selling while the backup runs
+        while not stop.is_set():
+            start = time.perf_counter()
+            db.add_sale(1, 1, 8.0)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(sale_interval)
+    
+    def file_copy(target):
+        # Previous behaviour, on the GUI thread: checkpoint, then copy the file
+        db.checkpoint()
+        shutil.copy2(db_path, target)
+    
+    methods = [("shutil.copy2 (GUI thread)", '.db', file_copy)]
+    for compression in available_compressions():
+        methods.append((f"backup API, {compression}", '.' + compression,
+                        lambda target, compression=compression: backup_database(db, target, compression)))
+    
+    for label, suffix, backup in methods:
+        target = db_path + '.backup' + suffix
+        stop, latencies = threading.Event(), []
+        seller = threading.Thread(target=register, args=(stop, latencies))
+        seller.start()
+        start = time.perf_counter()
+        backup(target)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        seller.join()
+        latencies.sort()
+        print(f"  {label:<28} {elapsed:7.2f} s  {os.path.getsize(target) / (1024 * 1024):7.0f} MiB  "
+              f"sale p99 {latencies[int(len(latencies) * 0.99)] * 1e3:6.1f} ms  "
+              f"max {latencies[-1] * 1e3:6.1f} ms  ({len(latencies)} sales)")
+        os.remove(target)
+    drop_database(db, db_path)
+
+def bench_snapshot(sales=1000000, new_sales=1000):
+    """Hourly automatic backup size and time: full copy vs incremental page snapshot"""
+    import shutil
+    from src.backup import backup_database, take_snapshot
+    db, db_path = make_database()
+    add_sales(db, sales)
+    with db.get_connection() as conn:
+        conn.execute("UPDATE products SET quantity = 1000000000 WHERE id = 1")
+    snapshot_dir = db_path + '.snapshots'
+    print(f"  database: {os.path.getsize(db_path) / (1024 * 1024):.0f} MiB, "
+          f"{new_sales} sales between backups")
+    
+    start = time.perf_counter()
+    backup_database(db, db_path + '.backup.gz', 'gzip')
+    full_seconds = time.perf_counter() - start
+    print(f"  {'full backup, gzip':<28} {full_seconds:7.2f} s  "
+          f"{os.path.getsize(db_path + '.backup.gz') / (1024 * 1024):9.2f} MiB")
+    os.remove(db_path + '.backup.gz')
+    
+    for label in ("first snapshot (full)", "next snapshot", "next snapshot"):
+        start = time.perf_counter()
+        snapshot = take_snapshot(db, snapshot_dir, 'gzip')
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<28} {elapsed:7.2f} s  {snapshot['size'] / (1024 * 1024):9.2f} MiB  "
+              f"{snapshot['changed_pages']:,} of {snapshot['page_count']:,} pages")
+        for _ in range(new_sales):
+            db.add_sale(1, 1, 8.0)
+    shutil.rmtree(snapshot_dir)
+    drop_database(db, db_path)
+
+def bench_restore(sales=1000000, sale_interval=0.01):
+    """Restore phases and register latency while a compressed backup is swapped in"""
+    from src.backup import backup_database, restore_database, available_compressions
+    db, db_path = make_database()
+    add_sales(db, sales)
+    with db.get_connection() as conn:
+        conn.execute("UPDATE products SET quantity = 1000000000 WHERE id = 1")
+    print(f"  database: {os.path.getsize(db_path) / (1024 * 1024):.0f} MiB")
+    
+    def register(stop, latencies, failures):
+        while not stop.is_set():
+            start = time.perf_counter()
+            if not db.add_sale(1, 1, 8.0):
+                failures.append(start)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(sale_interval)
+    
+    for compression in available_compressions():
+        backup_path = f"{db_path}.backup.{compression}"
+        backup_database(db, backup_path, compression)
+        stop, latencies, failures = threading.Event(), [], []
+        seller = threading.Thread(target=register, args=(stop, latencies, failures))
+        seller.start()
+        result = restore_database(db, backup_path, safety_path=db_path + '.before')
+        stop.set()
+        seller.join()
+        latencies.sort()
+        print(f"  {compression:<6} unpack {result['unpack_seconds']:5.2f} s  "
+              f"check {result['verify_seconds']:5.2f} s  copy {result['restore_seconds']:5.2f} s  "
+              f"total {result['total_seconds']:5.2f} s  sale max {latencies[-1] * 1e3:6.0f} ms  "
+              f"({len(latencies)} sales, {len(failures)} failed)")
+        os.remove(backup_path)
+        os.remove(db_path + '.before')
+    drop_database(db, db_path)
+
+def bench_maintenance(sales=1000000, sale_interval=0.01):
+    """Reclaiming a purged year of sales: blocking VACUUM vs background maintenance"""
+    from src.maintenance import run_maintenance
+    
+    def register(db, stop, latencies):
+        while not stop.is_set():
+            start = time.perf_counter()
+            db.add_sale(1, 1, 8.0)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(sale_interval)
+    
+    def purged_database():
+        db, db_path = make_database()
+        add_sales(db, sales)
+        conn = db.get_connection()
+        with conn:
+            conn.execute("UPDATE products SET quantity = 1000000000 WHERE id = 1")
+            conn.execute("DELETE FROM sales WHERE id <= ?", (sales // 3,))
+        return db, db_path
+    
+    for label in ("VACUUM (previous Vacuum button)", "run_maintenance"):
+        db, db_path = purged_database()
+        usage = db.get_space_usage()
+        stop, latencies = threading.Event(), []
+        seller = threading.Thread(target=register, args=(db, stop, latencies))
+        seller.start()
+        start = time.perf_counter()
+        if label == "run_maintenance":
+            result = run_maintenance(db, analyze=True)
+            freed = result['freed_pages']
+        else:
+            db.get_connection().execute("VACUUM")
+            freed = usage['page_count'] - db.get_space_usage()['page_count']
+        elapsed = time.perf_counter() - start
+        stop.set()
+        seller.join()
+        latencies.sort()
+        print(f"  {label:<32} {elapsed:6.2f} s  freed {freed * usage['page_size'] / (1024 * 1024):6.1f} MB  "
+              f"sale p99 {latencies[int(len(latencies) * 0.99)] * 1e3:6.1f} ms  "
+              f"max {latencies[-1] * 1e3:6.1f} ms  ({len(latencies)} sales)")
+        drop_database(db, db_path)
+
+def bench_stats(sales=1000000, calls=20):
+    """Database tab statistics: COUNT(*) on every table vs trigger-kept counts and pragmas"""
+    db, db_path = make_database()
+    add_sales(db, sales)
+    conn = db.get_connection()
+    tables = list(db.get_record_counts())
+    
+    def scan_counts():
+        # Previous behaviour: a full count of every application table
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+    
+    assert scan_counts() == db.get_record_counts()
+    for label, function in (("COUNT(*) per table", scan_counts),
+                            ("get_database_stats", db.get_database_stats)):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        report(label, time.perf_counter() - start, calls)
+    drop_database(db, db_path)
+
+BENCHMARKS = {
+    'barcode': bench_barcode,
+    'scan': bench_scan,
+    'concurrency': bench_concurrency,
+    'inventory': bench_inventory,
+    'filter': bench_filter,
+    'reports': bench_reports,
+    'frame': bench_frame,
+    'streaming': bench_streaming,
+    'records': bench_records,
+    'paging': bench_paging,
+    'import': bench_import,
+    'export': bench_export,
+    'backup': bench_backup,
+    'snapshot': bench_snapshot,
+    'restore': bench_restore,
+    'maintenance': bench_maintenance,
+    'stats': bench_stats,
+}
+
+def main():
+    """Run the requested benchmarks"""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            return 1
+        print(f"{name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
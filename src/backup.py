@@ -0,0 +1,513 @@
+"""
+Backup Module
+Online backups of the live database through SQLite's backup API, optionally compressed
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .database import MIGRATIONS
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+PAGES_PER_STEP = 1024  # pages copied per backup step, 4 MiB with the default page size
+COPY_CHUNK_SIZE = 1024 * 1024
+MAX_RESTARTS = 3
+
+BACKUP_COMPRESSIONS = {
+    'none': {'label': "None (plain database file)", 'suffix': '.db'},
+    'gzip': {'label': "gzip", 'suffix': '.db.gz'},
+    'zstd': {'label': "zstd (fast)", 'suffix': '.db.zst'},
+}
+DEFAULT_BACKUP_COMPRESSION = 'none'
+
+class _TooManyRestarts(Exception):
+    """Writers keep changing a rollback-journal database under a stepped backup"""
+
+def available_compressions() -> List[str]:
+    """Keys of BACKUP_COMPRESSIONS usable with the installed packages"""
+    return [compression for compression in BACKUP_COMPRESSIONS if compression != 'zstd' or ZSTD_AVAILABLE]
+
+def _open_compressed(path: str, compression: str):
+    """A binary writer that compresses into path"""
+    if compression == 'none':
+        return open(path, 'wb')
+    if compression == 'gzip':
+        # On table pages level 1 is three times faster than the default for a
+        # file about a tenth larger; zstd beats both where it is installed
+        return gzip.open(path, 'wb', compresslevel=1)
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+    raise ValueError(f"Unknown backup compression: {compression}")
+
+def _copy_pages(source: sqlite3.Connection, target: sqlite3.Connection, pages_per_step: int,
+                progress: Optional[Callable]) -> int:
+    """Copy source into target a step at a time, returns the page count"""
+    wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+    if wal:
+        # A read transaction pins one snapshot, so commits from the register go to
+        # the WAL without waiting and never force the copy to start over
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    
+    state = {'remaining': None, 'total': 0, 'restarts': 0}
+    
+    def step(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+        state['total'] = total
+        if progress:
+            progress('copy', total - remaining, total)
+    
+    try:
+        try:
+            source.backup(target, pages=pages_per_step, progress=step)
+        except _TooManyRestarts:
+            # Without WAL every write restarts a stepped copy; finish in one pass instead
+            source.backup(target)
+    finally:
+        if wal:
+            source.rollback()
+    return state['total']
+
+def backup_database(db_manager, target_path: str, compression: str = DEFAULT_BACKUP_COMPRESSION,
+                    pages_per_step: int = PAGES_PER_STEP,
+                    progress: Optional[Callable] = None) -> Dict:
+    """Back up the live database to target_path, returns the file size and timings
+    
+    The copy goes through sqlite3.Connection.backup on a connection of its own,
+    pages_per_step pages at a time, into a temporary file that is compressed
+    (gzip or zstd) if asked and then moved into place, so target_path is only
+    ever a complete backup. progress(phase, done, total) is called per step with
+    phase 'copy' (pages) and then 'compress' (bytes).
+    """
+    if compression not in BACKUP_COMPRESSIONS:
+        raise ValueError(f"Unknown backup compression: {compression}")
+    if compression == 'zstd' and not ZSTD_AVAILABLE:
+        raise ValueError("zstd compression requires the zstandard package")
+    
+    copy_path = target_path + '.copy'
+    partial_path = target_path + '.partial'
+    start = time.perf_counter()
+    try:
+        source = sqlite3.connect(db_manager.db_path, timeout=30)
+        target = sqlite3.connect(copy_path)
+        try:
+            pages = _copy_pages(source, target, pages_per_step, progress)
+        finally:
+            target.close()
+            source.close()
+        copy_seconds = time.perf_counter() - start
+        
+        if compression != 'none':
+            total = os.path.getsize(copy_path)
+            done = 0
+            with open(copy_path, 'rb') as plain, _open_compressed(partial_path, compression) as packed:
+                for chunk in iter(lambda: plain.read(COPY_CHUNK_SIZE), b''):
+                    packed.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress('compress', done, total)
+            os.replace(partial_path, target_path)
+        else:
+            os.replace(copy_path, target_path)
+    finally:
+        for path in (copy_path, partial_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    return {
+        'path': target_path,
+        'size': os.path.getsize(target_path),
+        'pages': pages,
+        'copy_seconds': copy_seconds,
+        'total_seconds': time.perf_counter() - start,
+    }
+
+# Incremental snapshots
+#
+# A snapshot directory holds chains. Each chain is a full copy of every page
+# followed by increments that hold only the pages changed since the snapshot
+# before. A page file is a stream of (4-byte page number, page) records; the
+# chain keeps the BLAKE2 hash of every page of its latest snapshot in
+# hashes.bin, and manifest.json lists the snapshots with a digest of their
+# page hashes, which doubles as the check that hashes.bin is current.
+
+PAGE_HASH_SIZE = 16
+PAGE_FILE_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+def _open_decompressed(path: str, compression: str):
+    """A binary reader over a file written by _open_compressed, or a plain file"""
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+    return open(path, 'rb')
+
+def _read_exact(stream, size: int) -> bytes:
+    """Read size bytes, fewer only at the end of the stream"""
+    data = stream.read(size)
+    while data and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+def _iter_page_records(path: str, compression: str, page_size: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield (page number, page) from a snapshot page file"""
+    with _open_decompressed(path, compression) as stream:
+        while True:
+            header = _read_exact(stream, 4)
+            if not header:
+                return
+            page = _read_exact(stream, page_size)
+            if len(header) < 4 or len(page) < page_size:
+                raise ValueError(f"Snapshot page file is truncated: {path}")
+            yield struct.unpack('>I', header)[0], page
+
+def _hash_pages(path: str, page_size: int) -> bytearray:
+    """The concatenated PAGE_HASH_SIZE-byte hashes of every page of a database file"""
+    hashes = bytearray()
+    with open(path, 'rb') as file:
+        for page in iter(lambda: file.read(page_size), b''):
+            hashes += hashlib.blake2b(page, digest_size=PAGE_HASH_SIZE).digest()
+    return hashes
+
+def _digest(hashes: bytes) -> str:
+    """Digest of a whole snapshot image from its page hashes"""
+    return hashlib.blake2b(hashes, digest_size=PAGE_HASH_SIZE).hexdigest()
+
+def _write_json(path: str, data: Dict):
+    """Replace a JSON file atomically"""
+    with open(path + '.partial', 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=1)
+    os.replace(path + '.partial', path)
+
+def _page_size(path: str) -> int:
+    """Page size from a database file header"""
+    with open(path, 'rb') as file:
+        header = file.read(18)
+    size = struct.unpack('>H', header[16:18])[0]
+    return 65536 if size == 1 else size
+
+def _quick_check(path: str):
+    """Raise ValueError unless a database file passes PRAGMA quick_check"""
+    # immutable: nothing else has the file open, so skip locking and the WAL index
+    conn = sqlite3.connect(f"{pathlib.Path(path).resolve().as_uri()}?immutable=1", uri=True)
+    try:
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise ValueError(f"Database failed its integrity check: {result}")
+
+def _read_chain(chain_dir: str) -> Optional[Dict]:
+    """A chain's manifest, or None if it is missing or unreadable"""
+    try:
+        with open(os.path.join(chain_dir, 'manifest.json'), encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def list_snapshot_chains(snapshot_dir: str) -> List[str]:
+    """Chain directories in a snapshot directory, oldest first"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(os.path.join(snapshot_dir, name) for name in os.listdir(snapshot_dir)
+                  if name.startswith('chain_') and os.path.isdir(os.path.join(snapshot_dir, name)))
+
+def list_snapshots(snapshot_dir: str) -> List[Dict]:
+    """Every restorable snapshot, oldest first, with its chain directory and index"""
+    snapshots = []
+    for chain_dir in list_snapshot_chains(snapshot_dir):
+        manifest = _read_chain(chain_dir)
+        for index, snapshot in enumerate(manifest['snapshots'] if manifest else []):
+            snapshots.append(dict(snapshot, chain=chain_dir, index=index))
+    return snapshots
+
+def take_snapshot(db_manager, snapshot_dir: str, compression: str = 'gzip', chain_length: int = 24,
+                  keep_days: int = 7, progress: Optional[Callable] = None) -> Dict:
+    """Add an incremental snapshot of the live database, returns what was written
+    
+    The database is copied with backup_database and checked with quick_check,
+    then only pages whose hash changed since the chain's last snapshot are
+    stored. A chain starts over with a full copy every chain_length snapshots,
+    and chains whose newest snapshot is more than keep_days days old are
+    deleted. The page file is read back and checked against the page hashes
+    before the snapshot is recorded.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    copy_path = os.path.join(snapshot_dir, 'snapshot.db')
+    leftovers = [copy_path]
+    try:
+        backup_database(db_manager, copy_path, progress=progress)
+        _quick_check(copy_path)
+        page_size = _page_size(copy_path)
+        hashes = _hash_pages(copy_path, page_size)
+        
+        chains = list_snapshot_chains(snapshot_dir)
+        chain_dir = chains[-1] if chains else None
+        manifest = _read_chain(chain_dir) if chain_dir else None
+        previous = b''
+        if manifest is not None:
+            with open(os.path.join(chain_dir, 'hashes.bin'), 'rb') as file:
+                previous = file.read()
+            if (len(manifest['snapshots']) >= chain_length or manifest['page_size'] != page_size
+                    or manifest['compression'] != compression
+                    or _digest(previous) != manifest['snapshots'][-1]['digest']):
+                manifest = None
+        if manifest is None:
+            chain_dir = os.path.join(snapshot_dir, f"chain_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+            os.makedirs(chain_dir)
+            manifest = {'page_size': page_size, 'compression': compression, 'snapshots': []}
+            previous = b''
+        
+        changed = [number for number in range(len(hashes) // PAGE_HASH_SIZE)
+                   if hashes[number * PAGE_HASH_SIZE:(number + 1) * PAGE_HASH_SIZE]
+                   != previous[number * PAGE_HASH_SIZE:(number + 1) * PAGE_HASH_SIZE]]
+        index = len(manifest['snapshots'])
+        page_file = f"{index:04d}.pages{PAGE_FILE_SUFFIXES[compression]}"
+        page_path = os.path.join(chain_dir, page_file)
+        leftovers.append(page_path + '.partial')
+        with open(copy_path, 'rb') as source:
+            with _open_compressed(page_path + '.partial', compression) as writer:
+                for number in changed:
+                    source.seek(number * page_size)
+                    writer.write(struct.pack('>I', number + 1) + source.read(page_size))
+        
+        # Read the file back before trusting it with the chain
+        written = 0
+        for number, page in _iter_page_records(page_path + '.partial', compression, page_size):
+            expected = hashes[(number - 1) * PAGE_HASH_SIZE:number * PAGE_HASH_SIZE]
+            if hashlib.blake2b(page, digest_size=PAGE_HASH_SIZE).digest() != expected:
+                raise ValueError(f"Snapshot page {number} did not read back correctly")
+            written += 1
+        if written != len(changed):
+            raise ValueError("Snapshot page file is incomplete")
+        os.replace(page_path + '.partial', page_path)
+        
+        with open(os.path.join(chain_dir, 'hashes.bin.partial'), 'wb') as file:
+            file.write(hashes)
+        os.replace(os.path.join(chain_dir, 'hashes.bin.partial'), os.path.join(chain_dir, 'hashes.bin'))
+        snapshot = {
+            'file': page_file,
+            'created': datetime.now().isoformat(),
+            'page_count': len(hashes) // PAGE_HASH_SIZE,
+            'changed_pages': len(changed),
+            'size': os.path.getsize(page_path),
+            'digest': _digest(hashes),
+        }
+        manifest['snapshots'].append(snapshot)
+        _write_json(os.path.join(chain_dir, 'manifest.json'), manifest)
+    finally:
+        for path in leftovers:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    prune_snapshots(snapshot_dir, keep_days, keep=chain_dir)
+    return dict(snapshot, chain=chain_dir, index=index)
+
+def prune_snapshots(snapshot_dir: str, keep_days: int, keep: Optional[str] = None) -> int:
+    """Delete chains whose newest snapshot is older than keep_days days, returns how many went
+    
+    A chain without a readable manifest is aged by its directory's modification
+    time. The chain named by keep is never deleted.
+    """
+    cutoff = datetime.now() - timedelta(days=keep_days)
+    removed = 0
+    for chain_dir in list_snapshot_chains(snapshot_dir):
+        if chain_dir == keep:
+            continue
+        manifest = _read_chain(chain_dir)
+        if manifest and manifest['snapshots']:
+            newest = datetime.fromisoformat(manifest['snapshots'][-1]['created'])
+        else:
+            newest = datetime.fromtimestamp(os.path.getmtime(chain_dir))
+        if newest < cutoff:
+            shutil.rmtree(chain_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+def restore_snapshot(chain_dir: str, index: int, target_path: str) -> Dict:
+    """Rebuild snapshot index of a chain as a plain database file at target_path
+    
+    The pages of the chain's full copy and each increment up to index are laid
+    down in order; the result must match the snapshot's digest and pass
+    quick_check before it replaces target_path.
+    """
+    manifest = _read_chain(chain_dir)
+    if manifest is None or not 0 <= index < len(manifest['snapshots']):
+        raise ValueError(f"No snapshot {index} in {chain_dir}")
+    page_size = manifest['page_size']
+    snapshot = manifest['snapshots'][index]
+    
+    partial_path = target_path + '.partial'
+    try:
+        with open(partial_path, 'wb') as image:
+            for step in manifest['snapshots'][:index + 1]:
+                for number, page in _iter_page_records(os.path.join(chain_dir, step['file']),
+                                                       manifest['compression'], page_size):
+                    image.seek((number - 1) * page_size)
+                    image.write(page)
+            image.truncate(snapshot['page_count'] * page_size)
+        
+        if _digest(_hash_pages(partial_path, page_size)) != snapshot['digest']:
+            raise ValueError("Rebuilt snapshot does not match its digest")
+        _quick_check(partial_path)
+        os.replace(partial_path, target_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return snapshot
+
+# Restore
+
+COMPRESSION_MAGIC = {b'\x1f\x8b': 'gzip', b'\x28\xb5\x2f\xfd': 'zstd'}
+
+def _compression_of(path: str) -> str:
+    """BACKUP_COMPRESSIONS key of a backup file, from its first bytes"""
+    with open(path, 'rb') as file:
+        head = file.read(4)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return 'none'
+
+def _connect_immutable(path: str) -> sqlite3.Connection:
+    """A connection that reads a backup file without locking it or creating journal files"""
+    return sqlite3.connect(pathlib.Path(os.path.abspath(path)).as_uri() + '?immutable=1', uri=True)
+
+def verify_backup(path: str) -> Dict:
+    """Raise ValueError unless path is an intact database this application can open
+    
+    Runs the full PRAGMA integrity_check, which reads every page and index, and
+    returns the page count, page size and schema version.
+    """
+    try:
+        conn = _connect_immutable(path)
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA integrity_check(10)")]
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            info = {
+                'pages': conn.execute("PRAGMA page_count").fetchone()[0],
+                'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+                'schema_version': conn.execute("PRAGMA user_version").fetchone()[0],
+            }
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Not a readable database: {e}")
+    
+    if problems != ['ok']:
+        raise ValueError("Backup failed the integrity check:\n" + "\n".join(problems))
+    missing = {'products', 'sales'} - tables
+    if missing:
+        raise ValueError(f"Not an inventory database (no {', '.join(sorted(missing))} table)")
+    if info['schema_version'] > len(MIGRATIONS):
+        raise ValueError("Backup was made by a newer version of the application")
+    return info
+
+def restore_database(db_manager, backup_path: Optional[str] = None, snapshot: Optional[Dict] = None,
+                     safety_path: Optional[str] = None, pages_per_step: int = PAGES_PER_STEP,
+                     progress: Optional[Callable] = None) -> Dict:
+    """Replace the live database with a backup file or a snapshot, returns the timings
+    
+    The backup is unpacked (gzip, zstd or a snapshot chain) next to the database
+    and must pass integrity_check before anything is touched. If safety_path is
+    given the current database is backed up there first. The pages are then
+    copied into the live database through the backup API in one write
+    transaction, so other connections keep reading the old data until it
+    commits and then see the restored data without reopening. Writers wait for
+    the commit on their busy timeout. Older schemas are migrated afterwards.
+    progress(phase, done, total) is called with phase 'unpack' (bytes),
+    'safety' and 'restore' (pages).
+    """
+    if (backup_path is None) == (snapshot is None):
+        raise ValueError("Restore needs either a backup file or a snapshot")
+    
+    work_path = os.path.abspath(db_manager.db_path) + '.restore'
+    start = time.perf_counter()
+    try:
+        # Unpack
+        source_path = backup_path
+        if snapshot is not None:
+            restore_snapshot(snapshot['chain'], snapshot['index'], work_path)
+            source_path = work_path
+        else:
+            compression = _compression_of(backup_path)
+            if compression == 'zstd' and not ZSTD_AVAILABLE:
+                raise ValueError("This backup is zstd compressed, which requires the zstandard package")
+            if compression != 'none':
+                total = os.path.getsize(backup_path)
+                with open(backup_path, 'rb') as raw, open(work_path, 'wb') as plain:
+                    if compression == 'gzip':
+                        packed = gzip.GzipFile(fileobj=raw)
+                    else:
+                        packed = zstandard.ZstdDecompressor().stream_reader(raw)
+                    for chunk in iter(lambda: packed.read(COPY_CHUNK_SIZE), b''):
+                        plain.write(chunk)
+                        if progress:
+                            progress('unpack', raw.tell(), total)
+                source_path = work_path
+        unpack_seconds = time.perf_counter() - start
+        
+        # Verify
+        verify_start = time.perf_counter()
+        info = verify_backup(source_path)
+        verify_seconds = time.perf_counter() - verify_start
+        
+        if safety_path:
+            backup_database(db_manager, safety_path, pages_per_step=pages_per_step,
+                            progress=progress and (lambda phase, done, total: progress('safety', done, total)))
+        
+        # Restore
+        restore_start = time.perf_counter()
+        target = db_manager.get_connection()
+        live_page_size = target.execute("PRAGMA page_size").fetchone()[0]
+        journal_mode = target.execute("PRAGMA journal_mode").fetchone()[0].lower()
+        if journal_mode == 'wal' and live_page_size != info['page_size']:
+            raise ValueError(f"Backup page size ({info['page_size']}) differs from the live "
+                             f"database's ({live_page_size}), which WAL mode cannot change")
+        
+        def step(status, remaining, total):
+            if progress:
+                progress('restore', total - remaining, total)
+        
+        source = _connect_immutable(source_path)
+        try:
+            source.backup(target, pages=pages_per_step, progress=step)
+        finally:
+            source.close()
+        db_manager.product_cache.clear()
+        db_manager.migrate()
+        restore_seconds = time.perf_counter() - restore_start
+    finally:
+        if os.path.exists(work_path):
+            os.remove(work_path)
+    
+    return {
+        'pages': info['pages'],
+        'schema_version': info['schema_version'],
+        'safety_path': safety_path,
+        'unpack_seconds': unpack_seconds,
+        'verify_seconds': verify_seconds,
+        'restore_seconds': restore_seconds,
+        'total_seconds': time.perf_counter() - start,
+    }
@@ -5,18 +5,676 @@ Handles all database operations for the inventory system
 
 import sqlite3
 import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+
+# Storage profiles applied to every connection as it is opened.
+# cache_size is in KiB when negative (SQLite convention), mmap_size in bytes.
+STORAGE_PROFILES = {
+    'compatibility': {
+        'label': "Compatibility (rollback journal)",
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'label': "Balanced (WAL)",
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+    'performance': {
+        'label': "High Performance (WAL, large cache)",
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+DEFAULT_STORAGE_PROFILE = 'balanced'
+
+def create_product_search(cursor: sqlite3.Cursor):
+    """Create the FTS5 product search index and the triggers that keep it in sync"""
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, category, barcode,
+                content='products', content_rowid='id', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5; search_products falls back to LIKE
+        print(f"Full-text search unavailable: {e}")
+        return
+    
+    create_product_search_triggers(cursor)
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+def create_product_search_triggers(cursor: sqlite3.Cursor):
+    """Create the triggers that keep products_fts in step with row-by-row product changes"""
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, description, category, barcode)
+            VALUES (new.id, new.name, new.description, new.category, new.barcode);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category, barcode)
+            VALUES ('delete', old.id, old.name, old.description, old.category, old.barcode);
+        END
+    ''')
+    # Only the indexed columns, so stock updates on every sale never touch the index
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_update
+        AFTER UPDATE OF name, description, category, barcode ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category, barcode)
+            VALUES ('delete', old.id, old.name, old.description, old.category, old.barcode);
+            INSERT INTO products_fts (rowid, name, description, category, barcode)
+            VALUES (new.id, new.name, new.description, new.category, new.barcode);
+        END
+    ''')
+
+def create_sales_rollup_triggers(cursor: sqlite3.Cursor, unit_cost: str):
+    """(Re)create the triggers that keep daily_product_sales in step with sales
+    
+    unit_cost is the SQL for the cost of one unit of the sale row {row}.
+    """
+    # Triggers run inside the writing transaction, so the rollup commits or
+    # rolls back together with the sale whichever code path recorded it
+    add_new = f'''
+        INSERT INTO daily_product_sales (sale_day, product_id, sale_count, quantity, revenue, cost)
+        VALUES (substr(new.sale_date, 1, 10), new.product_id, 1, new.quantity, new.total_amount,
+                new.quantity * {unit_cost.format(row='new')})
+        ON CONFLICT (sale_day, product_id) DO UPDATE SET
+            sale_count = sale_count + 1,
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue,
+            cost = cost + excluded.cost;
+    '''
+    remove_old = f'''
+        UPDATE daily_product_sales SET
+            sale_count = sale_count - 1,
+            quantity = quantity - old.quantity,
+            revenue = revenue - old.total_amount,
+            cost = cost - old.quantity * {unit_cost.format(row='old')}
+        WHERE sale_day = substr(old.sale_date, 1, 10) AND product_id = old.product_id;
+        DELETE FROM daily_product_sales
+        WHERE sale_day = substr(old.sale_date, 1, 10) AND product_id = old.product_id AND sale_count <= 0;
+    '''
+    for trigger in ('sales_rollup_insert', 'sales_rollup_delete', 'sales_rollup_update'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute(f"CREATE TRIGGER sales_rollup_insert AFTER INSERT ON sales BEGIN {add_new} END")
+    cursor.execute(f"CREATE TRIGGER sales_rollup_delete AFTER DELETE ON sales BEGIN {remove_old} END")
+    cursor.execute(f'''
+        CREATE TRIGGER sales_rollup_update
+        AFTER UPDATE OF product_id, quantity, total_amount, sale_date, unit_cost ON sales
+        BEGIN {remove_old} {add_new} END
+    ''')
+
+def create_sales_rollup(cursor: sqlite3.Cursor):
+    """Create the daily_product_sales rollup, the triggers that maintain it and backfill it"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_product_sales (
+            sale_day TEXT,
+            product_id INTEGER,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            cost REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (sale_day, product_id)
+        )
+    ''')
+    # Sales carry no cost of their own yet, so cost comes from the product
+    create_sales_rollup_triggers(
+        cursor, "COALESCE((SELECT cost_price FROM products WHERE id = {row}.product_id), 0)")
+    cursor.execute('''
+        INSERT INTO daily_product_sales (sale_day, product_id, sale_count, quantity, revenue, cost)
+        SELECT substr(s.sale_date, 1, 10), s.product_id, COUNT(*), SUM(s.quantity),
+               SUM(s.total_amount), SUM(s.quantity * COALESCE(p.cost_price, 0))
+        FROM sales s
+        LEFT JOIN products p ON s.product_id = p.id
+        GROUP BY 1, 2
+    ''')
+
+def rebuild_sales_rollup(cursor: sqlite3.Cursor):
+    """Recompute the daily_product_sales rollup from the sales table"""
+    cursor.execute("DELETE FROM daily_product_sales")
+    cursor.execute('''
+        INSERT INTO daily_product_sales (sale_day, product_id, sale_count, quantity, revenue, cost)
+        SELECT substr(sale_date, 1, 10), product_id, COUNT(*), SUM(quantity),
+               SUM(total_amount), SUM(quantity * COALESCE(unit_cost, 0))
+        FROM sales
+        GROUP BY 1, 2
+    ''')
+
+def snapshot_sale_costs(cursor: sqlite3.Cursor):
+    """Store each sale's unit cost on the sale row and base the rollup on it"""
+    cursor.execute("ALTER TABLE sales ADD COLUMN unit_cost REAL")
+    # Existing sales only have the product's current cost to go on
+    cursor.execute('''
+        UPDATE sales SET unit_cost = (SELECT cost_price FROM products WHERE id = sales.product_id)
+    ''')
+    # Covers date-range revenue, cost and profit sums without touching the table
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sales_date_amounts
+        ON sales (sale_date, product_id, quantity, total_amount, unit_cost)
+    ''')
+    create_sales_rollup_triggers(cursor, "COALESCE({row}.unit_cost, 0)")
+    rebuild_sales_rollup(cursor)
+
+# Tables whose row counts are kept in change_versions, so statistics never scan them
+COUNTED_TABLES = ('products', 'sales', 'transactions', 'purchases', 'daily_product_sales')
+
+def track_row_counts(cursor: sqlite3.Cursor):
+    """Keep a row count per counted table in change_versions, maintained by triggers"""
+    cursor.execute("ALTER TABLE change_versions ADD COLUMN row_count INTEGER NOT NULL DEFAULT 0")
+    for table in COUNTED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO change_versions (table_name, version) VALUES (?, 0)", (table,))
+        # The last full count; the triggers keep it from here on
+        cursor.execute(f"UPDATE change_versions SET row_count = (SELECT COUNT(*) FROM {table}) "
+                       "WHERE table_name = ?", (table,))
+    
+    # products and sales already bump their version on every insert and delete,
+    # so the count rides along in the same UPDATE
+    for trigger in ('products_changed_insert', 'products_changed_delete',
+                    'sales_changed_insert', 'sales_changed_delete'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute('''
+        CREATE TRIGGER products_changed_insert AFTER INSERT ON products BEGIN
+            UPDATE change_versions SET version = version + 1, row_count = row_count + 1
+            WHERE table_name = 'products';
+            UPDATE products SET change_version = (
+                SELECT version FROM change_versions WHERE table_name = 'products'
+            ) WHERE id = new.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER products_changed_delete AFTER DELETE ON products BEGIN
+            UPDATE change_versions SET version = version + 1, row_count = row_count - 1
+            WHERE table_name = 'products';
+            INSERT OR REPLACE INTO deleted_products (id, change_version)
+            SELECT old.id, version FROM change_versions WHERE table_name = 'products';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER sales_changed_insert AFTER INSERT ON sales BEGIN
+            UPDATE change_versions SET version = version + 1, row_count = row_count + 1
+            WHERE table_name = 'sales';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER sales_changed_delete AFTER DELETE ON sales BEGIN
+            UPDATE change_versions SET version = version + 1, row_count = row_count - 1
+            WHERE table_name = 'sales';
+        END
+    ''')
+    
+    # The other counted tables only need their count kept
+    for table in COUNTED_TABLES[2:]:
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_counted_insert AFTER INSERT ON {table} BEGIN
+                UPDATE change_versions SET row_count = row_count + 1 WHERE table_name = '{table}';
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_counted_delete AFTER DELETE ON {table} BEGIN
+                UPDATE change_versions SET row_count = row_count - 1 WHERE table_name = '{table}';
+            END
+        ''')
+
+# Schema migrations, applied in order on startup. Each step is a list of SQL
+# statements or a callable taking a cursor; PRAGMA user_version records how
+# many steps a database has already run. Only ever append to this list.
+MIGRATIONS = [
+    # 1: secondary indexes for date-range reports and name/category lookups
+    [
+        "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales (sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales (product_id, sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products (category)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_product_date ON purchases (product_id, purchase_date)",
+    ],
+    # 2: basket checkout - a transaction header per customer, sales rows are its line items
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_count INTEGER NOT NULL,
+                total_amount REAL NOT NULL,
+                notes TEXT,
+                transaction_date TEXT
+            )
+        ''',
+        "ALTER TABLE sales ADD COLUMN transaction_id INTEGER REFERENCES transactions (id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_transaction ON sales (transaction_id)",
+    ],
+    # 3: full-text product search
+    create_product_search,
+    # 4: change tracking - a version counter per table, bumped by triggers, and a
+    # per-product stamp so tabs can fetch only what changed since their last refresh
+    [
+        "CREATE TABLE IF NOT EXISTS change_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO change_versions (table_name, version) VALUES ('products', 0), ('sales', 0)",
+        "ALTER TABLE products ADD COLUMN change_version INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_products_change_version ON products (change_version)",
+        '''
+            CREATE TABLE IF NOT EXISTS deleted_products (
+                id INTEGER PRIMARY KEY,
+                change_version INTEGER NOT NULL
+            )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_deleted_products_change_version ON deleted_products (change_version)",
+        '''
+            CREATE TRIGGER IF NOT EXISTS products_changed_insert AFTER INSERT ON products BEGIN
+                UPDATE change_versions SET version = version + 1 WHERE table_name = 'products';
+                UPDATE products SET change_version = (
+                    SELECT version FROM change_versions WHERE table_name = 'products'
+                ) WHERE id = new.id;
+            END
+        ''',
+        # The WHEN clause skips the trigger's own stamping update
+        '''
+            CREATE TRIGGER IF NOT EXISTS products_changed_update AFTER UPDATE ON products
+            WHEN new.change_version = old.change_version BEGIN
+                UPDATE change_versions SET version = version + 1 WHERE table_name = 'products';
+                UPDATE products SET change_version = (
+                    SELECT version FROM change_versions WHERE table_name = 'products'
+                ) WHERE id = new.id;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS products_changed_delete AFTER DELETE ON products BEGIN
+                UPDATE change_versions SET version = version + 1 WHERE table_name = 'products';
+                INSERT OR REPLACE INTO deleted_products (id, change_version)
+                SELECT old.id, version FROM change_versions WHERE table_name = 'products';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS sales_changed_insert AFTER INSERT ON sales BEGIN
+                UPDATE change_versions SET version = version + 1 WHERE table_name = 'sales';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS sales_changed_update AFTER UPDATE ON sales BEGIN
+                UPDATE change_versions SET version = version + 1 WHERE table_name = 'sales';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS sales_changed_delete AFTER DELETE ON sales BEGIN
+                UPDATE change_versions SET version = version + 1 WHERE table_name = 'sales';
+            END
+        ''',
+    ],
+    # 5: per-day, per-product sales totals so reports read rollup rows instead of every sale
+    create_sales_rollup,
+    # 6: cost price snapshot on each sale, so profit never changes with later cost edits
+    snapshot_sale_costs,
+    # 7: trigger-maintained row counts, so database statistics read one row per table
+    track_row_counts,
+]
+
+# bm25 column weights for products_fts: name, description, category, barcode
+PRODUCT_SEARCH_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+# Hot queries whose plans must stay index-backed, checked by verify_query_plans()
+INDEXED_QUERIES = {
+    'product_by_barcode': ("SELECT * FROM products WHERE barcode = ?", ('0',)),
+    'product_by_name': ("SELECT * FROM products WHERE name = ?", ('x',)),
+    'products_by_category': ("SELECT * FROM products WHERE category = ?", ('x',)),
+    'sales_by_date': ('''
+        SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount,
+               s.sale_date, p.name, s.unit_cost, t.notes
+        FROM sales s
+        JOIN products p ON s.product_id = p.id
+        LEFT JOIN transactions t ON t.id = s.transaction_id
+        WHERE s.sale_date >= ? AND s.sale_date < date(?, '+1 day')
+        ORDER BY s.sale_date DESC
+    ''', ('2000-01-01', '2000-01-31')),
+    'sales_profit_by_date': ('''
+        SELECT SUM(total_amount), SUM(quantity * unit_cost)
+        FROM sales WHERE sale_date >= ? AND sale_date < date(?, '+1 day')
+    ''', ('2000-01-01', '2000-01-31')),
+    'daily_sales_by_day': (
+        "SELECT * FROM daily_product_sales WHERE sale_day BETWEEN ? AND ?",
+        ('2000-01-01', '2000-01-31')),
+    'sales_by_product_date': (
+        "SELECT * FROM sales WHERE product_id = ? AND sale_date BETWEEN ? AND ?",
+        (1, '2000-01-01', '2000-01-31')),
+    'purchases_by_product_date': (
+        "SELECT * FROM purchases WHERE product_id = ? AND purchase_date BETWEEN ? AND ?",
+        (1, '2000-01-01', '2000-01-31')),
+    'products_changed_since': ("SELECT id FROM products WHERE change_version > ?", (0,)),
+    'products_deleted_since': ("SELECT id FROM deleted_products WHERE change_version > ?", (0,)),
+    'sales_after_id': ("SELECT * FROM sales WHERE id > ?", (0,)),
+    'sales_page': ('''
+        SELECT s.id FROM sales s
+        WHERE s.sale_date >= ? AND (s.sale_date, s.id) < (?, ?)
+        ORDER BY s.sale_date DESC, s.id DESC LIMIT 200
+    ''', ('2000-01-01', '2000-01-31', 0)),
+}
+
+class Record(Mapping):
+    """Row with attribute and read-only dict-style access
+    
+    Subclasses name their fields in __slots__, so each record keeps its values
+    in fixed slots instead of carrying a per-row dict. Records may be shared
+    (the product cache hands out the same one), so treat them as read-only;
+    dict(record) gives a plain, editable copy.
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def from_row(cls, cursor: sqlite3.Cursor, row: Tuple) -> 'Record':
+        """sqlite3 row_factory building a record from the leading columns of a row"""
+        return cls(*row[:len(cls.__slots__)])
+    
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(self.__slots__)
+    
+    def __len__(self):
+        return len(self.__slots__)
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+class Product(Record):
+    """One products row"""
+    
+    __slots__ = ('id', 'barcode', 'name', 'description', 'category', 'cost_price',
+                 'selling_price', 'quantity', 'min_quantity', 'created_date', 'updated_date')
+    _fields = frozenset(__slots__)
+    
+    def __init__(self, id, barcode, name, description, category, cost_price,
+                 selling_price, quantity, min_quantity, created_date, updated_date):
+        self.id = id
+        self.barcode = barcode
+        self.name = name
+        self.description = description
+        self.category = category
+        self.cost_price = cost_price
+        self.selling_price = selling_price
+        self.quantity = quantity
+        self.min_quantity = min_quantity
+        self.created_date = created_date
+        self.updated_date = updated_date
+
+class Sale(Record):
+    """One sales row with its product name, unit cost, transaction notes and profit"""
+    
+    __slots__ = ('id', 'product_id', 'quantity', 'unit_price', 'total_price',
+                 'sale_date', 'product_name', 'cost_price', 'notes', 'profit')
+    _fields = frozenset(__slots__)
+    
+    def __init__(self, id, product_id, quantity, unit_price, total_price,
+                 sale_date, product_name, cost_price, notes=None, profit=None):
+        cost_price = cost_price or 0  # unit cost when the sale was made
+        self.id = id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.total_price = total_price  # Using total_price key for compatibility
+        self.sale_date = sale_date
+        self.product_name = product_name
+        self.cost_price = cost_price
+        self.notes = notes or ''
+        self.profit = (unit_price - cost_price) * quantity if profit is None else profit
+
+class ConnectionManager:
+    """Hands out one persistent SQLite connection per thread"""
+    
+    def __init__(self, db_path: str, cached_statements: int = 256,
+                 storage_profile: str = DEFAULT_STORAGE_PROFILE):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.storage_profile = storage_profile
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []  # (owner thread, connection) pairs
+        self._generation = 0
+    
+    def get(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            if self._local.generation == self._generation:
+                return conn
+            # Opened under an older profile; only this thread uses it, so it can go now
+            self._release(conn)
+        
+        # Statements are compiled once per connection and kept in sqlite3's
+        # statement cache, so repeated lookups skip the SQL parser entirely
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        self._apply_profile(conn)
+        
+        with self._lock:
+            self._prune_dead_threads()
+            self._connections.append((threading.current_thread(), conn))
+            self._local.conn = conn
+            self._local.generation = self._generation
+        return conn
+    
+    def _apply_profile(self, conn: sqlite3.Connection):
+        """Apply the storage profile pragmas to a freshly opened connection"""
+        profile = STORAGE_PROFILES.get(self.storage_profile, STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE])
+        
+        # Only takes effect on a new file, and only before journal_mode writes its header.
+        # Lets maintenance hand free pages back a few at a time instead of running VACUUM.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        
+        # journal_mode is persistent in the database file, the rest are per connection.
+        # Leaving WAL needs exclusive access, so keep the current mode if another
+        # process still has the file open.
+        try:
+            conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        except sqlite3.OperationalError as e:
+            print(f"Could not change journal mode: {e}")
+        conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+        conn.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+    
+    def set_storage_profile(self, storage_profile: str):
+        """Switch storage profile; each thread reopens with the new pragmas on its next get()
+        
+        Connections are not closed here, since other threads may be mid-query on them.
+        """
+        if storage_profile not in STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile: {storage_profile}")
+        with self._lock:
+            self.storage_profile = storage_profile
+            self._generation += 1
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Close the calling thread's outdated connection"""
+        with self._lock:
+            self._connections = [(thread, other) for thread, other in self._connections if other is not conn]
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing connection: {e}")
+    
+    def _prune_dead_threads(self):
+        """Close connections whose owning thread has exited"""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+    
+    def close_all(self):
+        """Close every connection; threads reconnect lazily on next use"""
+        with self._lock:
+            for _, conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    print(f"Error closing connection: {e}")
+            self._connections = []
+            self._generation += 1
+    
+    @property
+    def open_count(self) -> int:
+        """Number of connections currently held open"""
+        with self._lock:
+            return len(self._connections)
+
+class ProductCache:
+    """LRU cache of product rows keyed by id, with a barcode index"""
+    
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._products = OrderedDict()  # id -> Product, least recently used first
+        self._barcodes = {}  # barcode -> id
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.version = 0  # Bumped on every invalidation
+    
+    def get_by_id(self, product_id: int) -> Optional['Product']:
+        """Get a cached product by id"""
+        with self._lock:
+            product = self._products.get(product_id)
+            if product is None:
+                self.misses += 1
+                return None
+            self._products.move_to_end(product_id)
+            self.hits += 1
+            return product
+    
+    def get_by_barcode(self, barcode: str) -> Optional['Product']:
+        """Get a cached product by barcode"""
+        with self._lock:
+            product_id = self._barcodes.get(barcode)
+            if product_id is None:
+                self.misses += 1
+                return None
+            self._products.move_to_end(product_id)
+            self.hits += 1
+            return self._products[product_id]
+    
+    def put(self, product: 'Product', version: int = None):
+        """Cache a product, evicting the least recently used one if full"""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            # A write landed between reading this row and caching it, so it may be stale
+            if version is not None and version != self.version:
+                return
+            self._discard(product['id'])
+            # Products are read-only, so callers can share the cached record
+            self._products[product['id']] = product
+            if product.get('barcode'):
+                self._barcodes[product['barcode']] = product['id']
+            while len(self._products) > self.capacity:
+                evicted = self._products.popitem(last=False)[1]
+                self._barcodes.pop(evicted.get('barcode'), None)
+    
+    def invalidate(self, product_id: int = None, barcode: str = None):
+        """Drop a product from the cache by id and/or barcode"""
+        with self._lock:
+            self.version += 1
+            if barcode is not None and product_id is None:
+                product_id = self._barcodes.get(barcode)
+            if product_id is not None:
+                self._discard(product_id)
+    
+    def _discard(self, product_id: int):
+        """Remove a product and its barcode index entry (lock held)"""
+        product = self._products.pop(product_id, None)
+        if product is not None:
+            self._barcodes.pop(product.get('barcode'), None)
+    
+    def clear(self):
+        """Drop every cached product"""
+        with self._lock:
+            self.version += 1
+            self._products.clear()
+            self._barcodes.clear()
+    
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._products),
+                'capacity': self.capacity,
+            }
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "inventory.db"):
+    def __init__(self, db_path: str = "inventory.db", storage_profile: str = DEFAULT_STORAGE_PROFILE,
+                 product_cache_size: int = 4096):
         """Initialize database connection"""
         self.db_path = db_path
+        if storage_profile not in STORAGE_PROFILES:
+            print(f"Unknown storage profile '{storage_profile}', using '{DEFAULT_STORAGE_PROFILE}'")
+            storage_profile = DEFAULT_STORAGE_PROFILE
+        self.connections = ConnectionManager(db_path, storage_profile=storage_profile)
+        # Written through by every product/stock write in this process. Writes from
+        # other processes are not seen, but checkout re-checks stock atomically.
+        self.product_cache = ProductCache(product_cache_size)
         self.init_database()
     
+    def get_connection(self) -> sqlite3.Connection:
+        """Get the persistent connection for the calling thread"""
+        return self.connections.get()
+    
+    @property
+    def storage_profile(self) -> str:
+        """Name of the active storage profile"""
+        return self.connections.storage_profile
+    
+    def set_storage_profile(self, storage_profile: str) -> bool:
+        """Switch the storage profile used by all connections"""
+        try:
+            self.connections.set_storage_profile(storage_profile)
+            self.get_connection()  # Reopen now so journal mode changes take effect
+            return True
+        except Exception as e:
+            print(f"Error setting storage profile: {e}")
+            return False
+    
+    def get_storage_status(self) -> Dict:
+        """Get the pragma values currently in effect"""
+        try:
+            conn = self.get_connection()
+            status = {'profile': self.storage_profile}
+            for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store'):
+                status[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+            
+            # SQLite reports these two as enum ordinals
+            status['synchronous'] = ('OFF', 'NORMAL', 'FULL', 'EXTRA')[status['synchronous']]
+            status['temp_store'] = ('DEFAULT', 'FILE', 'MEMORY')[status['temp_store']]
+            return status
+        except Exception as e:
+            print(f"Error getting storage status: {e}")
+            return {}
+    
     def init_database(self):
         """Initialize database tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
         
         # Create products table
@@ -63,178 +721,337 @@ class DatabaseManager:
         ''')
         
         conn.commit()
-        conn.close()
+        
+        self.migrate()
+    
+    def get_schema_version(self) -> int:
+        """Get the number of migrations applied to this database"""
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+    
+    @contextmanager
+    def transaction(self):
+        """Run a block inside BEGIN IMMEDIATE on this thread's connection"""
+        conn = self.get_connection()
+        # IMMEDIATE takes the write lock up front, so concurrent writers queue
+        # on busy_timeout instead of failing midway through the block
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def migrate(self):
+        """Apply any schema migrations this database has not run yet"""
+        version = self.get_schema_version()
+        
+        for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            try:
+                with self.transaction() as cursor:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        for statement in step:
+                            cursor.execute(statement)
+                    cursor.execute(f"PRAGMA user_version = {number}")
+            except Exception:
+                print(f"Error applying schema migration {number}")
+                raise
+    
+    def explain_query_plan(self, query: str, params: Tuple = ()) -> List[str]:
+        """Get the EXPLAIN QUERY PLAN detail lines for a query"""
+        rows = self.get_connection().execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return [row[3] for row in rows]
+    
+    def verify_query_plans(self) -> Dict[str, List[str]]:
+        """Check the hot queries still use indexes; returns the full scans found per query"""
+        problems = {}
+        for name, (query, params) in INDEXED_QUERIES.items():
+            # "SCAN t" is a full table scan; index walks read "SCAN t USING ... INDEX"
+            scans = [detail for detail in self.explain_query_plan(query, params)
+                     if detail.startswith('SCAN') and 'USING' not in detail]
+            if scans:
+                problems[name] = scans
+        return problems
     
     def add_product(self, product_data: Dict) -> bool:
         """Add a new product to the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO products (barcode, name, description, category, 
-                                   cost_price, selling_price, quantity, min_quantity, 
-                                   created_date, updated_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                product_data.get('barcode'),
-                product_data.get('name'),
-                product_data.get('description', ''),
-                product_data.get('category', ''),
-                product_data.get('cost_price'),
-                product_data.get('selling_price'),
-                product_data.get('quantity', 0),
-                product_data.get('min_quantity', 0),
-                datetime.now().isoformat(),
-                datetime.now().isoformat()
-            ))
+            conn = self.get_connection()
+            with conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    INSERT INTO products (barcode, name, description, category, 
+                                       cost_price, selling_price, quantity, min_quantity, 
+                                       created_date, updated_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    product_data.get('barcode'),
+                    product_data.get('name'),
+                    product_data.get('description', ''),
+                    product_data.get('category', ''),
+                    product_data.get('cost_price'),
+                    product_data.get('selling_price'),
+                    product_data.get('quantity', 0),
+                    product_data.get('min_quantity', 0),
+                    datetime.now().isoformat(),
+                    datetime.now().isoformat()
+                ))
             
-            conn.commit()
-            conn.close()
+            self.product_cache.invalidate(barcode=product_data.get('barcode'))
             return True
         except Exception as e:
             print(f"Error adding product: {e}")
             return False
     
-    def get_product_by_barcode(self, barcode: str) -> Optional[Dict]:
+    def get_product_by_barcode(self, barcode: str) -> Optional[Product]:
         """Get product by barcode"""
+        product = self.product_cache.get_by_barcode(barcode)
+        if product is not None:
+            return product
+        
+        version = self.product_cache.version
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.get_connection()
             cursor = conn.cursor()
+            cursor.row_factory = Product.from_row
             
             cursor.execute('SELECT * FROM products WHERE barcode = ?', (barcode,))
-            row = cursor.fetchone()
-            
-            conn.close()
+            product = cursor.fetchone()
             
-            if row:
-                return {
-                    'id': row[0],
-                    'barcode': row[1],
-                    'name': row[2],
-                    'description': row[3],
-                    'category': row[4],
-                    'cost_price': row[5],
-                    'selling_price': row[6],
-                    'quantity': row[7],
-                    'min_quantity': row[8],
-                    'created_date': row[9],
-                    'updated_date': row[10]
-                }
-            return None
+            if product:
+                self.product_cache.put(product, version)
+            return product
         except Exception as e:
             print(f"Error getting product: {e}")
             return None
     
-    def update_product_quantity(self, product_id: int, new_quantity: int) -> bool:
-        """Update product quantity"""
+    def get_product_by_id(self, product_id: int) -> Optional[Product]:
+        """Get product by id"""
+        product = self.product_cache.get_by_id(product_id)
+        if product is not None:
+            return product
+        
+        version = self.product_cache.version
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.get_connection()
             cursor = conn.cursor()
+            cursor.row_factory = Product.from_row
             
-            cursor.execute('''
-                UPDATE products 
-                SET quantity = ?, updated_date = ?
-                WHERE id = ?
-            ''', (new_quantity, datetime.now().isoformat(), product_id))
+            cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
+            product = cursor.fetchone()
             
-            conn.commit()
-            conn.close()
+            if product:
+                self.product_cache.put(product, version)
+            return product
+        except Exception as e:
+            print(f"Error getting product by id: {e}")
+            return None
+    
+    def update_product_quantity(self, product_id: int, new_quantity: int) -> bool:
+        """Update product quantity"""
+        try:
+            conn = self.get_connection()
+            with conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    UPDATE products 
+                    SET quantity = ?, updated_date = ?
+                    WHERE id = ?
+                ''', (new_quantity, datetime.now().isoformat(), product_id))
+            
+            self.product_cache.invalidate(product_id)
             return True
         except Exception as e:
             print(f"Error updating quantity: {e}")
             return False
     
-    def add_sale(self, product_id: int, quantity: int, unit_price: float) -> bool:
-        """Record a sale transaction"""
+    def add_sale(self, product_id: int, quantity: int, unit_price: float,
+                 check_stock: bool = True) -> bool:
+        """Record a sale transaction, refused unless enough is in stock; check_stock=False allows back-orders"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
+            now = datetime.now().isoformat()
             total_amount = quantity * unit_price
             
-            # Add sale record
-            cursor.execute('''
-                INSERT INTO sales (product_id, quantity, unit_price, total_amount, sale_date)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (product_id, quantity, unit_price, total_amount, datetime.now().isoformat()))
-            
-            # Update product quantity
-            cursor.execute('SELECT quantity FROM products WHERE id = ?', (product_id,))
-            current_quantity = cursor.fetchone()[0]
-            new_quantity = current_quantity - quantity
-            
-            cursor.execute('''
-                UPDATE products 
-                SET quantity = ?, updated_date = ?
-                WHERE id = ?
-            ''', (new_quantity, datetime.now().isoformat(), product_id))
+            with self.transaction() as cursor:
+                # Decrement stock in SQL so concurrent registers can't lose updates
+                if check_stock:
+                    cursor.execute('''
+                        UPDATE products 
+                        SET quantity = quantity - ?, updated_date = ?
+                        WHERE id = ? AND quantity >= ?
+                    ''', (quantity, now, product_id, quantity))
+                    if cursor.rowcount == 0:
+                        raise ValueError(f"product {product_id} not found or has less than {quantity} in stock")
+                else:
+                    cursor.execute('''
+                        UPDATE products 
+                        SET quantity = quantity - ?, updated_date = ?
+                        WHERE id = ?
+                    ''', (quantity, now, product_id))
+                    if cursor.rowcount == 0:
+                        raise ValueError(f"product {product_id} not found")
+                
+                # Add sale record, snapshotting the cost it was sold at
+                cursor.execute('''
+                    INSERT INTO sales (product_id, quantity, unit_price, total_amount, sale_date, unit_cost)
+                    VALUES (?, ?, ?, ?, ?, (SELECT cost_price FROM products WHERE id = ?))
+                ''', (product_id, quantity, unit_price, total_amount, now, product_id))
             
-            conn.commit()
-            conn.close()
+            self.product_cache.invalidate(product_id)
             return True
         except Exception as e:
             print(f"Error adding sale: {e}")
             return False
     
-    def get_all_products(self) -> List[Dict]:
+    def add_sale_batch(self, lines: List[Dict], notes: str = '') -> Optional[int]:
+        """Record a basket of sale lines as one transaction, returns its id"""
+        if not lines:
+            return None
+        try:
+            now = datetime.now().isoformat()
+            total_amount = sum(line['quantity'] * line['unit_price'] for line in lines)
+            item_count = sum(line['quantity'] for line in lines)
+            
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO transactions (item_count, total_amount, notes, transaction_date)
+                    VALUES (?, ?, ?, ?)
+                ''', (item_count, total_amount, notes, now))
+                transaction_id = cursor.lastrowid
+                
+                # Every line must find enough stock, otherwise the whole basket rolls back
+                cursor.executemany('''
+                    UPDATE products 
+                    SET quantity = quantity - ?, updated_date = ?
+                    WHERE id = ? AND quantity >= ?
+                ''', [(line['quantity'], now, line['product_id'], line['quantity']) for line in lines])
+                
+                if cursor.rowcount != len(lines):
+                    raise ValueError("one or more products are missing or out of stock")
+                
+                cursor.executemany('''
+                    INSERT INTO sales (product_id, quantity, unit_price, total_amount, sale_date,
+                                       transaction_id, unit_cost)
+                    VALUES (?, ?, ?, ?, ?, ?, (SELECT cost_price FROM products WHERE id = ?))
+                ''', [
+                    (line['product_id'], line['quantity'], line['unit_price'],
+                     line['quantity'] * line['unit_price'], now, transaction_id, line['product_id'])
+                    for line in lines
+                ])
+            
+            for line in lines:
+                self.product_cache.invalidate(line['product_id'])
+            return transaction_id
+        except Exception as e:
+            print(f"Error adding sale batch: {e}")
+            return None
+    
+    def _iter_rows(self, query: str, params: Tuple = (), batch_size: int = 1000,
+                   row_factory=None) -> Iterator:
+        """Yield the rows of a query, holding at most batch_size of them at a time
+        
+        The cursor belongs to the calling thread's connection and keeps its read
+        snapshot open until the iterator is exhausted or discarded.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = row_factory
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    
+    def iter_products(self, batch_size: int = 1000) -> Iterator[Product]:
+        """Yield all products ordered by name without loading them all at once"""
+        yield from self._iter_rows('SELECT * FROM products ORDER BY name', batch_size=batch_size,
+                                   row_factory=Product.from_row)
+    
+    def get_all_products(self) -> List[Product]:
         """Get all products"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            return list(self.iter_products())
+        except Exception as e:
+            print(f"Error getting products: {e}")
+            return []
+    
+    def get_product_rows(self) -> List[Tuple]:
+        """Get the inventory table columns for all products as plain tuples"""
+        try:
+            conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute('SELECT * FROM products ORDER BY name')
-            rows = cursor.fetchall()
+            cursor.execute('''
+                SELECT id, barcode, name, category, cost_price, selling_price, quantity, min_quantity
+                FROM products ORDER BY name
+            ''')
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting product rows: {e}")
+            return []
+    
+    def get_change_versions(self) -> Dict[str, int]:
+        """Get the change counter of each tracked table; a table is unchanged while its counter is"""
+        try:
+            conn = self.get_connection()
+            return dict(conn.execute('SELECT table_name, version FROM change_versions').fetchall())
+        except Exception as e:
+            print(f"Error getting change versions: {e}")
+            return {}
+    
+    def get_product_changes(self, since: int) -> Tuple[List[Tuple], List[int]]:
+        """Get products changed and ids deleted after a products change version
+        
+        Changed rows have the get_product_rows columns. Read the version with
+        get_change_versions first; rows changed meanwhile are simply seen twice.
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
-            conn.close()
+            cursor.execute('''
+                SELECT id, barcode, name, category, cost_price, selling_price, quantity, min_quantity
+                FROM products WHERE change_version > ?
+            ''', (since,))
+            changed = cursor.fetchall()
             
-            products = []
-            for row in rows:
-                products.append({
-                    'id': row[0],
-                    'barcode': row[1],
-                    'name': row[2],
-                    'description': row[3],
-                    'category': row[4],
-                    'cost_price': row[5],
-                    'selling_price': row[6],
-                    'quantity': row[7],
-                    'min_quantity': row[8],
-                    'created_date': row[9],
-                    'updated_date': row[10]
-                })
+            cursor.execute('SELECT id FROM deleted_products WHERE change_version > ?', (since,))
+            deleted = [row[0] for row in cursor.fetchall()]
             
-            return products
+            return changed, deleted
         except Exception as e:
-            print(f"Error getting products: {e}")
-            return []
+            print(f"Error getting product changes: {e}")
+            return [], []
     
     def get_sales_report(self, start_date: str = None, end_date: str = None) -> List[Tuple]:
         """Get sales report data as tuples for compatibility with reports"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.get_connection()
             cursor = conn.cursor()
             
             if start_date and end_date:
                 cursor.execute('''
                     SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount, 
-                           s.sale_date, p.name, p.cost_price
+                           s.sale_date, p.name, s.unit_cost
                     FROM sales s
                     JOIN products p ON s.product_id = p.id
-                    WHERE s.sale_date BETWEEN ? AND ?
+                    WHERE s.sale_date >= ? AND s.sale_date < date(?, '+1 day')
                     ORDER BY s.sale_date DESC
                 ''', (start_date, end_date))
             else:
                 cursor.execute('''
                     SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount, 
-                           s.sale_date, p.name, p.cost_price
+                           s.sale_date, p.name, s.unit_cost
                     FROM sales s
                     JOIN products p ON s.product_id = p.id
                     ORDER BY s.sale_date DESC
                 ''')
             
             rows = cursor.fetchall()
-            conn.close()
             
             # Return raw rows as tuples for compatibility with reports
             return rows
@@ -242,168 +1059,466 @@ class DatabaseManager:
             print(f"Error getting sales report: {e}")
             return []
     
-    def get_sales_data(self, start_date: str = None, end_date: str = None) -> List[Dict]:
-        """Get sales data as dictionaries for sales tab compatibility"""
+    @staticmethod
+    def _day_range_clause(start_date: str = None, end_date: str = None) -> Tuple[str, List]:
+        """WHERE clause and parameters limiting rollup rows d to a range of whole days"""
+        if start_date and end_date:
+            return 'WHERE d.sale_day BETWEEN ? AND ?', [str(start_date)[:10], str(end_date)[:10]]
+        return '', []
+    
+    def get_product_sales_summary(self, start_date: str = None, end_date: str = None) -> List[Dict]:
+        """Get units sold, revenue and cost per product with its current stock, best sellers first"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.get_connection()
             cursor = conn.cursor()
             
-            if start_date and end_date:
-                cursor.execute('''
-                    SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount, 
-                           s.sale_date, p.name, p.cost_price
-                    FROM sales s
-                    JOIN products p ON s.product_id = p.id
-                    WHERE s.sale_date BETWEEN ? AND ?
-                    ORDER BY s.sale_date DESC
-                ''', (start_date, end_date))
-            else:
-                cursor.execute('''
-                    SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount, 
-                           s.sale_date, p.name, p.cost_price
-                    FROM sales s
-                    JOIN products p ON s.product_id = p.id
-                    ORDER BY s.sale_date DESC
-                ''')
+            where, params = self._day_range_clause(start_date, end_date)
+            cursor.execute(f'''
+                SELECT p.id, p.name, SUM(d.quantity), SUM(d.revenue), SUM(d.cost), p.quantity
+                FROM daily_product_sales d
+                JOIN products p ON d.product_id = p.id
+                {where}
+                GROUP BY d.product_id
+                ORDER BY 4 DESC
+            ''', params)
             
-            rows = cursor.fetchall()
-            conn.close()
+            summary = []
+            for row in cursor.fetchall():
+                revenue = row[3] or 0
+                cost = row[4] or 0
+                summary.append({
+                    'product_id': row[0],
+                    'product_name': row[1],
+                    'total_sold': row[2],
+                    'revenue': revenue,
+                    'cost': cost,
+                    'profit': revenue - cost,
+                    'stock_level': row[5]
+                })
             
-            sales = []
-            for row in rows:
-                cost_price = row[7] or 0
-                profit = (row[3] - cost_price) * row[2]  # (unit_price - cost_price) * quantity
-                
-                sales.append({
-                    'id': row[0],
-                    'product_id': row[1],
-                    'quantity': row[2],
-                    'unit_price': row[3],
-                    'total_price': row[4],  # Using total_price key for compatibility
-                    'sale_date': row[5],
-                    'product_name': row[6],
-                    'cost_price': cost_price,
-                    'profit': profit
+            return summary
+        except Exception as e:
+            print(f"Error getting product sales summary: {e}")
+            return []
+    
+    def get_daily_sales_summary(self, start_date: str = None, end_date: str = None) -> List[Dict]:
+        """Get order count, revenue, cost and profit per day, oldest first"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            where, params = self._day_range_clause(start_date, end_date)
+            cursor.execute(f'''
+                SELECT d.sale_day, SUM(d.sale_count), SUM(d.revenue), SUM(d.cost)
+                FROM daily_product_sales d
+                {where}
+                GROUP BY d.sale_day
+                ORDER BY d.sale_day
+            ''', params)
+            
+            summary = []
+            for row in cursor.fetchall():
+                revenue = row[2] or 0
+                cost = row[3] or 0
+                summary.append({
+                    'date': row[0],
+                    'orders': row[1],
+                    'revenue': revenue,
+                    'cost': cost,
+                    'profit': revenue - cost
                 })
             
-            return sales
+            return summary
         except Exception as e:
-            print(f"Error getting sales data: {e}")
+            print(f"Error getting daily sales summary: {e}")
             return []
     
-    def get_low_stock_products(self) -> List[Dict]:
-        """Get products with low stock"""
+    def rebuild_sales_rollup(self) -> bool:
+        """Recompute the daily sales rollup from scratch, e.g. after editing sales outside the app"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            with self.transaction() as cursor:
+                rebuild_sales_rollup(cursor)
+            return True
+        except Exception as e:
+            print(f"Error rebuilding sales rollup: {e}")
+            return False
+    
+    def iter_sales(self, start_date: str = None, end_date: str = None, batch_size: int = 1000,
+                   after_id: int = None) -> Iterator[Sale]:
+        """Yield sales newest first as Sale records, batch_size rows at a time
+        
+        after_id limits the result to sales recorded after that sale id. Errors
+        propagate, so a failed export or report is not mistaken for an empty one.
+        """
+        conditions = []
+        params = []
+        if start_date and end_date:
+            conditions.append("s.sale_date >= ? AND s.sale_date < date(?, '+1 day')")
+            params.extend([start_date, end_date])
+        if after_id is not None:
+            conditions.append('s.id > ?')
+            params.append(after_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        query = f'''
+            SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount, 
+                   s.sale_date, p.name, s.unit_cost, t.notes
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+            LEFT JOIN transactions t ON t.id = s.transaction_id
+            {where}
+            ORDER BY s.sale_date DESC
+        '''
+        
+        yield from self._iter_rows(query, tuple(params), batch_size, row_factory=Sale.from_row)
+    
+    def get_sales_page(self, start_date: str = None, end_date: str = None,
+                       after: Tuple[str, int] = None, limit: int = 200) -> List[Sale]:
+        """Get up to limit sales newest first, continuing after the (sale_date, id) of the last one seen
+        
+        Keyset pagination: every page is an index range scan starting where the
+        previous page stopped, so page 1000 costs the same as page 1.
+        """
+        try:
+            conn = self.get_connection()
             cursor = conn.cursor()
+            cursor.row_factory = Sale.from_row
             
-            cursor.execute('''
-                SELECT * FROM products 
-                WHERE quantity <= min_quantity AND min_quantity > 0
-                ORDER BY quantity ASC
-            ''')
+            conditions = []
+            params = []
+            if start_date and end_date:
+                conditions.append('s.sale_date >= ?')
+                params.append(start_date)
+            # The keyset bound replaces the end date, which it already lies below
+            if after is not None:
+                conditions.append('(s.sale_date, s.id) < (?, ?)')
+                params.extend(after)
+            elif start_date and end_date:
+                conditions.append("s.sale_date < date(?, '+1 day')")
+                params.append(end_date)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
             
-            rows = cursor.fetchall()
-            conn.close()
+            cursor.execute(f'''
+                SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount, 
+                       s.sale_date, p.name, s.unit_cost, t.notes
+                FROM sales s
+                JOIN products p ON s.product_id = p.id
+                LEFT JOIN transactions t ON t.id = s.transaction_id
+                {where}
+                ORDER BY s.sale_date DESC, s.id DESC
+                LIMIT ?
+            ''', params + [limit])
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting sales page: {e}")
+            return []
+    
+    def get_sales_totals(self, start_date: str = None, end_date: str = None) -> Dict:
+        """Get sale count, items, revenue, cost and profit over whole days from the daily rollup"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
-            products = []
-            for row in rows:
-                products.append({
-                    'id': row[0],
-                    'barcode': row[1],
-                    'name': row[2],
-                    'description': row[3],
-                    'category': row[4],
-                    'cost_price': row[5],
-                    'selling_price': row[6],
-                    'quantity': row[7],
-                    'min_quantity': row[8],
-                    'created_date': row[9],
-                    'updated_date': row[10]
-                })
+            where, params = self._day_range_clause(start_date, end_date)
+            cursor.execute(f'''
+                SELECT SUM(d.sale_count), SUM(d.quantity), SUM(d.revenue), SUM(d.cost)
+                FROM daily_product_sales d
+                {where}
+            ''', params)
+            orders, quantity, revenue, cost = cursor.fetchone()
             
-            return products
+            revenue = revenue or 0
+            cost = cost or 0
+            return {
+                'orders': orders or 0,
+                'quantity': quantity or 0,
+                'revenue': revenue,
+                'cost': cost,
+                'profit': revenue - cost
+            }
+        except Exception as e:
+            print(f"Error getting sales totals: {e}")
+            return {'orders': 0, 'quantity': 0, 'revenue': 0, 'cost': 0, 'profit': 0}
+    
+    def get_sales_data(self, start_date: str = None, end_date: str = None,
+                       after_id: int = None) -> List[Sale]:
+        """Get sales data as Sale records, which read like the old dictionaries
+        
+        after_id limits the result to sales recorded after that sale id.
+        """
+        try:
+            return list(self.iter_sales(start_date, end_date, after_id=after_id))
+        except Exception as e:
+            print(f"Error getting sales data: {e}")
+            return []
+    
+    def get_low_stock_products(self) -> List[Product]:
+        """Get products with low stock"""
+        try:
+            return list(self._iter_rows('''
+                SELECT * FROM products 
+                WHERE quantity <= min_quantity AND min_quantity > 0
+                ORDER BY quantity ASC
+            ''', row_factory=Product.from_row))
         except Exception as e:
             print(f"Error getting low stock products: {e}")
             return []
     
-    def get_product_by_name(self, product_name: str) -> Dict:
+    def get_product_by_name(self, product_name: str) -> Optional[Product]:
         """Get product by name"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.get_connection()
             cursor = conn.cursor()
+            cursor.row_factory = Product.from_row
             
             cursor.execute('''
                 SELECT * FROM products WHERE name = ?
             ''', (product_name,))
             
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                return {
-                    'id': row[0],
-                    'barcode': row[1],
-                    'name': row[2],
-                    'description': row[3],
-                    'category': row[4],
-                    'cost_price': row[5],
-                    'selling_price': row[6],
-                    'quantity': row[7],
-                    'min_quantity': row[8],
-                    'created_date': row[9],
-                    'updated_date': row[10]
-                }
-            return None
+            return cursor.fetchone()
         except Exception as e:
             print(f"Error getting product by name: {e}")
             return None
     
-    def update_product(self, product_data: Dict) -> bool:
-        """Update an existing product"""
+    def has_product_search(self) -> bool:
+        """Whether the FTS5 product search index exists"""
+        row = self.get_connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        ).fetchone()
+        return row is not None
+    
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn search box text into an FTS5 query matching every word as a prefix"""
+        # Each word becomes a quoted string, with embedded quotes doubled, so
+        # punctuation and FTS5 operators in the search box are plain text
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in query.split())
+    
+    @staticmethod
+    def _like_pattern(text: str) -> str:
+        """A LIKE pattern (ESCAPE '\\') matching text anywhere, with % and _ taken literally"""
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+    
+    def search_products(self, query: str, limit: int = 50, offset: int = 0,
+                        category: Optional[str] = None) -> List[Product]:
+        """Search products by name, description, category and barcode, best matches first
+        
+        Words match as prefixes through the FTS5 index; the whole text also
+        matches anywhere inside a barcode, so part of a code finds it.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            if not query.strip():
+                return []
+            conn = self.get_connection()
             cursor = conn.cursor()
+            cursor.row_factory = Product.from_row
             
-            cursor.execute('''
-                UPDATE products 
-                SET name = ?, description = ?, category = ?, cost_price = ?, 
-                    selling_price = ?, quantity = ?, min_quantity = ?, updated_date = ?
-                WHERE id = ?
-            ''', (
-                product_data.get('name'),
-                product_data.get('description', ''),
-                product_data.get('category', ''),
-                product_data.get('cost_price'),
-                product_data.get('selling_price'),
-                product_data.get('quantity', 0),
-                product_data.get('min_quantity', 0),
-                datetime.now().isoformat(),
-                product_data.get('id')
-            ))
+            pattern = self._like_pattern(query.strip())
+            if self.has_product_search():
+                # bm25 ranks are negative, so barcode-only matches (rank 0) come last
+                cursor.execute(f'''
+                    WITH matches (id, rank) AS (
+                        SELECT rowid, bm25(products_fts, {', '.join(map(str, PRODUCT_SEARCH_WEIGHTS))})
+                        FROM products_fts WHERE products_fts MATCH ?
+                        UNION ALL
+                        SELECT id, 0 FROM products WHERE barcode LIKE ? ESCAPE '\\'
+                    )
+                    SELECT p.* FROM (SELECT id, MIN(rank) AS rank FROM matches GROUP BY id) m
+                    JOIN products p ON p.id = m.id
+                    WHERE ? IS NULL OR p.category = ?
+                    ORDER BY m.rank, p.name
+                    LIMIT ? OFFSET ?
+                ''', (self._fts_query(query), pattern, category, category, limit, offset))
+            else:
+                cursor.execute('''
+                    SELECT * FROM products
+                    WHERE (name LIKE ? ESCAPE '\\' OR barcode LIKE ? ESCAPE '\\'
+                           OR category LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')
+                      AND (? IS NULL OR category = ?)
+                    ORDER BY name
+                    LIMIT ? OFFSET ?
+                ''', (pattern, pattern, pattern, pattern, category, category, limit, offset))
             
-            conn.commit()
-            conn.close()
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error searching products: {e}")
+            return []
+    
+    def update_product(self, product_data: Dict) -> bool:
+        """Update an existing product"""
+        try:
+            conn = self.get_connection()
+            with conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    UPDATE products 
+                    SET name = ?, description = ?, category = ?, cost_price = ?, 
+                        selling_price = ?, quantity = ?, min_quantity = ?, updated_date = ?
+                    WHERE id = ?
+                ''', (
+                    product_data.get('name'),
+                    product_data.get('description', ''),
+                    product_data.get('category', ''),
+                    product_data.get('cost_price'),
+                    product_data.get('selling_price'),
+                    product_data.get('quantity', 0),
+                    product_data.get('min_quantity', 0),
+                    datetime.now().isoformat(),
+                    product_data.get('id')
+                ))
+            
+            self.product_cache.invalidate(product_data.get('id'))
             return True
         except Exception as e:
             print(f"Error updating product: {e}")
             return False
     
+    def upsert_products(self, rows: List[Tuple], update_columns: List[str]) -> Optional[int]:
+        """Insert or update products keyed on barcode in one transaction, returns the row count
+        
+        Each row is (barcode, name, description, category, cost_price, selling_price,
+        quantity, min_quantity). Existing products only take the update_columns, so
+        fields missing from an import file keep their current values.
+        """
+        if not rows:
+            return 0
+        try:
+            now = datetime.now().isoformat()
+            assignments = ''.join(f"{column} = excluded.{column}, " for column in update_columns)
+            # The FTS triggers keep the search index in step row by row; changing
+            # them here would be schema DDL that makes every connection re-prepare
+            with self.transaction() as cursor:
+                cursor.executemany(f'''
+                    INSERT INTO products (barcode, name, description, category,
+                                       cost_price, selling_price, quantity, min_quantity,
+                                       created_date, updated_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(barcode) DO UPDATE SET {assignments}updated_date = excluded.updated_date
+                ''', (row + (now, now) for row in rows))
+            
+            self.product_cache.clear()
+            return len(rows)
+        except Exception as e:
+            print(f"Error importing products: {e}")
+            return None
+    
     def delete_product(self, product_id: int) -> bool:
         """Delete a product from the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.get_connection()
+            with conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
+            
+            self.product_cache.invalidate(product_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting product: {e}")
+            return False
+    
+    def get_row_counts(self) -> Dict[str, int]:
+        """Get the trigger-maintained row count of each of COUNTED_TABLES without scanning them"""
+        try:
+            conn = self.get_connection()
+            placeholders = ', '.join('?' * len(COUNTED_TABLES))
+            return dict(conn.execute(
+                f"SELECT table_name, row_count FROM change_versions WHERE table_name IN ({placeholders})",
+                COUNTED_TABLES).fetchall())
+        except Exception as e:
+            print(f"Error getting row counts: {e}")
+            return {}
+    
+    def get_record_counts(self) -> Dict[str, int]:
+        """Get the row count of every application table"""
+        try:
+            conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
+            # Skip SQLite's own tables and the search index, which mirrors products
+            cursor.execute('''
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'products_fts%'
+                ORDER BY name
+            ''')
+            tables = [row[0] for row in cursor.fetchall()]
             
-            conn.commit()
-            conn.close()
+            # Counted tables come from their triggers; the rest are small bookkeeping tables
+            tracked = self.get_row_counts()
+            counts = {}
+            for table in tables:
+                if table in tracked:
+                    counts[table] = tracked[table]
+                else:
+                    counts[table] = cursor.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            return counts
+        except Exception as e:
+            print(f"Error counting records: {e}")
+            return {}
+    
+    def get_space_usage(self, measure_fragmentation: bool = False) -> Dict:
+        """Get page counts, free space and, if asked, how scattered table and index pages are
+        
+        fragmentation is the share of b-tree leaf pages that do not directly
+        follow the previous leaf of the same table or index, read from dbstat
+        (a full scan of the file); None when not measured or unavailable.
+        """
+        try:
+            conn = self.get_connection()
+            usage = {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                     for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum')}
+            usage['auto_vacuum'] = ('NONE', 'FULL', 'INCREMENTAL')[usage['auto_vacuum']]
+            usage['free_bytes'] = usage['freelist_count'] * usage['page_size']
+            usage['fragmentation'] = None
+            
+            if measure_fragmentation:
+                try:
+                    leaves = jumps = 0
+                    previous = (None, None)
+                    for name, pageno in conn.execute("SELECT name, pageno FROM dbstat WHERE pagetype = 'leaf'"):
+                        if previous[0] == name and pageno != previous[1] + 1:
+                            jumps += 1
+                        leaves += 1
+                        previous = (name, pageno)
+                    usage['fragmentation'] = jumps / leaves if leaves else 0.0
+                except sqlite3.OperationalError as e:
+                    print(f"Fragmentation not measured, SQLite lacks dbstat: {e}")
+            return usage
+        except Exception as e:
+            print(f"Error getting space usage: {e}")
+            return {}
+    
+    def get_database_stats(self) -> Dict:
+        """Get row counts, page counts, free space and file sizes from metadata alone
+        
+        Row counts come from get_record_counts, pages and free space from
+        get_space_usage (pragmas read from the header), and the write-ahead log
+        size from its file, so the cost does not grow with the sales table.
+        """
+        try:
+            stats = self.get_space_usage()
+            stats['record_counts'] = self.get_record_counts()
+            stats['file_bytes'] = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+            wal_path = self.db_path + '-wal'
+            stats['wal_bytes'] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+            return stats
+        except Exception as e:
+            print(f"Error getting database statistics: {e}")
+            return {}
+    
+    def checkpoint(self) -> bool:
+        """Fold the WAL back into the main database file"""
+        try:
+            conn = self.get_connection()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             return True
         except Exception as e:
-            print(f"Error deleting product: {e}")
+            print(f"Error checkpointing database: {e}")
             return False
     
     def close(self):
         """Close database connections"""
-        pass  # SQLite connections are closed after each operation
+        self.connections.close_all()
+        self.product_cache.clear()
@@ -399,13 +399,18 @@ Handles product management, search, and inventory operations
 """
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                             QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QMessageBox, QDialog, QFormLayout,
+                             QLabel, QLineEdit, QHeaderView, QMessageBox, QDialog, QFormLayout,
                              QSpinBox, QDoubleSpinBox, QTextEdit, QComboBox,
-                             QGroupBox, QSplitter, QFrame, QSizePolicy, QGridLayout)
-from PyQt5.QtCore import Qt, pyqtSignal
+                             QGroupBox, QSplitter, QFrame, QSizePolicy, QGridLayout,
+                             QTableView, QFileDialog, QProgressDialog)
+from PyQt5.QtCore import (Qt, pyqtSignal, QAbstractTableModel, QAbstractProxyModel, QModelIndex,
+                          QPersistentModelIndex, QObject, QTimer)
 from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPixmap
+from array import array
+from bisect import bisect_left
 from .currency_utils import format_currency, get_currency_symbol
+from .query_executor import QueryExecutor
+from .product_import import import_products, write_error_report, OPENPYXL_AVAILABLE
 # QR Code generation will be handled locally to avoid import issues
 
 class ProductDialog(QDialog):
@@ -596,12 +601,423 @@ class ProductDialog(QDialog):
             'min_quantity': self.min_quantity_edit.value()
         }
 
+class ProductTableModel(QAbstractTableModel):
+    """Inventory table model backed by a column store; cells are formatted only when shown"""
+    
+    HEADERS = ["ID", "Barcode", "Name", "Category", "Cost Price", "Selling Price", "Quantity", "Status"]
+    ALIGNMENTS = [
+        Qt.AlignCenter, Qt.AlignCenter, Qt.AlignLeft | Qt.AlignVCenter, Qt.AlignCenter,
+        Qt.AlignRight | Qt.AlignVCenter, Qt.AlignRight | Qt.AlignVCenter,
+        Qt.AlignRight | Qt.AlignVCenter, Qt.AlignCenter
+    ]
+    
+    # Status colours: (background, status text)
+    IN_STOCK_COLORS = (QColor(230, 245, 230), QColor(39, 174, 96))
+    LOW_STOCK_COLORS = (QColor(255, 255, 230), QColor(230, 126, 34))
+    OUT_OF_STOCK_COLORS = (QColor(255, 230, 230), QColor(231, 76, 60))
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sort_column = None
+        self.sort_order = Qt.AscendingOrder
+        self.set_products([])
+    
+    def set_products(self, rows):
+        """Replace the model contents with rows from DatabaseManager.get_product_rows"""
+        self.beginResetModel()
+        self.ids = array('q')
+        self.barcodes = []
+        self.names = []
+        self.categories = []
+        self.cost_prices = array('d')
+        self.selling_prices = array('d')
+        self.quantities = array('q')
+        self.min_quantities = array('q')
+        
+        for values in rows:
+            self._append_row(values)
+        
+        self._barcode_rows = None
+        self._id_rows = None
+        if self.sort_column is not None:
+            self._reorder(self._sorted_rows(self.sort_column, self.sort_order))
+        self.endResetModel()
+    
+    def _append_row(self, values):
+        """Append one get_product_rows tuple to the column store"""
+        product_id, barcode, name, category, cost_price, selling_price, quantity, min_quantity = values
+        self.ids.append(product_id)
+        self.barcodes.append(barcode or '')
+        self.names.append(name or '')
+        self.categories.append(category or '')
+        self.cost_prices.append(cost_price or 0.0)
+        self.selling_prices.append(selling_price or 0.0)
+        self.quantities.append(int(quantity or 0))
+        self.min_quantities.append(int(min_quantity or 0))
+    
+    def _set_row(self, row, values):
+        """Overwrite one row of the column store with a get_product_rows tuple"""
+        product_id, barcode, name, category, cost_price, selling_price, quantity, min_quantity = values
+        self.barcodes[row] = barcode or ''
+        self.names[row] = name or ''
+        self.categories[row] = category or ''
+        self.cost_prices[row] = cost_price or 0.0
+        self.selling_prices[row] = selling_price or 0.0
+        self.quantities[row] = int(quantity or 0)
+        self.min_quantities[row] = int(min_quantity or 0)
+    
+    def apply_changes(self, rows, deleted_ids=()):
+        """Patch the store from DatabaseManager.get_product_changes instead of reloading it
+        
+        Changed products are updated in place, new ones appended and deleted ones
+        dropped. Updated rows keep their position until the next sort.
+        """
+        deleted_ids = set(deleted_ids)
+        if deleted_ids:
+            kept_rows = [row for row, product_id in enumerate(self.ids) if product_id not in deleted_ids]
+            if len(kept_rows) != len(self.ids):
+                self.beginResetModel()
+                self._reorder(kept_rows)
+                self.endResetModel()
+        
+        added = []
+        for values in rows:
+            row = self.row_for_id(values[0])
+            if row < 0:
+                added.append(values)
+                continue
+            self._set_row(row, values)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+        self._barcode_rows = None
+        
+        if added:
+            first = len(self.ids)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for values in added:
+                self._append_row(values)
+            self._id_rows = None
+            self.endInsertRows()
+            if self.sort_column is not None:
+                self.sort(self.sort_column, self.sort_order)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(self.ids[row])
+            elif column == 1:
+                return self.barcodes[row] or 'N/A'
+            elif column == 2:
+                return self.names[row]
+            elif column == 3:
+                return self.categories[row] or 'Uncategorized'
+            elif column == 4:
+                return format_currency(self.cost_prices[row])
+            elif column == 5:
+                return format_currency(self.selling_prices[row])
+            elif column == 6:
+                return str(self.quantities[row])
+            return self.status_text(self.quantities[row], self.min_quantities[row])
+        
+        if role == Qt.TextAlignmentRole:
+            return self.ALIGNMENTS[column]
+        
+        if role == Qt.BackgroundRole and column in (6, 7):
+            colors = self.status_colors(row)
+            if column == 7 or colors is not self.IN_STOCK_COLORS:
+                return colors[0]
+        elif role == Qt.ForegroundRole and column == 7:
+            return self.status_colors(row)[1]
+        return None
+    
+    def status_colors(self, row):
+        """Background and text colours for a row's stock status"""
+        quantity = self.quantities[row]
+        min_quantity = self.min_quantities[row]
+        if quantity <= 0:
+            return self.OUT_OF_STOCK_COLORS
+        elif min_quantity > 0 and quantity <= min_quantity:
+            return self.LOW_STOCK_COLORS
+        return self.IN_STOCK_COLORS
+    
+    @staticmethod
+    def status_text(quantity, min_quantity):
+        """Get status text based on quantity"""
+        if quantity <= 0:
+            return "Out of Stock"
+        elif min_quantity > 0 and quantity <= min_quantity:
+            return f"Low Stock ({quantity})"
+        else:
+            return "In Stock"
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort the column store in place, keeping selections on the same products"""
+        self.sort_column = column
+        self.sort_order = order
+        new_order = self._sorted_rows(column, order)
+        
+        self.layoutAboutToBeChanged.emit()
+        new_positions = [0] * len(new_order)
+        for new_row, old_row in enumerate(new_order):
+            new_positions[old_row] = new_row
+        self._reorder(new_order)
+        
+        old_indexes = self.persistentIndexList()
+        new_indexes = [self.index(new_positions[index.row()], index.column()) for index in old_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+    
+    def _sorted_rows(self, column, order):
+        """Row permutation that sorts the store by a column"""
+        keys = [
+            self.ids, self.barcodes, self.names, self.categories, self.cost_prices,
+            self.selling_prices, self.quantities, self.quantities
+        ][column]
+        return sorted(range(len(self.ids)), key=keys.__getitem__, reverse=(order == Qt.DescendingOrder))
+    
+    def _reorder(self, new_order):
+        """Apply a row permutation to every column"""
+        self.ids = array('q', [self.ids[i] for i in new_order])
+        self.barcodes = [self.barcodes[i] for i in new_order]
+        self.names = [self.names[i] for i in new_order]
+        self.categories = [self.categories[i] for i in new_order]
+        self.cost_prices = array('d', [self.cost_prices[i] for i in new_order])
+        self.selling_prices = array('d', [self.selling_prices[i] for i in new_order])
+        self.quantities = array('q', [self.quantities[i] for i in new_order])
+        self.min_quantities = array('q', [self.min_quantities[i] for i in new_order])
+        self._barcode_rows = None
+        self._id_rows = None
+    
+    def product_id(self, row):
+        """Database id of the product shown in a row"""
+        return self.ids[row]
+    
+    def row_for_barcode(self, barcode):
+        """Row showing a barcode, or -1"""
+        if self._barcode_rows is None:
+            self._barcode_rows = {barcode: row for row, barcode in enumerate(self.barcodes)}
+        return self._barcode_rows.get(barcode, -1)
+    
+    def row_for_id(self, product_id):
+        """Row showing a product id, or -1"""
+        if self._id_rows is None:
+            self._id_rows = {product_id: row for row, product_id in enumerate(self.ids)}
+        return self._id_rows.get(product_id, -1)
+    
+    def summary(self):
+        """Total stock value, product count, low stock and out of stock counts"""
+        total_value = sum(q * c for q, c in zip(self.quantities, self.cost_prices))
+        low_stock = sum(1 for q, m in zip(self.quantities, self.min_quantities) if 0 < q <= m)
+        out_of_stock = sum(1 for q in self.quantities if q <= 0)
+        return total_value, len(self.ids), low_stock, out_of_stock
+
+class ProductFilterProxyModel(QAbstractProxyModel):
+    """Filters the inventory model by category, or to the ranked results of a database search"""
+    
+    visible_count_changed = pyqtSignal(int)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ''
+        self.category = None
+        self.product_ids = None  # ranked database search results, if searching
+        self.ranked = False
+        self.rows = array('l')  # source rows that pass the filter, in source order
+        self._proxy_rows = None  # source row -> proxy row, built on demand
+        self._pending_indexes = []
+    
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.layoutAboutToBeChanged.connect(self._on_source_layout_about_to_change)
+        model.layoutChanged.connect(self._on_source_layout_changed)
+        model.dataChanged.connect(self._on_source_data_changed)
+        model.rowsInserted.connect(self._on_source_rows_inserted)
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+    
+    def set_filter(self, search_text, category=None, product_ids=None):
+        """Apply an optional category and, when searching, the results of a database search
+        
+        product_ids is the ranked result of DatabaseManager.search_products for
+        search_text and is shown in that order until the view is re-sorted.
+        """
+        if (search_text, category, product_ids) == (self.search_text, self.category, self.product_ids):
+            return
+        self.search_text = search_text
+        self.category = category
+        self.product_ids = product_ids
+        self.ranked = product_ids is not None
+        
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+    
+    def is_filtering(self):
+        """Whether any filter is active"""
+        return bool(self.search_text) or self.category is not None
+    
+    def _update_rows(self):
+        """Recompute the visible source rows"""
+        if self.product_ids is not None:
+            self._update_search_rows()
+            return
+        self.rows = array('l', self._matching_rows(range(self.sourceModel().rowCount())))
+        self._proxy_rows = None
+        self.visible_count_changed.emit(len(self.rows))
+    
+    def _matching_rows(self, candidates):
+        """Source rows among candidates in the chosen category"""
+        if self.category is None:
+            return list(candidates)
+        categories = self.sourceModel().categories
+        category = self.category
+        return [row for row in candidates if categories[row] == category]
+    
+    def _update_search_rows(self):
+        """Show the database search results, ranked until the view is re-sorted"""
+        model = self.sourceModel()
+        categories = model.categories
+        category = self.category
+        rows = [model.row_for_id(product_id) for product_id in self.product_ids]
+        rows = [row for row in rows if row >= 0 and (category is None or categories[row] == category)]
+        if not self.ranked:
+            rows.sort()
+        self.rows = array('l', rows)
+        self._proxy_rows = None
+        self.visible_count_changed.emit(len(self.rows))
+    
+    def _on_source_reset(self):
+        self._update_rows()
+        self.endResetModel()
+    
+    def _on_source_rows_inserted(self, parent, first, last):
+        # The source only appends, so matching rows go on the end in source order.
+        # While searching, InventoryTab runs the search again to pick up new products.
+        if self.product_ids is not None:
+            return
+        rows = self._matching_rows(range(first, last + 1))
+        if rows:
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self.rows.extend(rows)
+            self._proxy_rows = None
+            self.endInsertRows()
+        self.visible_count_changed.emit(len(self.rows))
+    
+    def _on_source_layout_about_to_change(self, *args):
+        self.layoutAboutToBeChanged.emit()
+        # Track the source rows behind our persistent indexes through the re-sort
+        self._pending_indexes = [
+            (index, QPersistentModelIndex(self.mapToSource(index)))
+            for index in self.persistentIndexList()
+        ]
+    
+    def _on_source_layout_changed(self, *args):
+        # A header sort replaces search ranking with the column order
+        self.ranked = False
+        self._update_rows()
+        old_indexes = [index for index, _ in self._pending_indexes]
+        new_indexes = [self.mapFromSource(QModelIndex(source)) for _, source in self._pending_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self._pending_indexes = []
+        self.layoutChanged.emit()
+    
+    def _on_source_data_changed(self, top_left, bottom_right, *args):
+        changed = range(top_left.row(), bottom_right.row() + 1)
+        if self.product_ids is None:
+            # An edit can move a product into or out of the filter
+            matching = set(self._matching_rows(changed))
+            for row in changed:
+                position = bisect_left(self.rows, row)
+                visible = position < len(self.rows) and self.rows[position] == row
+                if visible and row not in matching:
+                    self.beginRemoveRows(QModelIndex(), position, position)
+                    del self.rows[position]
+                    self._proxy_rows = None
+                    self.endRemoveRows()
+                elif not visible and row in matching:
+                    self.beginInsertRows(QModelIndex(), position, position)
+                    self.rows.insert(position, row)
+                    self._proxy_rows = None
+                    self.endInsertRows()
+            self.visible_count_changed.emit(len(self.rows))
+        for row in changed:
+            index = self.mapFromSource(self.sourceModel().index(row, 0))
+            if index.isValid():
+                self.dataChanged.emit(index, index.sibling(index.row(), self.columnCount() - 1))
+    
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+    
+    def parent(self, index=None):
+        if index is None:
+            return QObject.parent(self)
+        return QModelIndex()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+    
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.rows[proxy_index.row()], proxy_index.column())
+    
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self._proxy_rows is None:
+            self._proxy_rows = {source_row: row for row, source_row in enumerate(self.rows)}
+        row = self._proxy_rows.get(source_index.row())
+        if row is None:
+            return QModelIndex()
+        return self.createIndex(row, source_index.column())
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        return self.sourceModel().data(self.mapToSource(index), role)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        return super().headerData(section, orientation, role)
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
 class InventoryTab(QWidget):
     """Inventory management tab"""
     
+    SEARCH_LIMIT = 1000  # most search results shown at once
+    
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
+        self.products_version = None
+        self.changes_pending = False
+        self.queries = QueryExecutor(self)
         self.init_ui()
         self.refresh_data()
         
@@ -632,6 +1048,12 @@ class InventoryTab(QWidget):
         main_layout.addLayout(header_layout)
         
         # Search and filter section
+        # Filtering waits for a pause in typing instead of running on every keystroke
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self.filter_products)
+        
         search_group = QGroupBox("Search & Filter")
         search_group.setStyleSheet("""
             QGroupBox {
@@ -655,8 +1077,8 @@ class InventoryTab(QWidget):
         search_label = QLabel("Search:")
         search_label.setStyleSheet("font-weight: bold;")
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("Search by name, barcode, or category...")
-        self.search_edit.textChanged.connect(self.filter_products)
+        self.search_edit.setPlaceholderText("Search by name, barcode, category or description...")
+        self.search_edit.textChanged.connect(lambda: self.filter_timer.start())
         self.search_edit.setClearButtonEnabled(True)
         search_layout.addWidget(search_label, 0, 0)
         search_layout.addWidget(self.search_edit, 0, 1)
@@ -764,15 +1186,17 @@ class InventoryTab(QWidget):
         main_layout.addLayout(button_layout)
         
         # Products table
-        self.products_table = QTableWidget()
-        self.products_table.setColumnCount(8)
-        self.products_table.setHorizontalHeaderLabels([
-            "ID", "Barcode", "Name", "Category", "Cost Price", "Selling Price", "Quantity", "Status"
-        ])
+        self.products_model = ProductTableModel(self)
+        self.products_proxy = ProductFilterProxyModel(self)
+        self.products_proxy.setSourceModel(self.products_model)
+        self.products_proxy.visible_count_changed.connect(self.on_visible_count_changed)
+        self.products_proxy.modelReset.connect(self.on_selection_changed)
+        self.products_table = QTableView()
+        self.products_table.setModel(self.products_proxy)
         
         # Set table properties
         self.products_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 border: 1px solid #bdc3c7;
                 border-radius: 4px;
@@ -786,7 +1210,7 @@ class InventoryTab(QWidget):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #d6eaf8;
                 color: #2c3e50;
             }
@@ -802,11 +1226,13 @@ class InventoryTab(QWidget):
         header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Quantity
         header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # Status
         
-        self.products_table.setSelectionBehavior(QTableWidget.SelectRows)
+        # Fixed row height so the view never measures rows it is not showing
+        self.products_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.products_table.setSelectionBehavior(QTableView.SelectRows)
         self.products_table.setAlternatingRowColors(True)
         self.products_table.setSortingEnabled(True)
-        self.products_table.itemSelectionChanged.connect(self.on_selection_changed)
-        self.products_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.products_table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        self.products_table.setEditTriggers(QTableView.NoEditTriggers)
         
         main_layout.addWidget(self.products_table)
         
@@ -832,20 +1258,67 @@ class InventoryTab(QWidget):
         
     def refresh_data(self):
         """Refresh the products table"""
-        try:
-            products = self.db_manager.get_all_products()
-            self.populate_table(products)
-            self.update_summary(products)
-            self.status_label.setText(f"Loaded {len(products)} products")
-        except Exception as e:
-            self.status_label.setText(f"Error loading products: {str(e)}")
-    
-    def update_summary(self, products):
+        self.status_label.setText("Loading products...")
+        self.queries.submit('products', self.fetch_products,
+                            callback=self.on_products_loaded, error_callback=self.on_load_error)
+    
+    def fetch_products(self):
+        """Read every product row (runs on a database pool thread)"""
+        # Read the version first so changes made during the load are picked up next time
+        version = self.db_manager.get_change_versions().get('products')
+        return version, self.db_manager.get_product_rows()
+    
+    def on_products_loaded(self, result):
+        """Show a full product load"""
+        self.products_version, rows = result
+        self.products_model.set_products(rows)
+        self.update_summary()
+        self.check_pending_changes()
+    
+    def refresh_changes(self):
+        """Apply only the products changed since the last refresh, if any"""
+        if self.queries.is_busy('products'):
+            # The load in flight may predate the latest change; look again once it lands
+            self.changes_pending = True
+            return
+        if self.products_version is None:
+            self.refresh_data()
+            return
+        self.queries.submit('products', self.fetch_product_changes, self.products_version,
+                            callback=self.on_product_changes, error_callback=self.on_load_error)
+    
+    def fetch_product_changes(self, since):
+        """Read products changed after a version, None if nothing did (runs on a database pool thread)"""
+        version = self.db_manager.get_change_versions().get('products')
+        if version is None or version == since:
+            return None
+        changed, deleted = self.db_manager.get_product_changes(since)
+        return version, changed, deleted
+    
+    def on_product_changes(self, result):
+        """Patch the table with a product delta"""
+        if result is not None:
+            self.products_version, changed, deleted = result
+            self.products_model.apply_changes(changed, deleted)
+            self.update_summary()
+            if self.products_proxy.product_ids is not None:
+                # New and edited products may now match, or stop matching, the search
+                self.filter_products()
+        self.check_pending_changes()
+    
+    def check_pending_changes(self):
+        """Run a change refresh that was requested while a load was in flight"""
+        if self.changes_pending:
+            self.changes_pending = False
+            self.refresh_changes()
+    
+    def on_load_error(self, error):
+        """Report a failed background load"""
+        self.status_label.setText(f"Error loading products: {str(error)}")
+    
+    def update_summary(self):
         """Update the summary statistics in the status bar"""
-        total_products = len(products)
-        total_value = sum(p['quantity'] * p['cost_price'] for p in products)
-        low_stock = sum(1 for p in products if p['quantity'] > 0 and p['quantity'] <= p.get('min_quantity', 0))
-        out_of_stock = sum(1 for p in products if p['quantity'] == 0)
+        total_value, total_products, low_stock, out_of_stock = self.products_model.summary()
         
         self.summary_label.setText(
             f"Total Value: {format_currency(total_value)} | "
@@ -854,109 +1327,49 @@ class InventoryTab(QWidget):
             f"Out of Stock: {out_of_stock}"
         )
     
-    def populate_table(self, products):
-        """Populate the table with products data"""
-        self.products_table.setRowCount(len(products))
-        
-        for row, product in enumerate(products):
-            # ID
-            id_item = QTableWidgetItem(str(product['id']))
-            id_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row, 0, id_item)
-            
-            # Barcode
-            barcode_item = QTableWidgetItem(product['barcode'] or 'N/A')
-            barcode_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row, 1, barcode_item)
-            
-            # Name
-            name_item = QTableWidgetItem(product['name'])
-            self.products_table.setItem(row, 2, name_item)
-            
-            # Category
-            category_item = QTableWidgetItem(product['category'] or 'Uncategorized')
-            category_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row, 3, category_item)
-            
-            # Cost Price
-            cost_item = QTableWidgetItem(format_currency(product['cost_price']))
-            cost_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.products_table.setItem(row, 4, cost_item)
-            
-            # Selling Price
-            selling_item = QTableWidgetItem(format_currency(product['selling_price']))
-            selling_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.products_table.setItem(row, 5, selling_item)
-            
-            # Quantity
-            quantity_item = QTableWidgetItem(str(product['quantity']))
-            quantity_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            # Color code based on quantity
-            min_quantity = product.get('min_quantity', 0)
-            if product['quantity'] == 0:
-                quantity_item.setBackground(QColor(255, 230, 230))  # Light red for out of stock
-            elif min_quantity > 0 and product['quantity'] <= min_quantity:
-                quantity_item.setBackground(QColor(255, 255, 230))  # Light yellow for low stock
-            
-            self.products_table.setItem(row, 6, quantity_item)
-            
-            # Status
-            status = self.get_status_text(product['quantity'], product.get('min_quantity', 0))
-            status_item = QTableWidgetItem(status)
-            status_item.setTextAlignment(Qt.AlignCenter)
-            
-            # Color coding for status
-            if "Low Stock" in status:
-                status_item.setBackground(QColor(255, 255, 230))  # Light yellow
-                status_item.setForeground(QColor(230, 126, 34))   # Dark orange text
-            elif "Out of Stock" in status:
-                status_item.setBackground(QColor(255, 230, 230))  # Light red
-                status_item.setForeground(QColor(231, 76, 60))    # Dark red text
-            elif "In Stock" in status:
-                status_item.setBackground(QColor(230, 245, 230))  # Light green
-                status_item.setForeground(QColor(39, 174, 96))    # Dark green text
-            
-            self.products_table.setItem(row, 7, status_item)
-    
-    def get_status_text(self, quantity, min_quantity):
-        """Get status text based on quantity"""
-        if quantity == 0:
-            return "Out of Stock"
-        elif min_quantity > 0 and quantity <= min_quantity:
-            return f"Low Stock ({quantity})"
-        else:
-            return "In Stock"
-    
     def filter_products(self):
         """Filter products based on search text and category"""
-        search_text = self.search_edit.text().lower()
+        self.filter_timer.stop()
+        search_text = self.search_edit.text().strip()
         category_filter = self.category_filter.currentText()
+        category = None if category_filter == "All Categories" else category_filter
         
-        for row in range(self.products_table.rowCount()):
-            name = self.products_table.item(row, 2).text().lower()
-            barcode = self.products_table.item(row, 1).text().lower()
-            category = self.products_table.item(row, 3).text()
-            
-            # Check if row matches search criteria
-            matches_search = (search_text in name or 
-                            search_text in barcode or 
-                            search_text in category.lower())
-            
-            matches_category = (category_filter == "All Categories" or 
-                              category == category_filter)
-            
-            # Show/hide row based on filters
-            self.products_table.setRowHidden(row, not (matches_search and matches_category))
+        if not search_text:
+            self.queries.cancel('search')
+            self.products_proxy.set_filter(search_text, category)
+            return
         
-        # Update status label with filtered count
-        visible_count = sum(1 for row in range(self.products_table.rowCount()) 
-                          if not self.products_table.isRowHidden(row))
-        self.status_label.setText(f"Showing {visible_count} of {self.products_table.rowCount()} products")
+        # Text searches run against the full-text index, descriptions included, instead of the loaded rows
+        self.queries.submit('search', self.db_manager.search_products, search_text,
+                            limit=self.SEARCH_LIMIT, category=category,
+                            callback=lambda results: self.on_search_results(search_text, category, results),
+                            error_callback=self.on_load_error)
+    
+    def on_search_results(self, search_text, category, results):
+        """Show database search results, standing in for the product table until its first load lands"""
+        if self.products_version is None:
+            self.products_model.set_products([
+                (product['id'], product['barcode'], product['name'], product['category'], product['cost_price'],
+                 product['selling_price'], product['quantity'], product['min_quantity'])
+                for product in results
+            ])
+        self.products_proxy.set_filter(search_text, category, [product['id'] for product in results])
+    
+    def on_visible_count_changed(self, visible_count):
+        """Update status label with filtered count"""
+        total_count = self.products_model.rowCount()
+        if self.products_proxy.is_filtering():
+            self.status_label.setText(f"Showing {visible_count} of {total_count} products")
+        else:
+            self.status_label.setText(f"Loaded {total_count} products")
+    
+    def selected_product_row(self):
+        """Model row of the current product, or -1"""
+        return self.products_proxy.mapToSource(self.products_table.currentIndex()).row()
     
     def on_selection_changed(self):
         """Handle table selection changes"""
-        has_selection = len(self.products_table.selectedItems()) > 0
+        has_selection = self.products_table.selectionModel().hasSelection()
         self.edit_button.setEnabled(has_selection)
         self.delete_button.setEnabled(has_selection)
     
@@ -980,29 +1393,24 @@ class InventoryTab(QWidget):
             
             # Add to database
             if self.db_manager.add_product(product_data):
-                self.refresh_data()
+                self.refresh_changes()
                 QMessageBox.information(self, "Success", "Product added successfully")
             else:
                 QMessageBox.warning(self, "Error", "Failed to add product")
     
     def edit_product(self):
         """Edit selected product"""
-        current_row = self.products_table.currentRow()
+        current_row = self.selected_product_row()
         if current_row < 0:
             return
         
-        # Get product data from table
-        product_id = int(self.products_table.item(current_row, 0).text())
-        product_data = {
-            'id': product_id,
-            'barcode': self.products_table.item(current_row, 1).text(),
-            'name': self.products_table.item(current_row, 2).text(),
-            'category': self.products_table.item(current_row, 3).text(),
-            'cost_price': float(self.products_table.item(current_row, 4).text().replace(get_currency_symbol(), '').replace(',', '')),
-            'selling_price': float(self.products_table.item(current_row, 5).text().replace(get_currency_symbol(), '').replace(',', '')),
-            'quantity': int(self.products_table.item(current_row, 6).text()),
-            'min_quantity': 0  # Default value
-        }
+        # Load the full product record rather than parsing formatted cells
+        product_id = self.products_model.product_id(current_row)
+        product_data = self.db_manager.get_product_by_id(product_id)
+        if not product_data:
+            QMessageBox.warning(self, "Error", "Product no longer exists")
+            self.refresh_data()
+            return
         
         dialog = ProductDialog(self, product_data)
         if dialog.exec_() == QDialog.Accepted:
@@ -1011,19 +1419,19 @@ class InventoryTab(QWidget):
             
             # Update in database
             if self.db_manager.update_product(updated_data):
-                self.refresh_data()
+                self.refresh_changes()
                 QMessageBox.information(self, "Success", "Product updated successfully")
             else:
                 QMessageBox.warning(self, "Error", "Failed to update product")
     
     def delete_product(self):
         """Delete selected product"""
-        current_row = self.products_table.currentRow()
+        current_row = self.selected_product_row()
         if current_row < 0:
             return
         
-        product_id = int(self.products_table.item(current_row, 0).text())
-        product_name = self.products_table.item(current_row, 2).text()
+        product_id = self.products_model.product_id(current_row)
+        product_name = self.products_model.names[current_row]
         
         reply = QMessageBox.question(
             self, "Confirm Delete", 
@@ -1033,7 +1441,7 @@ class InventoryTab(QWidget):
         
         if reply == QMessageBox.Yes:
             if self.db_manager.delete_product(product_id):
-                self.refresh_data()
+                self.refresh_changes()
                 QMessageBox.information(self, "Success", "Product deleted successfully")
             else:
                 QMessageBox.warning(self, "Error", "Failed to delete product")
@@ -1041,16 +1449,95 @@ class InventoryTab(QWidget):
     def show_product_details(self, product):
         """Show product details (called from main window)"""
         # Find the product in the table and select it
-        for row in range(self.products_table.rowCount()):
-            if self.products_table.item(row, 1).text() == product['barcode']:
-                self.products_table.selectRow(row)
-                self.products_table.scrollToItem(self.products_table.item(row, 0))
-                break
+        row = self.products_model.row_for_barcode(product['barcode'])
+        if row < 0:
+            return
+        
+        index = self.products_proxy.mapFromSource(self.products_model.index(row, 0))
+        if not index.isValid():
+            # Hidden by the current filter; clear it so the product can be shown
+            self.search_edit.clear()
+            self.category_filter.setCurrentIndex(0)
+            self.filter_products()
+            index = self.products_proxy.mapFromSource(self.products_model.index(row, 0))
+        self.products_table.selectRow(index.row())
+        self.products_table.scrollTo(index)
     
     def add_new_product(self, barcode):
         """Add new product with barcode (called from main window)"""
         self.add_product(barcode)
     
     def import_data(self):
-        """Import data from file (placeholder)"""
-        QMessageBox.information(self, "Import", "Import functionality will be implemented here")
\ No newline at end of file
+        """Import or update products from a CSV or Excel file in the background"""
+        if self.queries.is_busy('import'):
+            return
+        
+        if OPENPYXL_AVAILABLE:
+            file_filter = "Product Files (*.csv *.xlsx);;CSV Files (*.csv);;Excel Files (*.xlsx)"
+        else:
+            file_filter = "CSV Files (*.csv)"
+        filename, _ = QFileDialog.getOpenFileName(self, "Import Products", "", file_filter)
+        if not filename:
+            return
+        
+        self.import_progress = QProgressDialog("Reading products...", "Cancel", 0, 0, self)
+        self.import_progress.setWindowTitle("Import Products")
+        self.import_progress.setWindowModality(Qt.WindowModal)
+        self.import_progress.setMinimumDuration(0)
+        self.import_progress.canceled.connect(self.cancel_import)
+        
+        self.status_label.setText(f"Importing products from {filename}...")
+        self.queries.submit('import', import_products, self.db_manager, filename,
+                            background=True, progress_callback=self.on_import_progress,
+                            callback=self.on_import_finished, error_callback=self.on_import_error)
+    
+    def on_import_progress(self, rows_read, total):
+        """Move the import progress bar after each chunk"""
+        if total:
+            self.import_progress.setMaximum(total)
+            self.import_progress.setValue(min(rows_read, total))
+        self.import_progress.setLabelText(f"Imported {rows_read:,} of about {total:,} rows...")
+    
+    def cancel_import(self):
+        """Stop the import after the chunk being written; earlier chunks stay saved"""
+        self.queries.cancel('import')
+        self.status_label.setText("Import cancelled; rows saved before cancelling were kept")
+        self.refresh_data()
+    
+    def on_import_error(self, error):
+        """Report an import that could not read its file"""
+        self.import_progress.reset()
+        self.status_label.setText("Import failed")
+        QMessageBox.warning(self, "Import Error", f"Failed to import products: {str(error)}")
+        self.refresh_data()
+    
+    def on_import_finished(self, result):
+        """Reload the table and show the import counts with any per-row errors"""
+        self.import_progress.reset()
+        # A catalog import touches most rows, so reload instead of applying a delta
+        self.refresh_data()
+        
+        errors = result['errors']
+        message = QMessageBox(self)
+        message.setWindowTitle("Import Products")
+        message.setIcon(QMessageBox.Warning if errors else QMessageBox.Information)
+        message.setText(f"Imported {result['imported']:,} of {result['rows']:,} rows.")
+        save_button = None
+        if errors:
+            message.setInformativeText(f"{len(errors):,} rows could not be imported.")
+            shown = [f"Line {line}: {reason}" for line, reason in errors[:1000]]
+            if len(errors) > len(shown):
+                shown.append(f"... and {len(errors) - len(shown):,} more; save the report to see them all")
+            message.setDetailedText("\n".join(shown))
+            save_button = message.addButton("Save Error Report...", QMessageBox.ActionRole)
+        message.addButton(QMessageBox.Ok)
+        message.exec_()
+        
+        if save_button is not None and message.clickedButton() == save_button:
+            filename, _ = QFileDialog.getSaveFileName(self, "Save Error Report", "import_errors.csv",
+                                                      "CSV Files (*.csv)")
+            if filename:
+                try:
+                    write_error_report(filename, errors)
+                except Exception as e:
+                    QMessageBox.warning(self, "Save Error", f"Failed to save the error report: {str(e)}")
\ No newline at end of file
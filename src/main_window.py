@@ -6,10 +6,10 @@ Main application window with tabbed interface
 import sys
 from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
                              QHBoxLayout, QMessageBox, QStatusBar, QMenuBar, QMenu, QAction)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSettings
 from PyQt5.QtGui import QIcon, QFont
 
-from .database import DatabaseManager
+from .database import DatabaseManager, DEFAULT_STORAGE_PROFILE
 from .inventory_tab import InventoryTab
 from .sales_tab import SalesTab
 from .settings_tab import SettingsTab
@@ -23,7 +23,9 @@ class MainWindow(QMainWindow):
             super().__init__()
             print("✅ MainWindow super() initialized")
             
-            self.db_manager = DatabaseManager()
+            settings = QSettings('InventoryCorp', 'InventoryManagementSystem')
+            storage_profile = settings.value('database/storage_profile', DEFAULT_STORAGE_PROFILE)
+            self.db_manager = DatabaseManager(storage_profile=storage_profile)
             print("✅ Database manager created")
             
             self.init_ui()
@@ -43,8 +45,8 @@ class MainWindow(QMainWindow):
             
             # Auto-refresh timer
             self.refresh_timer = QTimer()
-            self.refresh_timer.timeout.connect(self.refresh_data)
-            self.refresh_timer.start(30000)  # Refresh every 30 seconds
+            self.refresh_timer.timeout.connect(self.refresh_changes)
+            self.refresh_timer.start(30000)  # Check for changes every 30 seconds
             print("✅ Timer started")
             
             print("🎉 MainWindow initialization complete!")
@@ -144,6 +146,7 @@ class MainWindow(QMainWindow):
             print("🔨 Creating Settings Tab...")
             # Settings Tab
             self.settings_tab = SettingsTab(self.db_manager)
+            self.settings_tab.database_restored.connect(self.on_database_restored)
             self.tab_widget.addTab(self.settings_tab, "⚙️ Settings")
             print("✅ Settings Tab created")
             
@@ -247,6 +250,30 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.status_bar.showMessage(f"Error refreshing data: {str(e)}")
     
+    def refresh_changes(self):
+        """Pick up changes since the last refresh; tabs with nothing new do no work"""
+        try:
+            for tab in (self.inventory_tab, self.sales_tab, self.reports_tab):
+                if hasattr(tab, 'refresh_changes'):
+                    tab.refresh_changes()
+                elif hasattr(tab, 'refresh_data'):
+                    tab.refresh_data()
+        except Exception as e:
+            self.status_bar.showMessage(f"Error refreshing data: {str(e)}")
+    
+    def on_database_restored(self, result):
+        """Reload every tab from scratch; cached rows and change versions predate the restore"""
+        try:
+            self.inventory_tab.refresh_data()
+            self.sales_tab.refresh_data()
+            if hasattr(self.reports_tab, 'refresh_reports'):
+                self.reports_tab.refresh_reports()
+            self.status_bar.showMessage(f"Database restored in {result['total_seconds']:.1f} s "
+                                        f"(check {result['verify_seconds']:.1f} s, "
+                                        f"copy {result['restore_seconds']:.1f} s)")
+        except Exception as e:
+            self.status_bar.showMessage(f"Error reloading data: {str(e)}")
+    
     def export_data(self):
         """Export data to file"""
         try:
@@ -270,19 +297,10 @@ class MainWindow(QMainWindow):
     def backup_database(self):
         """Backup the database"""
         try:
-            # Simple backup - copy database file
-            import shutil
-            import datetime
-            
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = f"backup_inventory_{timestamp}.db"
-            
-            shutil.copy2("inventory.db", backup_path)
-            
-            QMessageBox.information(self, "Backup Successful", 
-                                  f"Database backed up to: {backup_path}")
-            self.status_bar.showMessage("Database backup completed")
-            
+            # Backups run in the background from the settings tab
+            self.tab_widget.setCurrentWidget(self.settings_tab)
+            self.settings_tab.create_backup()
+            self.status_bar.showMessage("Database backup initiated")
         except Exception as e:
             QMessageBox.warning(self, "Backup Error", f"Failed to backup database: {str(e)}")
     
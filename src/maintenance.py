@@ -0,0 +1,104 @@
+"""
+Maintenance Module
+Keeps planner statistics, free space and the WAL in shape in short steps that leave checkout responsive
+"""
+
+import sqlite3
+import time
+from typing import Callable, Dict, Optional
+
+VACUUM_PAGES_PER_STEP = 256  # free pages returned per write transaction, 1 MiB with the default page size
+ANALYSIS_LIMIT = 1000  # index entries ANALYZE samples per index, keeping its write lock short
+OPTIMIZE_ALL_TABLES = 0x10002  # PRAGMA optimize mask: ANALYZE where useful, on every table
+
+def statistics_are_stale(db_manager) -> bool:
+    """Whether the planner has no statistics or sqlite_stat1 holds rows ANALYZE would never write"""
+    conn = db_manager.get_connection()
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        return True
+    # An index row lists the table's row count and then one average per column
+    return conn.execute("""
+        SELECT COUNT(*) FROM sqlite_stat1 WHERE idx IS NOT NULL AND instr(stat, ' ') = 0
+    """).fetchone()[0] > 0
+
+def run_maintenance(db_manager, analyze: bool = False, measure_fragmentation: bool = True,
+                    progress: Optional[Callable] = None) -> Dict:
+    """Checkpoint the WAL, refresh planner statistics and return free pages, returns a report
+    
+    Every step is either read-only or a short write transaction:
+    - wal_checkpoint(PASSIVE) copies what it can without waiting on writers
+    - PRAGMA optimize re-analyzes tables whose size has changed a lot, or a
+      full ANALYZE runs when asked or when statistics are missing or bogus;
+      both sample at most ANALYSIS_LIMIT entries per index
+    - with auto_vacuum=INCREMENTAL, incremental_vacuum frees
+      VACUUM_PAGES_PER_STEP pages per transaction, so a sale waits for one
+      step at most
+    progress(phase, done, total) is called per step with phase 'checkpoint',
+    'analyze' or 'vacuum' (pages).
+    """
+    start = time.perf_counter()
+    before = db_manager.get_space_usage()
+    conn = db_manager.get_connection()
+    
+    if progress:
+        progress('checkpoint', 0, 0)
+    busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    
+    if progress:
+        progress('analyze', 0, 0)
+    analyzed = analyze or statistics_are_stale(db_manager)
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    with db_manager.transaction() as cursor:
+        if analyzed:
+            cursor.execute("ANALYZE")
+        else:
+            cursor.execute(f"PRAGMA optimize({OPTIMIZE_ALL_TABLES})").fetchall()
+    
+    freed = 0
+    if before['auto_vacuum'] == 'INCREMENTAL':
+        free_pages = before['freelist_count']
+        while free_pages:
+            # sqlite3 steps a statement without result columns only once, which frees
+            # a single page; executescript runs the pragma to completion
+            try:
+                conn.executescript(f"BEGIN IMMEDIATE; PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP}); COMMIT;")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free_pages:
+                break  # sales are freeing pages as fast as we return them
+            freed += free_pages - remaining
+            free_pages = remaining
+            if progress:
+                progress('vacuum', freed, freed + free_pages)
+    
+    return {
+        'before': before,
+        'after': db_manager.get_space_usage(measure_fragmentation),
+        'wal_frames': wal_frames,
+        'checkpointed_frames': checkpointed,
+        'checkpoint_complete': not busy and wal_frames == checkpointed,
+        'analyzed': analyzed,
+        'freed_pages': freed,
+        'seconds': time.perf_counter() - start,
+    }
+
+def convert_to_incremental_vacuum(db_manager) -> Dict:
+    """Rebuild the database file once with VACUUM so auto_vacuum=INCREMENTAL takes effect
+    
+    Older databases were created without auto_vacuum. Switching needs a full
+    VACUUM, which holds the write lock until it finishes; afterwards
+    run_maintenance returns free pages without one.
+    """
+    start = time.perf_counter()
+    before = db_manager.get_space_usage()
+    conn = db_manager.get_connection()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return {
+        'before': before,
+        'after': db_manager.get_space_usage(measure_fragmentation=True),
+        'seconds': time.perf_counter() - start,
+    }
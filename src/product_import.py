@@ -0,0 +1,186 @@
+"""
+Product Import Module
+Reads supplier catalogs from CSV or Excel files in chunks and upserts them by barcode
+"""
+
+import csv
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# Row layout passed to DatabaseManager.upsert_products, after the barcode
+PRODUCT_COLUMNS = ('name', 'description', 'category', 'cost_price', 'selling_price',
+                   'quantity', 'min_quantity')
+REQUIRED_COLUMNS = ('barcode', 'name', 'cost_price', 'selling_price')
+
+# Other header spellings suppliers use for our columns
+COLUMN_ALIASES = {
+    'product': 'name',
+    'product_name': 'name',
+    'cost': 'cost_price',
+    'price': 'selling_price',
+    'qty': 'quantity',
+    'stock': 'quantity',
+    'min_stock': 'min_quantity',
+}
+
+def normalize_header(value) -> str:
+    """Map a header cell to a product column name where one matches"""
+    name = str(value or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return COLUMN_ALIASES.get(name, name)
+
+def iter_file_rows(path: str) -> Iterator[Tuple[int, Sequence]]:
+    """Yield (line number, cell values) for every row of a CSV or XLSX file, header included"""
+    if path.lower().endswith('.xlsx'):
+        if not OPENPYXL_AVAILABLE:
+            raise ValueError("Excel import requires the openpyxl package")
+        # Read-only mode parses the sheet XML as it goes instead of building every cell
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for number, values in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+                yield number, values
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            for values in reader:
+                yield reader.line_num, values
+
+def estimate_row_count(path: str) -> int:
+    """Data rows in a file for the progress bar, 0 when unknown"""
+    try:
+        if path.lower().endswith('.xlsx'):
+            if not OPENPYXL_AVAILABLE:
+                return 0
+            workbook = load_workbook(path, read_only=True)
+            try:
+                return max((workbook.active.max_row or 1) - 1, 0)
+            finally:
+                workbook.close()
+        
+        lines = 0
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                lines += block.count(b'\n')
+        return max(lines - 1, 0)
+    except Exception as e:
+        print(f"Error counting import rows: {e}")
+        return 0
+
+def _text(value) -> str:
+    """A cell as stripped text; whole numbers from spreadsheets lose their .0"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def _price(value, column: str) -> float:
+    """A non-negative price cell"""
+    text = _text(value)
+    if not text:
+        raise ValueError(f"{column} is empty")
+    try:
+        price = float(text)
+    except ValueError:
+        raise ValueError(f"{column} '{text}' is not a number")
+    if price < 0:
+        raise ValueError(f"{column} is negative")
+    return price
+
+def _count(value, column: str) -> int:
+    """A non-negative whole number cell, 0 when empty"""
+    text = _text(value)
+    if not text:
+        return 0
+    try:
+        number = float(text)
+    except ValueError:
+        raise ValueError(f"{column} '{text}' is not a number")
+    if number < 0 or not number.is_integer():
+        raise ValueError(f"{column} must be a whole number of 0 or more")
+    return int(number)
+
+def parse_product(values: Sequence, positions: Dict[str, int]) -> Tuple:
+    """Validate one file row into an upsert_products tuple, raising ValueError with the reason"""
+    def cell(column):
+        index = positions.get(column)
+        return values[index] if index is not None and index < len(values) else None
+    
+    barcode = _text(cell('barcode'))
+    if not barcode:
+        raise ValueError("barcode is empty")
+    name = _text(cell('name'))
+    if not name:
+        raise ValueError("name is empty")
+    return (barcode, name, _text(cell('description')), _text(cell('category')),
+            _price(cell('cost_price'), 'cost_price'), _price(cell('selling_price'), 'selling_price'),
+            _count(cell('quantity'), 'quantity'), _count(cell('min_quantity'), 'min_quantity'))
+
+def import_products(db_manager, path: str, chunk_size: int = 10000,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Import products from a CSV or XLSX file, returns row counts and the per-line errors
+    
+    Valid rows are upserted by barcode chunk_size at a time, each chunk in one
+    transaction. Invalid rows are skipped and listed in 'errors' as (line, reason).
+    progress(rows read, estimated total) is called after every chunk.
+    """
+    result = {'rows': 0, 'imported': 0, 'errors': []}
+    errors = result['errors']
+    total = estimate_row_count(path)
+    rows = iter_file_rows(path)
+    
+    header = next(rows, None)
+    if header is None:
+        errors.append((1, "the file is empty"))
+        return result
+    positions = {}
+    for index, value in enumerate(header[1]):
+        positions.setdefault(normalize_header(value), index)
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        errors.append((header[0], f"missing column(s): {', '.join(missing)}"))
+        return result
+    update_columns = [column for column in PRODUCT_COLUMNS if column in positions]
+    
+    chunk = []
+    first_line = None
+    
+    def write_chunk(last_line):
+        written = db_manager.upsert_products(chunk, update_columns)
+        if written is None:
+            errors.append((first_line, f"lines {first_line}-{last_line} were not saved (database error)"))
+        else:
+            result['imported'] += written
+        chunk.clear()
+        if progress:
+            progress(result['rows'], total)
+    
+    line = header[0]
+    for line, values in rows:
+        if not any(_text(value) for value in values):
+            continue  # blank line
+        result['rows'] += 1
+        try:
+            chunk.append(parse_product(values, positions))
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        if len(chunk) == 1:
+            first_line = line
+        if len(chunk) >= chunk_size:
+            write_chunk(line)
+    write_chunk(line)
+    return result
+
+def write_error_report(path: str, errors: List[Tuple[int, str]]):
+    """Save an import's (line, reason) errors as CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Line", "Error"])
+        writer.writerows(errors)
@@ -0,0 +1,139 @@
+"""
+Query Executor Module
+Runs database calls on a background thread pool and delivers results to the GUI thread
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+_database_pool = None
+_background_pool = None
+
+def _make_pool() -> QThreadPool:
+    """A two-thread pool whose threads live as long as the application"""
+    pool = QThreadPool()
+    pool.setMaxThreadCount(2)
+    # Each pool thread keeps a persistent SQLite connection, so keep the threads
+    # too instead of letting Qt retire them and leaving their connections behind
+    pool.setExpiryTimeout(-1)
+    return pool
+
+def database_pool():
+    """Shared pool for interactive reads (table loads, searches, refreshes), created on first use"""
+    global _database_pool
+    if _database_pool is None:
+        _database_pool = _make_pool()
+    return _database_pool
+
+def background_pool():
+    """Shared pool for long jobs (imports, exports, backups, maintenance), created on first use
+    
+    Kept apart from database_pool so a slow job never holds up a tab refresh or search.
+    """
+    global _background_pool
+    if _background_pool is None:
+        _background_pool = _make_pool()
+    return _background_pool
+
+class QueryCancelled(Exception):
+    """Raised inside a long task at its next progress report once its request is cancelled"""
+
+class QueryTask(QRunnable):
+    """One call queued on the database pool"""
+    
+    def __init__(self, executor, key, generation, function, args, kwargs, progress_callback=None):
+        super().__init__()
+        self.setAutoDelete(False)  # the executor holds the reference until delivery
+        self.executor = executor
+        self.key = key
+        self.generation = generation
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.progress_callback = progress_callback
+        if progress_callback:
+            self.kwargs['progress'] = self.report
+    
+    def report(self, *values):
+        """Pass progress values to the GUI thread, or stop the task if it has been cancelled"""
+        if self.executor._generations.get(self.key) != self.generation:
+            raise QueryCancelled()
+        self.executor.progressed.emit(self.key, self.generation, values)
+    
+    def run(self):
+        result, error = None, None
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except Exception as e:
+            error = e
+        try:
+            self.executor.finished.emit(self.key, self.generation, result, error)
+        except RuntimeError:
+            pass  # executor was destroyed while the query ran
+
+class QueryExecutor(QObject):
+    """Runs DatabaseManager calls off the GUI thread
+    
+    Requests are grouped by key; submitting a new request for a key cancels the
+    previous one if it has not started and discards its result if it has, so only
+    the latest date range, search or refresh ever reaches the UI.
+    
+    Long jobs submitted with a progress_callback get a progress(*values) keyword
+    argument; calling it reports to the GUI thread and raises QueryCancelled
+    once the request has been cancelled, so the job stops at that point.
+    Submit them with background=True so they run on background_pool.
+    """
+    
+    finished = pyqtSignal(str, int, object, object)
+    progressed = pyqtSignal(str, int, object)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = database_pool()
+        self.background_pool = background_pool()
+        self._generations = {}  # key -> generation of the latest request
+        self._tasks = {}  # (key, generation) -> (task, callback, error_callback)
+        self.finished.connect(self._deliver)
+        self.progressed.connect(self._deliver_progress)
+    
+    def submit(self, key, function, *args, callback=None, error_callback=None,
+               progress_callback=None, background=False, **kwargs):
+        """Run function(*args, **kwargs) on a pool; callback gets the result on the GUI thread"""
+        self.cancel(key)
+        generation = self._generations[key]
+        task = QueryTask(self, key, generation, function, args, kwargs, progress_callback)
+        task.pool = self.background_pool if background else self.pool
+        self._tasks[(key, generation)] = (task, callback, error_callback)
+        task.pool.start(task)
+        return generation
+    
+    def cancel(self, key):
+        """Drop any outstanding request for a key"""
+        generation = self._generations.get(key, 0)
+        self._generations[key] = generation + 1
+        pending = self._tasks.get((key, generation))
+        if pending and pending[0].pool.tryTake(pending[0]):
+            del self._tasks[(key, generation)]
+    
+    def is_busy(self, key):
+        """Whether the latest request for a key is still outstanding"""
+        return (key, self._generations.get(key)) in self._tasks
+    
+    def _deliver(self, key, generation, result, error):
+        """Hand a finished request to its callback unless it has been superseded"""
+        task, callback, error_callback = self._tasks.pop((key, generation), (None, None, None))
+        if task is None or generation != self._generations.get(key):
+            return
+        
+        if error is not None:
+            if error_callback:
+                error_callback(error)
+            else:
+                print(f"Error in background query '{key}': {error}")
+        elif callback:
+            callback(result)
+    
+    def _deliver_progress(self, key, generation, values):
+        """Hand a progress report to its callback unless the request has been superseded"""
+        pending = self._tasks.get((key, generation))
+        if pending is not None and generation == self._generations.get(key):
+            pending[0].progress_callback(*values)
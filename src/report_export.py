@@ -0,0 +1,161 @@
+"""
+Report Export Module
+Streams report data from database cursors into write-only Excel workbooks
+"""
+
+import datetime
+from typing import Callable, Iterator, List, Optional, Tuple
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+PROGRESS_INTERVAL = 10000  # rows written between progress reports
+
+def _day(text: Optional[str], days: dict) -> Optional[datetime.date]:
+    """The date of a 'YYYY-MM-DD...' string, parsed once per distinct day; None for an undated row"""
+    if text is None:
+        return None
+    key = text[:10]
+    day = days.get(key)
+    if day is None:
+        day = days[key] = datetime.date.fromisoformat(key)
+    return day
+
+def _sales_rows(db_manager, start_date: str, end_date: str) -> Iterator[Tuple]:
+    """One typed row per sale, newest first, read a batch at a time"""
+    days = {}
+    for sale in db_manager.iter_sales(start_date, end_date, batch_size=5000):
+        yield (_day(sale['sale_date'], days), sale['product_name'], sale['quantity'],
+               sale['unit_price'], sale['total_price'], sale['profit'])
+
+def _product_rows(db_manager, start_date: str, end_date: str) -> Iterator[Tuple]:
+    """One typed row per product sold in the range, best sellers first"""
+    for stats in db_manager.get_product_sales_summary(start_date, end_date):
+        margin = round(stats['profit'] / stats['revenue'] * 100, 1) if stats['revenue'] > 0 else 0.0
+        yield (stats['product_name'], stats['total_sold'], stats['revenue'], stats['cost'],
+               stats['profit'], margin, stats['stock_level'])
+
+def _profit_rows(db_manager, start_date: str, end_date: str) -> Iterator[Tuple]:
+    """One typed row per day with sales, oldest first"""
+    days = {}
+    for day in db_manager.get_daily_sales_summary(start_date, end_date):
+        yield _day(day['date'], days), day['revenue'], day['cost'], day['profit']
+
+def report_sheets(db_manager, start_date: str = None, end_date: str = None,
+                  currency_code: str = "USD") -> List[Tuple[str, List[str], List[int], Iterator[Tuple]]]:
+    """(title, header, column widths, rows) for each sheet of the report export
+    
+    Rows are generators of plain values (dates, ints, floats), so the workbook
+    gets real numbers and dates rather than formatted text.
+    """
+    money = f"({currency_code})"
+    return [
+        ("Sales Report",
+         ["Date", "Product", "Quantity", f"Unit Price {money}", f"Total {money}", f"Profit {money}"],
+         [12, 40, 10, 14, 14, 14],
+         _sales_rows(db_manager, start_date, end_date)),
+        ("Product Performance",
+         ["Product", "Total Sold", f"Revenue {money}", f"Cost {money}", f"Profit {money}",
+          "Profit Margin %", "Stock Level"],
+         [40, 12, 14, 14, 14, 16, 12],
+         _product_rows(db_manager, start_date, end_date)),
+        ("Profit Analysis",
+         ["Date", f"Revenue {money}", f"Cost {money}", f"Profit {money}"],
+         [12, 14, 14, 14],
+         _profit_rows(db_manager, start_date, end_date)),
+    ]
+
+def export_reports(db_manager, path: str, start_date: str = None, end_date: str = None,
+                   currency_code: str = "USD",
+                   progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Write the report sheets to an .xlsx file, returns the number of data rows written
+    
+    The write-only workbook spools each sheet to a temporary file as rows are
+    appended, so memory stays flat however many sales are exported.
+    progress(rows written, estimated total) is called every PROGRESS_INTERVAL rows.
+    """
+    if not OPENPYXL_AVAILABLE:
+        raise ValueError("Excel export requires the openpyxl package")
+    
+    total = db_manager.get_sales_totals(start_date, end_date)['orders']
+    workbook = Workbook(write_only=True)
+    written = 0
+    for title, header, widths, rows in report_sheets(db_manager, start_date, end_date, currency_code):
+        sheet = workbook.create_sheet(title)
+        # Column settings must come before the first row in a write-only sheet
+        for column, width in enumerate(widths, start=1):
+            sheet.column_dimensions[get_column_letter(column)].width = width
+        
+        header_cells = []
+        for text in header:
+            cell = WriteOnlyCell(sheet, value=text)
+            cell.font = Font(bold=True)
+            header_cells.append(cell)
+        sheet.append(header_cells)
+        
+        for row in rows:
+            sheet.append(row)
+            written += 1
+            if progress and written % PROGRESS_INTERVAL == 0:
+                progress(written, total)
+    
+    workbook.save(path)
+    if progress:
+        progress(written, written)
+    return written
+
+def export_reports_with_progress(parent, queries, db_manager, start_date: str, end_date: str):
+    """Ask for a file name and run export_reports on the background pool behind a progress dialog
+    
+    Shared by the report tabs. Qt is imported here so the export itself keeps
+    working without a GUI.
+    """
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+    from .currency_utils import get_currency_code
+    
+    if not OPENPYXL_AVAILABLE:
+        QMessageBox.information(parent, "Export", "Export functionality requires openpyxl package")
+        return
+    if queries.is_busy('export'):
+        return
+    
+    filename, _ = QFileDialog.getSaveFileName(parent, "Export Reports", "inventory_reports.xlsx",
+                                              "Excel Files (*.xlsx)")
+    if not filename:
+        return
+    
+    dialog = QProgressDialog("Exporting reports...", "Cancel", 0, 0, parent)
+    dialog.setWindowTitle("Export Reports")
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(0)
+    dialog.canceled.connect(lambda: queries.cancel('export'))
+    
+    def on_progress(written, total):
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(written, total))
+        dialog.setLabelText(f"Exported {written:,} of about {total:,} rows...")
+    
+    def close_dialog():
+        # Closing a progress dialog emits canceled, which must not reach the finished job
+        dialog.canceled.disconnect()
+        dialog.close()
+        dialog.deleteLater()
+    
+    def on_finished(written):
+        close_dialog()
+        QMessageBox.information(parent, "Export Successful", f"{written:,} rows exported to: {filename}")
+    
+    def on_error(error):
+        close_dialog()
+        QMessageBox.warning(parent, "Export Error", f"Failed to export: {str(error)}")
+    
+    queries.submit('export', export_reports, db_manager, filename, start_date, end_date, get_currency_code(),
+                   background=True, progress_callback=on_progress, callback=on_finished, error_callback=on_error)
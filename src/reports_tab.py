@@ -7,11 +7,14 @@ import sys
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                               QPushButton, QComboBox, QDateEdit, QTableWidget,
                               QTableWidgetItem, QHeaderView, QMessageBox,
-                              QFileDialog, QTabWidget, QFrame, QGridLayout)
+                              QTabWidget, QFrame, QGridLayout)
 from PyQt5.QtCore import Qt, QDate, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
 import datetime
 from .currency_utils import format_currency, get_currency_symbol
+from .query_executor import QueryExecutor
+from .sales_frame import load_sales_frame
+from .report_export import export_reports_with_progress
 
 class ReportsTab(QWidget):
     """Basic reports tab"""
@@ -19,6 +22,8 @@ class ReportsTab(QWidget):
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
+        self.report_versions = None  # change versions the reports were built from
+        self.queries = QueryExecutor(self)
         self.init_ui()
         
     def init_ui(self):
@@ -180,30 +185,55 @@ class ReportsTab(QWidget):
         
         return widget
         
-    def refresh_reports(self):
+    def refresh_reports(self, only_if_changed=False):
         """Refresh all reports with current data"""
+        date_from = self.date_from.date().toPyDate()
+        date_to = self.date_to.date().toPyDate()
+        known_versions = self.report_versions if only_if_changed else None
+        self.queries.submit('reports', self.fetch_reports, date_from, date_to, known_versions,
+                            callback=self.show_reports, error_callback=self.on_reports_error)
+    
+    def fetch_reports(self, date_from, date_to, known_versions=None):
+        """Read the report data, None if it is unchanged since known_versions (runs on a database pool thread)"""
+        versions = self.db_manager.get_change_versions()
+        if known_versions is not None and versions == known_versions:
+            return None
+        return (versions,
+                load_sales_frame(self.db_manager, date_from, date_to),
+                self.db_manager.get_product_sales_summary(date_from, date_to),
+                self.db_manager.get_daily_sales_summary(date_from, date_to))
+    
+    def show_reports(self, result):
+        """Rebuild the report tables from freshly read data"""
+        if result is None:
+            return
         try:
-            date_from = self.date_from.date().toPyDate()
-            date_to = self.date_to.date().toPyDate()
-            
-            # Get sales data
-            sales_data = self.db_manager.get_sales_report(date_from, date_to)
+            self.report_versions, sales, product_summary, daily_summary = result
             
             # Update sales tab
-            self.update_sales_tab(sales_data)
+            self.update_sales_tab(sales)
             
             # Update product performance tab
-            self.update_product_tab(sales_data)
+            self.update_product_tab(product_summary)
             
             # Update profit analysis tab
-            self.update_profit_tab(sales_data)
+            self.update_profit_tab(daily_summary)
                 
         except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to refresh reports: {str(e)}")
+            self.on_reports_error(e)
+    
+    def on_reports_error(self, error):
+        """Report a failed refresh"""
+        QMessageBox.warning(self, "Error", f"Failed to refresh reports: {str(error)}")
             
-    def update_sales_tab(self, sales_data):
-        """Update sales report tab"""
-        if not sales_data:
+    def refresh_data(self):
+        """Rebuild the reports only if sales or products changed since they were built"""
+        if not self.queries.is_busy('reports'):
+            self.refresh_reports(only_if_changed=True)
+    
+    def update_sales_tab(self, sales):
+        """Update sales report tab from the sales frame"""
+        if not len(sales):
             self.sales_table.setRowCount(0)
             self.total_sales_label.setText("Total Sales: $0")
             self.total_orders_label.setText("Total Orders: 0")
@@ -211,8 +241,9 @@ class ReportsTab(QWidget):
             return
             
         # Calculate summary
-        total_sales = sum(row[4] for row in sales_data)  # total_price from sales table
-        total_orders = len(sales_data)
+        totals = sales.totals()
+        total_sales = totals['revenue']
+        total_orders = totals['orders']
         avg_order = total_sales / total_orders if total_orders > 0 else 0
         
         self.total_sales_label.setText(f"Total Sales: {format_currency(total_sales)}")
@@ -220,65 +251,32 @@ class ReportsTab(QWidget):
         self.avg_order_label.setText(f"Avg Order: {format_currency(avg_order)}")
         
         # Update table
-        self.sales_table.setRowCount(len(sales_data))
-        for row_idx, row in enumerate(sales_data):
-            # Date, Product, Quantity, Unit Price, Total, Profit
-            self.sales_table.setItem(row_idx, 0, QTableWidgetItem(str(row[5])[:10]))  # date
-            self.sales_table.setItem(row_idx, 1, QTableWidgetItem(str(row[6])))  # product_name
-            self.sales_table.setItem(row_idx, 2, QTableWidgetItem(str(row[2])))  # quantity
-            self.sales_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(row[3])))  # unit_price
-            self.sales_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(row[4])))  # total_price
-            self.sales_table.setItem(row_idx, 5, QTableWidgetItem(format_currency(row[4] - (row[2] * row[7]))))  # profit
-            
-    def update_product_tab(self, sales_data):
-        """Update product performance tab"""
-        if not sales_data:
-            self.product_table.setRowCount(0)
-            return
-            
-        # Group by product
-        product_stats = {}
-        for row in sales_data:
-            product_name = row[6]
-            quantity = row[2]
-            unit_price = row[3]
-            cost_price = row[7]
-            
-            if product_name not in product_stats:
-                product_stats[product_name] = {
-                    'total_sold': 0,
-                    'revenue': 0,
-                    'cost': 0,
-                    'stock_level': 0
-                }
+        self.sales_table.setRowCount(len(sales))
+        for row_idx, (date, product_name, quantity, unit_price, total, profit) in enumerate(sales.table_rows()):
+            self.sales_table.setItem(row_idx, 0, QTableWidgetItem(date))
+            self.sales_table.setItem(row_idx, 1, QTableWidgetItem(product_name))
+            self.sales_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
+            self.sales_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(unit_price)))
+            self.sales_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(total)))
+            self.sales_table.setItem(row_idx, 5, QTableWidgetItem(format_currency(profit)))
             
-            product_stats[product_name]['total_sold'] += quantity
-            product_stats[product_name]['revenue'] += quantity * unit_price
-            product_stats[product_name]['cost'] += quantity * cost_price
+    def update_product_tab(self, product_summary):
+        """Update product performance tab from per-product totals"""
+        self.product_table.setRowCount(len(product_summary))
+        for row_idx, stats in enumerate(product_summary):
+            profit_margin = (stats['profit'] / stats['revenue'] * 100) if stats['revenue'] > 0 else 0
             
-        # Get current stock levels
-        for product_name in product_stats:
-            product = self.db_manager.get_product_by_name(product_name)
-            if product:
-                product_stats[product_name]['stock_level'] = product['quantity']
-        
-        # Update table
-        self.product_table.setRowCount(len(product_stats))
-        for row_idx, (product_name, stats) in enumerate(product_stats.items()):
-            profit = stats['revenue'] - stats['cost']
-            profit_margin = (profit / stats['revenue'] * 100) if stats['revenue'] > 0 else 0
-            
-            self.product_table.setItem(row_idx, 0, QTableWidgetItem(product_name))
+            self.product_table.setItem(row_idx, 0, QTableWidgetItem(stats['product_name']))
             self.product_table.setItem(row_idx, 1, QTableWidgetItem(str(stats['total_sold'])))
             self.product_table.setItem(row_idx, 2, QTableWidgetItem(format_currency(stats['revenue'])))
             self.product_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(stats['cost'])))
-            self.product_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(profit)))
+            self.product_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(stats['profit'])))
             self.product_table.setItem(row_idx, 5, QTableWidgetItem(f"{profit_margin:.1f}%"))
             self.product_table.setItem(row_idx, 6, QTableWidgetItem(str(stats['stock_level'])))
             
-    def update_profit_tab(self, sales_data):
-        """Update profit analysis tab"""
-        if not sales_data:
+    def update_profit_tab(self, daily_summary):
+        """Update profit analysis tab from per-day totals"""
+        if not daily_summary:
             self.daily_profit_table.setRowCount(0)
             self.total_revenue_label.setText(f"Total Revenue: {get_currency_symbol()}0")
             self.total_cost_label.setText(f"Total Cost: {get_currency_symbol()}0")
@@ -287,8 +285,8 @@ class ReportsTab(QWidget):
             return
             
         # Calculate totals
-        total_revenue = sum(row[4] for row in sales_data)  # total_price
-        total_cost = sum(row[2] * row[7] for row in sales_data)  # quantity * cost_price
+        total_revenue = sum(day['revenue'] for day in daily_summary)
+        total_cost = sum(day['cost'] for day in daily_summary)
         total_profit = total_revenue - total_cost
         profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
         
@@ -297,32 +295,16 @@ class ReportsTab(QWidget):
         self.total_profit_label.setText(f"Total Profit: {format_currency(total_profit)}")
         self.profit_margin_label.setText(f"Profit Margin: {profit_margin:.1f}%")
         
-        # Group by date
-        daily_stats = {}
-        for row in sales_data:
-            date = str(row[5])[:10]  # date
-            revenue = row[4]  # total_price
-            cost = row[2] * row[7]  # quantity * cost_price
-            
-            if date not in daily_stats:
-                daily_stats[date] = {'revenue': 0, 'cost': 0}
-            
-            daily_stats[date]['revenue'] += revenue
-            daily_stats[date]['cost'] += cost
-        
         # Update daily profit table
-        self.daily_profit_table.setRowCount(len(daily_stats))
-        for row_idx, (date, stats) in enumerate(sorted(daily_stats.items())):
-            profit = stats['revenue'] - stats['cost']
-            
-            self.daily_profit_table.setItem(row_idx, 0, QTableWidgetItem(date))
-            self.daily_profit_table.setItem(row_idx, 1, QTableWidgetItem(format_currency(stats['revenue'])))
-            self.daily_profit_table.setItem(row_idx, 2, QTableWidgetItem(format_currency(stats['cost'])))
-            self.daily_profit_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(profit)))
+        self.daily_profit_table.setRowCount(len(daily_summary))
+        for row_idx, day in enumerate(daily_summary):
+            self.daily_profit_table.setItem(row_idx, 0, QTableWidgetItem(day['date']))
+            self.daily_profit_table.setItem(row_idx, 1, QTableWidgetItem(format_currency(day['revenue'])))
+            self.daily_profit_table.setItem(row_idx, 2, QTableWidgetItem(format_currency(day['cost'])))
+            self.daily_profit_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(day['profit'])))
             
     def export_data(self):
-        """Export report data to Excel"""
-        try:
-            QMessageBox.information(self, "Export", "Export functionality requires openpyxl package")
-        except Exception as e:
-            QMessageBox.warning(self, "Export Error", f"Failed to export: {str(e)}")
+        """Export the report range to Excel in the background, streaming from the database"""
+        date_from = self.date_from.date().toString("yyyy-MM-dd")
+        date_to = self.date_to.date().toString("yyyy-MM-dd")
+        export_reports_with_progress(self, self.queries, self.db_manager, date_from, date_to)
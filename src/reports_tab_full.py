@@ -7,23 +7,24 @@ import sys
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                               QPushButton, QComboBox, QDateEdit, QTableWidget,
                               QTableWidgetItem, QHeaderView, QMessageBox,
-                              QFileDialog, QTabWidget, QFrame, QGridLayout)
+                              QTabWidget, QFrame, QGridLayout)
 from PyQt5.QtCore import Qt, QDate, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
 import datetime
-from .currency_utils import format_currency, get_currency_symbol
+from .currency_utils import format_currency, get_currency_symbol, get_currency_code
+from .query_executor import QueryExecutor
+from .sales_frame import load_sales_frame
+from .report_export import export_reports_with_progress
 
 try:
-    import pandas as pd
     import matplotlib.pyplot as plt
     from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
     from matplotlib.figure import Figure
     import numpy as np
-    from openpyxl import Workbook
-    PANDAS_AVAILABLE = True
+    CHARTS_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Advanced reporting dependencies not available: {e}")
-    PANDAS_AVAILABLE = False
+    CHARTS_AVAILABLE = False
 
 class AdvancedReportsTab(QWidget):
     """Advanced reports tab with charts and analytics"""
@@ -31,6 +32,7 @@ class AdvancedReportsTab(QWidget):
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
+        self.queries = QueryExecutor(self)
         self.init_ui()
         
     def init_ui(self):
@@ -86,7 +88,7 @@ class AdvancedReportsTab(QWidget):
         self.tab_widget.addTab(self.profit_tab, "💵 Profit Analysis")
         
         # Charts Tab
-        if PANDAS_AVAILABLE:
+        if CHARTS_AVAILABLE:
             self.charts_tab = self.create_charts_tab()
             self.tab_widget.addTab(self.charts_tab, "📈 Charts & Analytics")
         
@@ -199,10 +201,10 @@ class AdvancedReportsTab(QWidget):
         
     def create_charts_tab(self):
         """Create charts and analytics tab"""
-        if not PANDAS_AVAILABLE:
+        if not CHARTS_AVAILABLE:
             widget = QWidget()
             layout = QVBoxLayout(widget)
-            layout.addWidget(QLabel("Charts require pandas and matplotlib"))
+            layout.addWidget(QLabel("Charts require matplotlib"))
             return widget
             
         widget = QWidget()
@@ -217,35 +219,50 @@ class AdvancedReportsTab(QWidget):
         
     def refresh_reports(self):
         """Refresh all reports with current data"""
+        date_from = self.date_from.date().toString("yyyy-MM-dd")
+        date_to = self.date_to.date().toString("yyyy-MM-dd")
+        
+        # Read in the background; changing the dates again drops this request
+        self.queries.submit('reports', self.fetch_reports, date_from, date_to,
+                            callback=self.show_reports, error_callback=self.on_reports_error)
+    
+    def fetch_reports(self, date_from, date_to):
+        """Read the sales frame plus per-product and per-day totals (runs on a database pool thread)"""
+        return (load_sales_frame(self.db_manager, date_from, date_to),
+                self.db_manager.get_product_sales_summary(date_from, date_to),
+                self.db_manager.get_daily_sales_summary(date_from, date_to))
+    
+    def show_reports(self, result):
+        """Rebuild the report tables and charts from freshly read sales"""
         try:
-            date_from = self.date_from.date().toString("yyyy-MM-dd")
-            date_to = self.date_to.date().toString("yyyy-MM-dd")
-            
-            # Get sales data
-            sales_data = self.db_manager.get_sales_report(date_from, date_to)
+            sales, product_summary, daily_summary = result
             
             # Update sales tab
-            self.update_sales_tab(sales_data)
+            self.update_sales_tab(sales)
             
             # Update product performance tab
-            self.update_product_tab(sales_data)
+            self.update_product_tab(product_summary)
             
             # Update profit analysis tab
-            self.update_profit_tab(sales_data)
+            self.update_profit_tab(daily_summary)
             
             # Update charts if available
-            if PANDAS_AVAILABLE:
-                self.update_charts(sales_data)
+            if CHARTS_AVAILABLE:
+                self.update_charts(sales)
                 
         except Exception as e:
-            print(f"Error refreshing reports: {e}")
             import traceback
             traceback.print_exc()
-            QMessageBox.warning(self, "Error", f"Failed to refresh reports: {str(e)}\n\nPlease check the console for more details.")
-            
-    def update_sales_tab(self, sales_data):
-        """Update sales report tab"""
-        if not sales_data:
+            self.on_reports_error(e)
+    
+    def on_reports_error(self, error):
+        """Report a failed refresh"""
+        print(f"Error refreshing reports: {error}")
+        QMessageBox.warning(self, "Error", f"Failed to refresh reports: {str(error)}\n\nPlease check the console for more details.")
+            
+    def update_sales_tab(self, sales):
+        """Update sales report tab from the sales frame"""
+        if not len(sales):
             self.sales_table.setRowCount(0)
             self.total_sales_label.setText("Total Sales: $0")
             self.total_orders_label.setText("Total Orders: 0")
@@ -253,8 +270,9 @@ class AdvancedReportsTab(QWidget):
             return
             
         # Calculate summary
-        total_sales = sum(row[4] for row in sales_data)  # total_amount
-        total_orders = len(sales_data)
+        totals = sales.totals()
+        total_sales = totals['revenue']
+        total_orders = totals['orders']
         avg_order = total_sales / total_orders if total_orders > 0 else 0
         
         self.total_sales_label.setText(f"Total Sales: {format_currency(total_sales)}")
@@ -262,65 +280,32 @@ class AdvancedReportsTab(QWidget):
         self.avg_order_label.setText(f"Avg Order: {format_currency(avg_order)}")
         
         # Update table
-        self.sales_table.setRowCount(len(sales_data))
-        for row_idx, row in enumerate(sales_data):
-            # Date, Product, Quantity, Unit Price, Total, Profit
-            self.sales_table.setItem(row_idx, 0, QTableWidgetItem(str(row[5])[:10]))  # date
-            self.sales_table.setItem(row_idx, 1, QTableWidgetItem(str(row[6])))  # product_name
-            self.sales_table.setItem(row_idx, 2, QTableWidgetItem(str(row[2])))  # quantity
-            self.sales_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(row[3])))  # unit_price
-            self.sales_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(row[4])))  # total_amount
-            self.sales_table.setItem(row_idx, 5, QTableWidgetItem(format_currency(row[4] - (row[2] * row[7]))))  # profit
-            
-    def update_product_tab(self, sales_data):
-        """Update product performance tab"""
-        if not sales_data:
-            self.product_table.setRowCount(0)
-            return
-            
-        # Group by product
-        product_stats = {}
-        for row in sales_data:
-            product_name = row[6]
-            quantity = row[2]
-            unit_price = row[3]
-            cost_price = row[7]
-            
-            if product_name not in product_stats:
-                product_stats[product_name] = {
-                    'total_sold': 0,
-                    'revenue': 0,
-                    'cost': 0,
-                    'stock_level': 0
-                }
-            
-            product_stats[product_name]['total_sold'] += quantity
-            product_stats[product_name]['revenue'] += quantity * unit_price
-            product_stats[product_name]['cost'] += quantity * cost_price
-            
-        # Get current stock levels
-        for product_name in product_stats:
-            product = self.db_manager.get_product_by_name(product_name)
-            if product:
-                product_stats[product_name]['stock_level'] = product['quantity']
-        
-        # Update table
-        self.product_table.setRowCount(len(product_stats))
-        for row_idx, (product_name, stats) in enumerate(product_stats.items()):
-            profit = stats['revenue'] - stats['cost']
-            profit_margin = (profit / stats['revenue'] * 100) if stats['revenue'] > 0 else 0
-            
-            self.product_table.setItem(row_idx, 0, QTableWidgetItem(product_name))
+        self.sales_table.setRowCount(len(sales))
+        for row_idx, (date, product_name, quantity, unit_price, total, profit) in enumerate(sales.table_rows()):
+            self.sales_table.setItem(row_idx, 0, QTableWidgetItem(date))
+            self.sales_table.setItem(row_idx, 1, QTableWidgetItem(product_name))
+            self.sales_table.setItem(row_idx, 2, QTableWidgetItem(str(quantity)))
+            self.sales_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(unit_price)))
+            self.sales_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(total)))
+            self.sales_table.setItem(row_idx, 5, QTableWidgetItem(format_currency(profit)))
+            
+    def update_product_tab(self, product_summary):
+        """Update product performance tab from per-product totals"""
+        self.product_table.setRowCount(len(product_summary))
+        for row_idx, stats in enumerate(product_summary):
+            profit_margin = (stats['profit'] / stats['revenue'] * 100) if stats['revenue'] > 0 else 0
+            
+            self.product_table.setItem(row_idx, 0, QTableWidgetItem(stats['product_name']))
             self.product_table.setItem(row_idx, 1, QTableWidgetItem(str(stats['total_sold'])))
             self.product_table.setItem(row_idx, 2, QTableWidgetItem(format_currency(stats['revenue'])))
             self.product_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(stats['cost'])))
-            self.product_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(profit)))
+            self.product_table.setItem(row_idx, 4, QTableWidgetItem(format_currency(stats['profit'])))
             self.product_table.setItem(row_idx, 5, QTableWidgetItem(f"{profit_margin:.1f}%"))
             self.product_table.setItem(row_idx, 6, QTableWidgetItem(str(stats['stock_level'])))
             
-    def update_profit_tab(self, sales_data):
-        """Update profit analysis tab"""
-        if not sales_data:
+    def update_profit_tab(self, daily_summary):
+        """Update profit analysis tab from per-day totals"""
+        if not daily_summary:
             self.daily_profit_table.setRowCount(0)
             self.total_revenue_label.setText("Total Revenue: $0")
             self.total_cost_label.setText("Total Cost: $0")
@@ -329,8 +314,8 @@ class AdvancedReportsTab(QWidget):
             return
             
         # Calculate totals
-        total_revenue = sum(row[4] for row in sales_data)  # total_amount
-        total_cost = sum(row[2] * row[7] for row in sales_data)  # quantity * cost_price
+        total_revenue = sum(day['revenue'] for day in daily_summary)
+        total_cost = sum(day['cost'] for day in daily_summary)
         total_profit = total_revenue - total_cost
         profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
         
@@ -339,32 +324,17 @@ class AdvancedReportsTab(QWidget):
         self.total_profit_label.setText(f"Total Profit: {format_currency(total_profit)}")
         self.profit_margin_label.setText(f"Profit Margin: {profit_margin:.1f}%")
         
-        # Group by date
-        daily_stats = {}
-        for row in sales_data:
-            date = str(row[5])[:10]  # date
-            revenue = row[4]  # total_amount
-            cost = row[2] * row[7]  # quantity * cost_price
-            
-            if date not in daily_stats:
-                daily_stats[date] = {'revenue': 0, 'cost': 0}
-            
-            daily_stats[date]['revenue'] += revenue
-            daily_stats[date]['cost'] += cost
-        
         # Update daily profit table
-        self.daily_profit_table.setRowCount(len(daily_stats))
-        for row_idx, (date, stats) in enumerate(sorted(daily_stats.items())):
-            profit = stats['revenue'] - stats['cost']
-            
-            self.daily_profit_table.setItem(row_idx, 0, QTableWidgetItem(date))
-            self.daily_profit_table.setItem(row_idx, 1, QTableWidgetItem(format_currency(stats['revenue'])))
-            self.daily_profit_table.setItem(row_idx, 2, QTableWidgetItem(format_currency(stats['cost'])))
-            self.daily_profit_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(profit)))
-            
-    def update_charts(self, sales_data):
-        """Update charts with current data"""
-        if not PANDAS_AVAILABLE or not sales_data:
+        self.daily_profit_table.setRowCount(len(daily_summary))
+        for row_idx, day in enumerate(daily_summary):
+            self.daily_profit_table.setItem(row_idx, 0, QTableWidgetItem(day['date']))
+            self.daily_profit_table.setItem(row_idx, 1, QTableWidgetItem(format_currency(day['revenue'])))
+            self.daily_profit_table.setItem(row_idx, 2, QTableWidgetItem(format_currency(day['cost'])))
+            self.daily_profit_table.setItem(row_idx, 3, QTableWidgetItem(format_currency(day['profit'])))
+            
+    def update_charts(self, sales):
+        """Update charts from the sales frame's group-bys"""
+        if not CHARTS_AVAILABLE or not len(sales):
             return
             
         try:
@@ -377,42 +347,36 @@ class AdvancedReportsTab(QWidget):
             ax3 = self.figure.add_subplot(2, 2, 3)  # Profit trend
             ax4 = self.figure.add_subplot(2, 2, 4)  # Revenue vs Cost
             
-            # Convert to pandas DataFrame
-            df = pd.DataFrame(sales_data, columns=[
-                'id', 'product_id', 'quantity', 'unit_price', 'total_amount', 
-                'date', 'product_name', 'cost_price'
-            ])
-            df['date'] = pd.to_datetime(df['date'])
-            df['profit'] = df['total_amount'] - (df['quantity'] * df['cost_price'])
+            dates, daily_revenue, daily_cost = sales.by_day()
+            product_names, _, product_revenue, _ = sales.by_product()
             
             # Daily sales chart
-            daily_sales = df.groupby(df['date'].dt.date)['total_amount'].sum()
-            ax1.plot(daily_sales.index, daily_sales.values, marker='o')
+            ax1.plot(dates, daily_revenue, marker='o')
             ax1.set_title('Daily Sales')
             ax1.set_xlabel('Date')
             ax1.set_ylabel(f'Sales ({get_currency_code()})')
             ax1.tick_params(axis='x', rotation=45)
             
             # Product performance chart
-            product_sales = df.groupby('product_name')['total_amount'].sum().sort_values(ascending=True)
-            ax2.barh(range(len(product_sales)), product_sales.values)
+            product_sales = sorted(zip(product_revenue, product_names))
+            ax2.barh(range(len(product_sales)), [revenue for revenue, _ in product_sales])
             ax2.set_yticks(range(len(product_sales)))
-            ax2.set_yticklabels(product_sales.index)
+            ax2.set_yticklabels([name for _, name in product_sales])
             ax2.set_title('Product Sales Performance')
             ax2.set_xlabel(f'Sales ({get_currency_code()})')
             
             # Profit trend chart
-            daily_profit = df.groupby(df['date'].dt.date)['profit'].sum()
-            ax3.plot(daily_profit.index, daily_profit.values, marker='s', color='green')
+            daily_profit = [revenue - cost for revenue, cost in zip(daily_revenue, daily_cost)]
+            ax3.plot(dates, daily_profit, marker='s', color='green')
             ax3.set_title('Daily Profit Trend')
             ax3.set_xlabel('Date')
             ax3.set_ylabel(f'Profit ({get_currency_code()})')
             ax3.tick_params(axis='x', rotation=45)
             
             # Revenue vs Cost pie chart
-            total_revenue = df['total_amount'].sum()
-            total_cost = (df['quantity'] * df['cost_price']).sum()
-            total_profit = total_revenue - total_cost
+            totals = sales.totals()
+            total_cost = totals['cost']
+            total_profit = totals['profit']
             
             ax4.pie([total_cost, total_profit], labels=['Cost', 'Profit'], 
                    autopct='%1.1f%%', colors=['#ff9999', '#66b3ff'])
@@ -425,57 +389,7 @@ class AdvancedReportsTab(QWidget):
             print(f"Error updating charts: {e}")
             
     def export_data(self):
-        """Export report data to Excel"""
-        try:
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Export Reports", "inventory_reports.xlsx", 
-                "Excel Files (*.xlsx)"
-            )
-            
-            if not filename:
-                return
-                
-            # Create workbook
-            wb = Workbook()
-            
-            # Sales Report Sheet
-            ws1 = wb.active
-            ws1.title = "Sales Report"
-            ws1.append(["Date", "Product", "Quantity", f"Unit Price ({get_currency_code()})", f"Total ({get_currency_code()})", f"Profit ({get_currency_code()})"])
-            
-            for row in range(self.sales_table.rowCount()):
-                row_data = []
-                for col in range(self.sales_table.columnCount()):
-                    item = self.sales_table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                ws1.append(row_data)
-            
-            # Product Performance Sheet
-            ws2 = wb.create_sheet("Product Performance")
-            ws2.append(["Product", "Total Sold", f"Revenue ({get_currency_code()})", f"Cost ({get_currency_code()})", f"Profit ({get_currency_code()})", "Profit Margin %", "Stock Level"])
-            
-            for row in range(self.product_table.rowCount()):
-                row_data = []
-                for col in range(self.product_table.columnCount()):
-                    item = self.product_table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                ws2.append(row_data)
-            
-            # Profit Analysis Sheet
-            ws3 = wb.create_sheet("Profit Analysis")
-            ws3.append(["Date", f"Revenue ({get_currency_code()})", f"Cost ({get_currency_code()})", f"Profit ({get_currency_code()})"])
-            
-            for row in range(self.daily_profit_table.rowCount()):
-                row_data = []
-                for col in range(self.daily_profit_table.columnCount()):
-                    item = self.daily_profit_table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                ws3.append(row_data)
-            
-            # Save file
-            wb.save(filename)
-            QMessageBox.information(self, "Export Successful", 
-                                  f"Reports exported to: {filename}")
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Export Error", f"Failed to export: {str(e)}")
+        """Export the report range to Excel in the background, streaming from the database"""
+        date_from = self.date_from.date().toString("yyyy-MM-dd")
+        date_to = self.date_to.date().toString("yyyy-MM-dd")
+        export_reports_with_progress(self, self.queries, self.db_manager, date_from, date_to)
@@ -0,0 +1,149 @@
+"""
+Sales Frame Module
+Columnar sales data shared by the report tables and charts
+"""
+
+import datetime
+import itertools
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Everything numeric, so a batch of rows converts to one float array in C.
+# julianday() - 1721424.5 is Python's date.toordinal() for the same day.
+SALES_FRAME_QUERY = '''
+    SELECT s.id, s.product_id, s.quantity, s.unit_price, s.total_amount,
+           COALESCE(s.unit_cost, 0),
+           CAST(julianday(substr(s.sale_date, 1, 10)) - 1721424.5 AS INTEGER)
+    FROM sales s
+    JOIN products p ON s.product_id = p.id
+    {where}
+    ORDER BY s.sale_date DESC
+'''
+
+class SalesFrame:
+    """Sales as parallel columns, read once per report refresh
+    
+    Rows keep the query order (newest first). product_code indexes product_ids
+    and product_names; day holds date ordinals. Columns are NumPy arrays when
+    NumPy is installed and plain lists otherwise.
+    """
+    
+    def __init__(self, columns: List, product_names: Dict[int, str]):
+        sale_id, product_id, quantity, unit_price, total_amount, unit_cost, day = columns
+        if NUMPY_AVAILABLE:
+            self.sale_id = sale_id.astype(np.int64)
+            self.quantity = quantity
+            self.unit_price = unit_price
+            self.total_amount = total_amount
+            self.cost = quantity * unit_cost
+            self.day = day.astype(np.int64)
+            product_ids, self.product_code = np.unique(product_id.astype(np.int64), return_inverse=True)
+            self.product_ids = product_ids.tolist()
+        else:
+            self.sale_id = sale_id
+            self.quantity = quantity
+            self.unit_price = unit_price
+            self.total_amount = total_amount
+            self.cost = [q * c for q, c in zip(quantity, unit_cost)]
+            self.day = day
+            self.product_ids = sorted(set(product_id))
+            codes = {pid: code for code, pid in enumerate(self.product_ids)}
+            self.product_code = [codes[pid] for pid in product_id]
+        self.product_names = [product_names.get(pid, "") for pid in self.product_ids]
+    
+    @classmethod
+    def from_cursor(cls, cursor, product_names: Dict[int, str], batch_size: int = 65536) -> 'SalesFrame':
+        """Build a frame from a cursor over SALES_FRAME_QUERY"""
+        if not NUMPY_AVAILABLE:
+            rows = cursor.fetchall()
+            columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in range(7)]
+            return cls(columns, product_names)
+        
+        batches = []
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            # fromiter over the flattened batch skips np.array's per-tuple sequence checks
+            values = itertools.chain.from_iterable(rows)
+            batches.append(np.fromiter(values, dtype=np.float64, count=len(rows) * 7).reshape(-1, 7))
+        data = np.concatenate(batches) if batches else np.empty((0, 7))
+        return cls(list(data.T), product_names)
+    
+    def __len__(self) -> int:
+        return len(self.sale_id)
+    
+    def totals(self) -> Dict:
+        """Revenue, cost, profit and order count over the whole frame"""
+        if NUMPY_AVAILABLE:
+            revenue, cost = float(self.total_amount.sum()), float(self.cost.sum())
+        else:
+            revenue, cost = float(sum(self.total_amount)), float(sum(self.cost))
+        return {'revenue': revenue, 'cost': cost, 'profit': revenue - cost, 'orders': len(self)}
+    
+    def _group_sums(self, keys, key_count: int, *values) -> List:
+        """Sum each value column per key code 0..key_count-1, as lists"""
+        if NUMPY_AVAILABLE:
+            return [np.bincount(keys, weights=column, minlength=key_count).tolist() for column in values]
+        sums = [[0.0] * key_count for _ in values]
+        for column, total in zip(values, sums):
+            for key, value in zip(keys, column):
+                total[key] += value
+        return sums
+    
+    def _day_codes(self) -> Tuple[List[int], List[int]]:
+        """Distinct day ordinals in ascending order and each row's index into them"""
+        if NUMPY_AVAILABLE:
+            days, codes = np.unique(self.day, return_inverse=True)
+            return days.tolist(), codes
+        days = sorted(set(self.day))
+        index = {day: code for code, day in enumerate(days)}
+        return days, [index[day] for day in self.day]
+    
+    def by_day(self) -> Tuple[List[datetime.date], List[float], List[float]]:
+        """Dates with their revenue and cost, oldest first"""
+        days, codes = self._day_codes()
+        revenue, cost = self._group_sums(codes, len(days), self.total_amount, self.cost)
+        return [datetime.date.fromordinal(day) for day in days], revenue, cost
+    
+    def by_product(self) -> Tuple[List[str], List[float], List[float], List[float]]:
+        """Product names with their units sold, revenue and cost"""
+        quantity, revenue, cost = self._group_sums(self.product_code, len(self.product_ids),
+                                                   self.quantity, self.total_amount, self.cost)
+        return self.product_names, quantity, revenue, cost
+    
+    def table_rows(self) -> Iterator[Tuple]:
+        """(date, product name, quantity, unit price, total, profit) per sale, in frame order"""
+        days, codes = self._day_codes()
+        dates = [datetime.date.fromordinal(day).isoformat() for day in days]
+        columns = (self.quantity, self.unit_price, self.total_amount, self.cost)
+        if NUMPY_AVAILABLE:
+            codes = codes.tolist()
+            products = self.product_code.tolist()
+            columns = [column.tolist() for column in columns]
+        else:
+            products = self.product_code
+        for day, product, quantity, unit_price, total, cost in zip(codes, products, *columns):
+            yield dates[day], self.product_names[product], int(quantity), unit_price, total, total - cost
+
+def load_sales_frame(db_manager, start_date: str = None, end_date: str = None) -> SalesFrame:
+    """Read the sales in a date range, as get_sales_report does, into a SalesFrame"""
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    
+    # A sale without a date has no day to go in, so it is left out as a date range would
+    conditions = ['s.sale_date IS NOT NULL']
+    params = []
+    if start_date and end_date:
+        conditions.append("s.sale_date >= ? AND s.sale_date < date(?, '+1 day')")
+        params = [start_date, end_date]
+    where = f"WHERE {' AND '.join(conditions)}"
+    
+    product_names = dict(conn.execute('SELECT id, name FROM products').fetchall())
+    cursor.execute(SALES_FRAME_QUERY.format(where=where), params)
+    return SalesFrame.from_cursor(cursor, product_names)
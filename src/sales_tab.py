@@ -362,13 +362,14 @@ Handles sales transactions and sales history
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                               QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
-                              QHeaderView, QMessageBox, QDialog, QFormLayout,
+                              QTableView, QHeaderView, QMessageBox, QDialog, QFormLayout,
                               QSpinBox, QDoubleSpinBox, QComboBox, QGroupBox,
                               QDateEdit, QTextEdit, QFrame, QSizePolicy, QGridLayout)
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QColor, QPalette
 from datetime import datetime, timedelta
 from .currency_utils import format_currency, get_currency_symbol
+from .query_executor import QueryExecutor
 
 class SaleDialog(QDialog):
     """Dialog for recording a sale"""
@@ -621,12 +622,345 @@ class SaleDialog(QDialog):
             'notes': self.notes_edit.toPlainText().strip()
         }
 
+class BasketDialog(QDialog):
+    """Dialog for ringing up a multi-item basket by scanning continuously"""
+    
+    def __init__(self, parent=None, db_manager=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.lines = []  # [{'product': dict, 'quantity': int, 'unit_price': float}]
+        self.init_ui()
+    
+    def init_ui(self):
+        """Initialize the dialog UI"""
+        self.setWindowTitle("Basket Checkout")
+        self.setModal(True)
+        self.setMinimumSize(700, 500)
+        
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        # Scan input stays focused so items can be scanned back to back
+        scan_layout = QHBoxLayout()
+        scan_layout.addWidget(QLabel("Scan Barcode:"))
+        self.barcode_edit = QLineEdit()
+        self.barcode_edit.setPlaceholderText("Scan or type a barcode and press Enter...")
+        self.barcode_edit.returnPressed.connect(self.scan_item)
+        scan_layout.addWidget(self.barcode_edit)
+        layout.addLayout(scan_layout)
+        
+        self.scan_status_label = QLabel("Basket is empty")
+        self.scan_status_label.setStyleSheet("color: #7f8c8d;")
+        layout.addWidget(self.scan_status_label)
+        
+        # Basket lines
+        self.basket_table = QTableWidget()
+        self.basket_table.setColumnCount(4)
+        self.basket_table.setHorizontalHeaderLabels(["Product", "Quantity", "Unit Price", "Line Total"])
+        header = self.basket_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, 4):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.basket_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.basket_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.basket_table)
+        
+        remove_layout = QHBoxLayout()
+        self.remove_button = QPushButton("Remove Selected")
+        self.remove_button.setAutoDefault(False)
+        self.remove_button.clicked.connect(self.remove_selected)
+        remove_layout.addWidget(self.remove_button)
+        remove_layout.addStretch()
+        
+        self.total_label = QLabel(f"Total: {get_currency_symbol()}0.00")
+        self.total_label.setStyleSheet("font-weight: bold; font-size: 16px; color: #27ae60;")
+        remove_layout.addWidget(self.total_label)
+        layout.addLayout(remove_layout)
+        
+        self.notes_edit = QTextEdit()
+        self.notes_edit.setMaximumHeight(60)
+        self.notes_edit.setPlaceholderText("Add any notes about this transaction...")
+        layout.addWidget(self.notes_edit)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setAutoDefault(False)
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+        
+        self.checkout_button = QPushButton(" Complete Sale")
+        self.checkout_button.setIcon(QIcon.fromTheme("dialog-ok-apply"))
+        self.checkout_button.setAutoDefault(False)
+        self.checkout_button.setEnabled(False)
+        self.checkout_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.checkout_button)
+        
+        layout.addLayout(button_layout)
+        
+        self.barcode_edit.setFocus()
+    
+    def scan_item(self):
+        """Add the scanned product to the basket, or bump its quantity"""
+        barcode = self.barcode_edit.text().strip()
+        self.barcode_edit.clear()
+        if not barcode:
+            return
+        
+        for row, line in enumerate(self.lines):
+            if line['product']['barcode'] == barcode:
+                self.set_line_quantity(row, line['quantity'] + 1)
+                return
+        
+        product = self.db_manager.get_product_by_barcode(barcode)
+        if not product:
+            self.scan_status_label.setText(f"No product found with barcode: {barcode}")
+            return
+        if product['quantity'] <= 0:
+            self.scan_status_label.setText(f"{product['name']} is out of stock")
+            return
+        
+        self.lines.append({'product': product, 'quantity': 1, 'unit_price': product['selling_price']})
+        row = len(self.lines) - 1
+        self.basket_table.insertRow(row)
+        self.basket_table.setItem(row, 0, QTableWidgetItem(product['name']))
+        
+        quantity_spin = QSpinBox()
+        quantity_spin.setRange(1, product['quantity'])
+        quantity_spin.setValue(1)
+        quantity_spin.valueChanged.connect(lambda value, spin=quantity_spin: self.on_quantity_changed(spin, value))
+        self.basket_table.setCellWidget(row, 1, quantity_spin)
+        
+        unit_price_item = QTableWidgetItem(format_currency(product['selling_price']))
+        unit_price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.basket_table.setItem(row, 2, unit_price_item)
+        
+        self.basket_table.setItem(row, 3, QTableWidgetItem())
+        self.update_line(row)
+        self.scan_status_label.setText(f"Added {product['name']}")
+    
+    def set_line_quantity(self, row, quantity):
+        """Set a basket line's quantity, capped at the product's stock"""
+        line = self.lines[row]
+        if quantity > line['product']['quantity']:
+            self.scan_status_label.setText(f"Only {line['product']['quantity']} of {line['product']['name']} in stock")
+            return
+        # The spin box signal updates the line
+        self.basket_table.cellWidget(row, 1).setValue(quantity)
+        self.scan_status_label.setText(f"{line['product']['name']} x{quantity}")
+    
+    def on_quantity_changed(self, spin, value):
+        """Handle quantity edits from a line's spin box"""
+        for row in range(self.basket_table.rowCount()):
+            if self.basket_table.cellWidget(row, 1) is spin:
+                self.lines[row]['quantity'] = value
+                self.update_line(row)
+                break
+    
+    def update_line(self, row):
+        """Refresh a line total and the basket total"""
+        line = self.lines[row]
+        line_total_item = self.basket_table.item(row, 3)
+        line_total_item.setText(format_currency(line['quantity'] * line['unit_price']))
+        line_total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.update_total()
+    
+    def update_total(self):
+        """Update the basket total and checkout button"""
+        total = sum(line['quantity'] * line['unit_price'] for line in self.lines)
+        items = sum(line['quantity'] for line in self.lines)
+        self.total_label.setText(f"Total: {format_currency(total)} ({items} items)")
+        self.checkout_button.setEnabled(bool(self.lines))
+        if not self.lines:
+            self.scan_status_label.setText("Basket is empty")
+    
+    def remove_selected(self):
+        """Remove the selected basket lines"""
+        rows = sorted({index.row() for index in self.basket_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.basket_table.removeRow(row)
+            del self.lines[row]
+        self.update_total()
+        self.barcode_edit.setFocus()
+    
+    def get_basket_lines(self):
+        """Get the basket as sale lines for DatabaseManager.add_sale_batch"""
+        return [
+            {'product_id': line['product']['id'], 'quantity': line['quantity'], 'unit_price': line['unit_price']}
+            for line in self.lines
+        ]
+    
+    def get_notes(self):
+        """Get the transaction notes"""
+        return self.notes_edit.toPlainText().strip()
+
+class SalesTableModel(QAbstractTableModel):
+    """Sales history model that asks for the next page when the view scrolls to the end
+    
+    Pages arrive in keyset order, newest first. Sorting a column reorders the
+    loaded rows only, so the model remembers the oldest sale loaded, which is
+    where the next page starts.
+    """
+    
+    HEADERS = ["Date", "Product", "Quantity", "Unit Price", "Total Price", "Profit", "Notes"]
+    ALIGNMENTS = [
+        Qt.AlignCenter, Qt.AlignLeft | Qt.AlignVCenter, Qt.AlignRight | Qt.AlignVCenter,
+        Qt.AlignRight | Qt.AlignVCenter, Qt.AlignRight | Qt.AlignVCenter,
+        Qt.AlignRight | Qt.AlignVCenter, Qt.AlignLeft | Qt.AlignVCenter
+    ]
+    
+    # Profit colours: (background, text)
+    PROFIT_COLORS = (QColor(230, 245, 230), QColor(39, 174, 96))
+    LOSS_COLORS = (QColor(255, 230, 230), QColor(231, 76, 60))
+    
+    more_requested = pyqtSignal()
+    
+    # Sort key per column; dates tie-break on id like the keyset
+    SORT_KEYS = [
+        lambda sale: (sale['sale_date'] or '', sale['id']),
+        lambda sale: sale['product_name'] or '',
+        lambda sale: sale['quantity'],
+        lambda sale: sale['unit_price'],
+        lambda sale: sale['total_price'],
+        lambda sale: sale['profit'],
+        lambda sale: sale['notes'],
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sales = []
+        self.oldest = None  # (sale_date, id) of the last row of the last page
+        self.exhausted = True
+        self.loading = False
+        self.sort_column = None
+        self.sort_order = Qt.DescendingOrder
+    
+    def set_sales(self, sales, exhausted):
+        """Replace the model contents with the first page of a date range"""
+        self.beginResetModel()
+        self.sales = list(sales)
+        self.oldest = (self.sales[-1]['sale_date'], self.sales[-1]['id']) if self.sales else None
+        self.exhausted = exhausted
+        self.loading = False
+        if self.sort_column is not None:
+            self.sales.sort(key=self.SORT_KEYS[self.sort_column], reverse=(self.sort_order == Qt.DescendingOrder))
+        self.endResetModel()
+    
+    def append_sales(self, sales, exhausted):
+        """Add the next page below the loaded rows"""
+        self.exhausted = exhausted
+        self.loading = False
+        if sales:
+            self.oldest = (sales[-1]['sale_date'], sales[-1]['id'])
+            first = len(self.sales)
+            self.beginInsertRows(QModelIndex(), first, first + len(sales) - 1)
+            self.sales.extend(sales)
+            self.endInsertRows()
+            self._resort()
+    
+    def prepend_sales(self, sales):
+        """Insert newly recorded sales, newest first, above the loaded rows"""
+        if sales:
+            if self.oldest is None:
+                self.oldest = (sales[-1]['sale_date'], sales[-1]['id'])
+            self.beginInsertRows(QModelIndex(), 0, len(sales) - 1)
+            self.sales[:0] = sales
+            self.endInsertRows()
+            self._resort()
+    
+    def keyset(self):
+        """(sale_date, id) of the oldest loaded sale, where the next page continues"""
+        return self.oldest
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort the loaded rows, keeping selections on the same sales"""
+        self.sort_column = column
+        self.sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_sales = [self.sales[index.row()] for index in old_indexes]
+        self.sales.sort(key=self.SORT_KEYS[column], reverse=(order == Qt.DescendingOrder))
+        new_rows = {id(sale): row for row, sale in enumerate(self.sales)}
+        new_indexes = [self.index(new_rows[id(sale)], index.column())
+                       for sale, index in zip(old_sales, old_indexes)]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+    
+    def _resort(self):
+        """Put rows added under a column sort into place"""
+        if self.sort_column is not None:
+            self.sort(self.sort_column, self.sort_order)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.loading
+    
+    def fetchMore(self, parent=QModelIndex()):
+        # The page is read in the background; append_sales delivers it
+        if self.canFetchMore(parent):
+            self.loading = True
+            self.more_requested.emit()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.sales)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        sale = self.sales[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return sale['sale_date'][:10] if sale['sale_date'] else 'N/A'
+            if column == 1:
+                return sale['product_name']
+            if column == 2:
+                return str(sale['quantity'])
+            if column == 3:
+                return format_currency(sale['unit_price'])
+            if column == 4:
+                return format_currency(sale['total_price'])
+            if column == 5:
+                return format_currency(sale['profit'])
+            return sale['notes']
+        if role == Qt.TextAlignmentRole:
+            return self.ALIGNMENTS[column]
+        if column == 5 and role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            if sale['profit'] > 0:
+                colors = self.PROFIT_COLORS
+            elif sale['profit'] < 0:
+                colors = self.LOSS_COLORS
+            else:
+                return None
+            return colors[0] if role == Qt.BackgroundRole else colors[1]
+        return None
+
 class SalesTab(QWidget):
     """Sales management tab"""
     
+    SALES_PAGE_SIZE = 200
+    
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
+        self.sales_range = (None, None)  # (start, end) dates shown, None for all time
+        self.sales_description = ""
+        self.sales_count = 0  # sales in the range, loaded or not
+        self.sales_version = None
+        self.last_sale_id = 0
+        self.changes_pending = False
+        self.queries = QueryExecutor(self)
         self.init_ui()
         self.refresh_data()
         
@@ -696,6 +1030,12 @@ class SalesTab(QWidget):
         """)
         quick_sale_layout.addWidget(self.new_sale_button)
         
+        self.basket_button = QPushButton(" Basket Checkout")
+        self.basket_button.setIcon(QIcon.fromTheme("view-list"))
+        self.basket_button.clicked.connect(self.basket_checkout)
+        self.basket_button.setStyleSheet(self.new_sale_button.styleSheet())
+        quick_sale_layout.addWidget(self.basket_button)
+        
         quick_sale_layout.addStretch()
         
         quick_sale_group.setLayout(quick_sale_layout)
@@ -767,16 +1107,15 @@ class SalesTab(QWidget):
         filter_group.setLayout(filter_layout)
         history_layout.addWidget(filter_group)
         
-        # Sales table
-        self.sales_table = QTableWidget()
-        self.sales_table.setColumnCount(7)
-        self.sales_table.setHorizontalHeaderLabels([
-            "Date", "Product", "Quantity", "Unit Price", "Total Price", "Profit", "Notes"
-        ])
+        # Sales table; pages of older sales load as it scrolls
+        self.sales_model = SalesTableModel(self)
+        self.sales_model.more_requested.connect(self.load_more_sales)
+        self.sales_table = QTableView()
+        self.sales_table.setModel(self.sales_model)
         
         # Set table properties
         self.sales_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 border: 1px solid #bdc3c7;
                 border-radius: 4px;
@@ -790,7 +1129,7 @@ class SalesTab(QWidget):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #d6eaf8;
                 color: #2c3e50;
             }
@@ -806,9 +1145,10 @@ class SalesTab(QWidget):
         header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Notes
         
         self.sales_table.setAlternatingRowColors(True)
-        self.sales_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.sales_table.setSelectionBehavior(QTableView.SelectRows)
+        self.sales_table.setEditTriggers(QTableView.NoEditTriggers)
         self.sales_table.setSortingEnabled(True)
-        self.sales_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.sales_table.sortByColumn(0, Qt.DescendingOrder)  # newest first, the order pages arrive in
         
         history_layout.addWidget(self.sales_table)
         
@@ -871,83 +1211,118 @@ class SalesTab(QWidget):
         
     def refresh_data(self):
         """Refresh the sales data"""
-        try:
-            start_date = self.start_date_edit.date().toString("yyyy-MM-dd")
-            end_date = self.end_date_edit.date().toString("yyyy-MM-dd")
-            
-            sales_data = self.db_manager.get_sales_data(start_date, end_date)
-            self.populate_table(sales_data)
-            self.update_summary(sales_data)
-            self.status_label.setText(f"Loaded {len(sales_data)} sales records from {start_date} to {end_date}")
-        except Exception as e:
-            self.status_label.setText(f"Error loading sales data: {str(e)}")
+        start_date = self.start_date_edit.date().toString("yyyy-MM-dd")
+        end_date = self.end_date_edit.date().toString("yyyy-MM-dd")
+        self.load_sales(start_date, end_date, f"from {start_date} to {end_date}")
     
     def show_all_sales(self):
         """Show all sales without date filtering"""
-        try:
-            sales_data = self.db_manager.get_sales_data()  # No date filter
-            self.populate_table(sales_data)
-            self.update_summary(sales_data)
-            self.status_label.setText(f"Loaded {len(sales_data)} sales records (All Time)")
-        except Exception as e:
-            self.status_label.setText(f"Error loading all sales: {str(e)}")
-    
-    def populate_table(self, sales_data):
-        """Populate the sales table"""
-        self.sales_table.setRowCount(len(sales_data))
-        
-        for row, sale in enumerate(sales_data):
-            # Date
-            date_str = sale['sale_date'][:10] if sale['sale_date'] else 'N/A'
-            date_item = QTableWidgetItem(date_str)
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.sales_table.setItem(row, 0, date_item)
-            
-            # Product name
-            self.sales_table.setItem(row, 1, QTableWidgetItem(sale['product_name']))
-            
-            # Quantity
-            quantity_item = QTableWidgetItem(str(sale['quantity']))
-            quantity_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.sales_table.setItem(row, 2, quantity_item)
-            
-            # Unit price
-            unit_price_item = QTableWidgetItem(format_currency(sale['unit_price']))
-            unit_price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.sales_table.setItem(row, 3, unit_price_item)
-            
-            # Total price
-            total_price_item = QTableWidgetItem(format_currency(sale['total_price']))
-            total_price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.sales_table.setItem(row, 4, total_price_item)
-            
-            # Profit
-            profit_item = QTableWidgetItem(format_currency(sale['profit']))
-            profit_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            # Color code profit
-            if sale['profit'] > 0:
-                profit_item.setBackground(QColor(230, 245, 230))  # Light green
-                profit_item.setForeground(QColor(39, 174, 96))    # Dark green text
-            elif sale['profit'] < 0:
-                profit_item.setBackground(QColor(255, 230, 230))  # Light red
-                profit_item.setForeground(QColor(231, 76, 60))    # Dark red text
-            
-            self.sales_table.setItem(row, 5, profit_item)
-            
-            # Notes
-            notes_item = QTableWidgetItem(sale.get('notes', ''))
-            self.sales_table.setItem(row, 6, notes_item)
+        self.load_sales(None, None, "(All Time)")  # No date filter
+    
+    def load_sales(self, start_date, end_date, description):
+        """Load the first page of sales in a date range in the background; a newer load replaces this one"""
+        self.status_label.setText(f"Loading sales records {description}...")
+        self.queries.cancel('sales_page')  # a page of the old range must not land in the new one
+        
+        def show_sales(result):
+            self.sales_version, sales, totals = result
+            self.sales_range = (start_date, end_date)
+            self.sales_description = description
+            self.last_sale_id = max((sale['id'] for sale in sales), default=0)
+            self.sales_model.set_sales(sales, len(sales) < self.SALES_PAGE_SIZE)
+            self.update_summary(totals)
+            self.show_loaded_count()
+            self.check_pending_changes()
+        
+        self.queries.submit('sales', self.fetch_sales, start_date, end_date,
+                            callback=show_sales, error_callback=self.on_load_error)
+    
+    def fetch_sales(self, start_date, end_date):
+        """Read the first page and the totals of a date range (runs on a database pool thread)"""
+        # Read the version first so sales recorded during the load are picked up next time
+        version = self.db_manager.get_change_versions().get('sales')
+        return (version,
+                self.db_manager.get_sales_page(start_date, end_date, limit=self.SALES_PAGE_SIZE),
+                self.db_manager.get_sales_totals(start_date, end_date))
+    
+    def load_more_sales(self):
+        """Load the page after the oldest sale shown, when the table scrolls to the end"""
+        start_date, end_date = self.sales_range
+        self.queries.submit('sales_page', self.db_manager.get_sales_page,
+                            start_date, end_date, self.sales_model.keyset(), self.SALES_PAGE_SIZE,
+                            callback=self.on_more_sales, error_callback=self.on_page_error)
+    
+    def on_more_sales(self, sales):
+        """Append a page of older sales to the table"""
+        self.sales_model.append_sales(sales, len(sales) < self.SALES_PAGE_SIZE)
+        self.show_loaded_count()
+    
+    def on_page_error(self, error):
+        """Report a failed page load; scrolling to the end again retries it"""
+        self.sales_model.loading = False
+        self.on_load_error(error)
     
-    def update_summary(self, sales_data):
-        """Update summary information"""
-        total_sales = sum(sale['total_price'] for sale in sales_data)
-        total_profit = sum(sale['profit'] for sale in sales_data)
-        total_items = sum(sale['quantity'] for sale in sales_data)
+    def show_loaded_count(self):
+        """Show how much of the date range the table holds"""
+        self.status_label.setText(f"Loaded {self.sales_model.rowCount()} of {self.sales_count} "
+                                  f"sales records {self.sales_description}")
+    
+    def refresh_changes(self):
+        """Add sales recorded since the last refresh to the top of the table, if any"""
+        if self.queries.is_busy('sales'):
+            # The load in flight may predate the latest sale; look again once it lands
+            self.changes_pending = True
+            return
+        if self.sales_version is None:
+            self.refresh_data()
+            return
         
-        self.total_sales_label.setText(f"Total Sales: {format_currency(total_sales)}")
-        self.total_profit_label.setText(f"Total Profit: {format_currency(total_profit)}")
-        self.total_items_label.setText(f"Total Items: {total_items}")
+        start_date, end_date = self.sales_range
+        self.queries.submit('sales', self.fetch_new_sales, start_date, end_date,
+                            self.sales_version, self.last_sale_id,
+                            callback=self.on_new_sales, error_callback=self.on_load_error)
+    
+    def fetch_new_sales(self, start_date, end_date, since, last_sale_id):
+        """Read sales after a sale id, None if the sales table has not changed (runs on a pool thread)"""
+        version = self.db_manager.get_change_versions().get('sales')
+        if version is None or version == since:
+            return None
+        return (version,
+                self.db_manager.get_sales_data(start_date, end_date, after_id=last_sale_id),
+                self.db_manager.get_sales_totals(start_date, end_date))
+    
+    def on_new_sales(self, result):
+        """Insert newly recorded sales at the top of the table, or reload it if sales changed otherwise"""
+        if result is not None:
+            self.sales_version, new_sales, totals = result
+            self.update_summary(totals)
+            if not new_sales:
+                # Sales were edited or deleted rather than added; the loaded rows may be stale
+                start_date, end_date = self.sales_range
+                self.load_sales(start_date, end_date, self.sales_description)
+                return
+            self.last_sale_id = max(self.last_sale_id, max(sale['id'] for sale in new_sales))
+            self.sales_model.prepend_sales(new_sales)
+            self.status_label.setText(f"{len(new_sales)} new sales, "
+                                      f"{self.sales_model.rowCount()} of {self.sales_count} shown")
+        self.check_pending_changes()
+    
+    def check_pending_changes(self):
+        """Run a change refresh that was requested while a load was in flight"""
+        if self.changes_pending:
+            self.changes_pending = False
+            self.refresh_changes()
+    
+    def on_load_error(self, error):
+        """Report a failed background load"""
+        self.status_label.setText(f"Error loading sales data: {str(error)}")
+    
+    def update_summary(self, totals):
+        """Update summary information from DatabaseManager.get_sales_totals"""
+        self.sales_count = totals['orders']
+        self.total_sales_label.setText(f"Total Sales: {format_currency(totals['revenue'])}")
+        self.total_profit_label.setText(f"Total Profit: {format_currency(totals['profit'])}")
+        self.total_items_label.setText(f"Total Items: {totals['quantity']}")
     
     def new_sale(self):
         """Open new sale dialog"""
@@ -955,15 +1330,30 @@ class SalesTab(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             sale_data = dialog.get_sale_data()
             
-            # Record the sale
-            if self.db_manager.add_sale(
-                sale_data['product_id'],
-                sale_data['quantity'],
-                sale_data['unit_price'],
-                sale_data['notes']
-            ):
-                # Force refresh to show new sale immediately
-                self.refresh_data()
+            # Record the sale as a one-line transaction so its notes are kept
+            line = {
+                'product_id': sale_data['product_id'],
+                'quantity': sale_data['quantity'],
+                'unit_price': sale_data['unit_price']
+            }
+            if self.db_manager.add_sale_batch([line], sale_data['notes']) is not None:
+                # Pick up the new sale immediately
+                self.refresh_changes()
                 QMessageBox.information(self, "Success", "Sale recorded successfully")
             else:
-                QMessageBox.warning(self, "Error", "Failed to record sale")
\ No newline at end of file
+                QMessageBox.warning(self, "Error", "Failed to record sale")
+    
+    def basket_checkout(self):
+        """Open basket dialog and record the whole basket as one transaction"""
+        dialog = BasketDialog(self, self.db_manager)
+        if dialog.exec_() == QDialog.Accepted:
+            lines = dialog.get_basket_lines()
+            transaction_id = self.db_manager.add_sale_batch(lines, dialog.get_notes())
+            
+            if transaction_id is not None:
+                self.refresh_changes()
+                QMessageBox.information(self, "Success",
+                                        f"Transaction #{transaction_id} recorded ({len(lines)} lines)")
+            else:
+                QMessageBox.warning(self, "Error",
+                                    "Failed to record transaction. Stock may have changed, please try again.")
\ No newline at end of file
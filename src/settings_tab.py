@@ -6,21 +6,34 @@ Handles application settings and configuration
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QLineEdit, QSpinBox, QComboBox, QGroupBox,
                              QMessageBox, QFileDialog, QCheckBox, QFormLayout,
-                             QTabWidget, QTextEdit, QProgressBar)
-from PyQt5.QtCore import Qt, QSettings
+                             QTabWidget, QTextEdit, QProgressBar, QInputDialog)
+from PyQt5.QtCore import Qt, QSettings, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 import os
-import shutil
-import sqlite3
 from datetime import datetime
+from .database import STORAGE_PROFILES, DEFAULT_STORAGE_PROFILE
+from .query_executor import QueryExecutor
+from .maintenance import run_maintenance, convert_to_incremental_vacuum
+from .backup import (backup_database, available_compressions, BACKUP_COMPRESSIONS,
+                     DEFAULT_BACKUP_COMPRESSION, take_snapshot, list_snapshots, restore_database)
 
 class SettingsTab(QWidget):
     """Settings and configuration tab"""
     
+    database_restored = pyqtSignal(dict)  # restore_database result
+    IDLE_CHECK_INTERVAL = 5 * 60 * 1000  # ms; maintenance runs after a whole interval without changes
+    
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
         self.settings = QSettings('InventoryCorp', 'InventoryManagementSystem')
+        self.queries = QueryExecutor(self)
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(self.run_scheduled_backup)
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.timeout.connect(self.check_idle_maintenance)
+        self.seen_versions = None
+        self.maintained_versions = None
         self.init_ui()
         self.load_settings()
         
@@ -112,6 +125,18 @@ class SettingsTab(QWidget):
         self.backup_checkbox = QCheckBox("Auto-backup database")
         app_layout.addRow("Auto Backup:", self.backup_checkbox)
         
+        self.backup_interval_spin = QSpinBox()
+        self.backup_interval_spin.setRange(5, 1440)
+        self.backup_interval_spin.setSuffix(" minutes")
+        self.backup_interval_spin.setValue(60)
+        app_layout.addRow("Backup Interval:", self.backup_interval_spin)
+        
+        self.backup_keep_spin = QSpinBox()
+        self.backup_keep_spin.setRange(1, 90)
+        self.backup_keep_spin.setSuffix(" days")
+        self.backup_keep_spin.setValue(7)
+        app_layout.addRow("Keep Backups:", self.backup_keep_spin)
+        
         app_group.setLayout(app_layout)
         layout.addWidget(app_group)
         
@@ -157,9 +182,32 @@ class SettingsTab(QWidget):
         self.db_records_label = QLabel("Calculating...")
         db_info_layout.addRow("Total Records:", self.db_records_label)
         
+        self.free_space_label = QLabel("Not measured yet")
+        self.free_space_label.setWordWrap(True)
+        db_info_layout.addRow("Free Space:", self.free_space_label)
+        
+        self.product_cache_label = QLabel("Calculating...")
+        db_info_layout.addRow("Product Cache:", self.product_cache_label)
+        
         db_info_group.setLayout(db_info_layout)
         layout.addWidget(db_info_group)
         
+        # Storage Profile
+        storage_group = QGroupBox("Storage Profile")
+        storage_layout = QFormLayout()
+        
+        self.storage_profile_combo = QComboBox()
+        for key, profile in STORAGE_PROFILES.items():
+            self.storage_profile_combo.addItem(profile['label'], key)
+        storage_layout.addRow("Profile:", self.storage_profile_combo)
+        
+        self.storage_status_label = QLabel("Calculating...")
+        self.storage_status_label.setWordWrap(True)
+        storage_layout.addRow("Active Settings:", self.storage_status_label)
+        
+        storage_group.setLayout(storage_layout)
+        layout.addWidget(storage_group)
+        
         # Database Operations
         db_ops_group = QGroupBox("Database Operations")
         db_ops_layout = QVBoxLayout()
@@ -176,6 +224,12 @@ class SettingsTab(QWidget):
         self.backup_path_edit.setPlaceholderText("Backup location (optional)")
         backup_layout.addWidget(self.backup_path_edit)
         
+        self.backup_compression_combo = QComboBox()
+        for key in available_compressions():
+            self.backup_compression_combo.addItem(BACKUP_COMPRESSIONS[key]['label'], key)
+        self.backup_compression_combo.setToolTip("Compress backups as they are written")
+        backup_layout.addWidget(self.backup_compression_combo)
+        
         db_ops_layout.addLayout(backup_layout)
         
         # Restore section
@@ -200,6 +254,16 @@ class SettingsTab(QWidget):
         self.vacuum_button.clicked.connect(self.vacuum_database)
         maintenance_layout.addWidget(self.vacuum_button)
         
+        self.rebuild_rollup_button = QPushButton("📊 Rebuild Report Totals")
+        self.rebuild_rollup_button.setToolTip("Recompute the daily sales totals used by reports from every sale")
+        self.rebuild_rollup_button.clicked.connect(self.rebuild_report_totals)
+        maintenance_layout.addWidget(self.rebuild_rollup_button)
+        
+        self.idle_maintenance_checkbox = QCheckBox("Run maintenance when idle")
+        self.idle_maintenance_checkbox.setToolTip(
+            "Refresh statistics, reclaim free pages and checkpoint the log when no sales are being made")
+        maintenance_layout.addWidget(self.idle_maintenance_checkbox)
+        
         db_ops_layout.addLayout(maintenance_layout)
         
         db_ops_group.setLayout(db_ops_layout)
@@ -356,12 +420,25 @@ class SettingsTab(QWidget):
         self.auto_refresh_checkbox.setChecked(self.settings.value('app/auto_refresh', True, type=bool))
         self.refresh_interval_spin.setValue(self.settings.value('app/refresh_interval', 30, type=int))
         self.startup_checkbox.setChecked(self.settings.value('app/startup_updates', False, type=bool))
-        self.backup_checkbox.setChecked(self.settings.value('app/auto_backup', True, type=bool))
+        # Automatic snapshots write to disk, so they stay off until chosen
+        self.backup_checkbox.setChecked(self.settings.value('app/auto_backup', False, type=bool))
+        self.backup_interval_spin.setValue(self.settings.value('app/backup_interval', 60, type=int))
+        self.backup_keep_spin.setValue(self.settings.value('app/backup_keep_days', 7, type=int))
         
         currency_index = self.settings.value('currency/type', 0, type=int)
         self.currency_combo.setCurrentIndex(currency_index)
         self.decimal_places_spin.setValue(self.settings.value('currency/decimal_places', 2, type=int))
         
+        # Database settings
+        storage_profile = self.settings.value('database/storage_profile', DEFAULT_STORAGE_PROFILE)
+        profile_index = self.storage_profile_combo.findData(storage_profile)
+        self.storage_profile_combo.setCurrentIndex(max(profile_index, 0))
+        
+        compression = self.settings.value('database/backup_compression', DEFAULT_BACKUP_COMPRESSION)
+        self.backup_compression_combo.setCurrentIndex(max(self.backup_compression_combo.findData(compression), 0))
+        # Maintenance writes to the database file, so like automatic backups it stays off until chosen
+        self.idle_maintenance_checkbox.setChecked(self.settings.value('database/idle_maintenance', False, type=bool))
+        
         # Scanner settings
         self.camera_device_combo.setCurrentIndex(self.settings.value('scanner/camera_device', 0, type=int))
         self.camera_resolution_combo.setCurrentIndex(self.settings.value('scanner/resolution', 0, type=int))
@@ -387,6 +464,9 @@ class SettingsTab(QWidget):
         self.email_username_edit.setText(self.settings.value('export/email_username', ''))
         self.email_password_edit.setText(self.settings.value('export/email_password', ''))
         
+        self.apply_backup_schedule()
+        self.apply_maintenance_schedule()
+    
     def save_settings(self):
         """Save current settings"""
         try:
@@ -400,10 +480,21 @@ class SettingsTab(QWidget):
             self.settings.setValue('app/refresh_interval', self.refresh_interval_spin.value())
             self.settings.setValue('app/startup_updates', self.startup_checkbox.isChecked())
             self.settings.setValue('app/auto_backup', self.backup_checkbox.isChecked())
+            self.settings.setValue('app/backup_interval', self.backup_interval_spin.value())
+            self.settings.setValue('app/backup_keep_days', self.backup_keep_spin.value())
             
             self.settings.setValue('currency/type', self.currency_combo.currentIndex())
             self.settings.setValue('currency/decimal_places', self.decimal_places_spin.value())
             
+            # Database settings
+            storage_profile = self.storage_profile_combo.currentData()
+            self.settings.setValue('database/storage_profile', storage_profile)
+            if storage_profile != self.db_manager.storage_profile:
+                self.db_manager.set_storage_profile(storage_profile)
+                self.update_database_info()
+            self.settings.setValue('database/backup_compression', self.backup_compression_combo.currentData())
+            self.settings.setValue('database/idle_maintenance', self.idle_maintenance_checkbox.isChecked())
+            
             # Scanner settings
             self.settings.setValue('scanner/camera_device', self.camera_device_combo.currentIndex())
             self.settings.setValue('scanner/resolution', self.camera_resolution_combo.currentIndex())
@@ -430,6 +521,8 @@ class SettingsTab(QWidget):
             self.settings.setValue('export/email_password', self.email_password_edit.text())
             
             self.settings.sync()
+            self.apply_backup_schedule()
+            self.apply_maintenance_schedule()
             self.status_label.setText("Settings saved successfully")
             
         except Exception as e:
@@ -450,166 +543,410 @@ class SettingsTab(QWidget):
     
     def update_database_info(self):
         """Update database information display"""
-        try:
-            db_path = "inventory.db"
-            self.db_path_label.setText(db_path)
-            
-            # Get database size
-            if os.path.exists(db_path):
-                size_bytes = os.path.getsize(db_path)
-                size_mb = size_bytes / (1024 * 1024)
-                self.db_size_label.setText(f"{size_mb:.2f} MB")
-            else:
-                self.db_size_label.setText("Database not found")
-            
-            # Get table count and record count
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Count tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            self.db_tables_label.setText(str(len(tables)))
-            
-            # Count total records
-            total_records = 0
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table[0]}")
-                count = cursor.fetchone()[0]
-                total_records += count
-            
-            self.db_records_label.setText(str(total_records))
-            
-            conn.close()
-            
-        except Exception as e:
-            self.db_size_label.setText("Error")
-            self.db_tables_label.setText("Error")
-            self.db_records_label.setText("Error")
+        db_path = self.db_manager.db_path
+        self.db_path_label.setText(db_path)
+        self.db_size_label.setText("Calculating...")
+        self.db_tables_label.setText("Calculating...")
+        self.db_records_label.setText("Calculating...")
+        
+        # Product lookup cache counters
+        cache_stats = self.db_manager.product_cache.stats()
+        self.product_cache_label.setText(
+            f"{cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.1%} hit rate), "
+            f"{cache_stats['size']}/{cache_stats['capacity']} products cached"
+        )
+        
+        self.queries.submit('database_info', self.fetch_database_info,
+                            callback=self.show_database_info, error_callback=self.on_database_info_error)
+    
+    def fetch_database_info(self):
+        """Read database statistics and pragmas (runs on a database pool thread)"""
+        return {
+            'stats': self.db_manager.get_database_stats(),
+            'storage_status': self.db_manager.get_storage_status(),
+        }
+    
+    def show_database_info(self, info):
+        """Fill in the database information labels"""
+        stats = info['stats']
+        if stats:
+            size_mb = (stats['file_bytes'] + stats['wal_bytes']) / (1024 * 1024)
+            self.db_size_label.setText(f"{size_mb:.2f} MB "
+                                       f"({stats['wal_bytes'] / (1024 * 1024):.2f} MB write-ahead log)")
+            record_counts = stats['record_counts']
+            self.db_tables_label.setText(str(len(record_counts)))
+            self.db_records_label.setText(f"{sum(record_counts.values()):,} "
+                                          f"({record_counts.get('products', 0):,} products, "
+                                          f"{record_counts.get('sales', 0):,} sales)")
+            self.show_free_space(stats)
+        else:
+            self.db_size_label.setText("Database not found")
+        
+        # Show the pragmas actually in effect
+        status = info['storage_status']
+        if status:
+            self.storage_status_label.setText(
+                f"journal_mode={status['journal_mode']}, synchronous={status['synchronous']}, "
+                f"cache_size={status['cache_size']}, mmap_size={status['mmap_size']}, "
+                f"temp_store={status['temp_store']}"
+            )
+    
+    def on_database_info_error(self, error):
+        """Show that the database information could not be read"""
+        self.db_size_label.setText("Error")
+        self.db_tables_label.setText("Error")
+        self.db_records_label.setText("Error")
     
     def create_backup(self):
-        """Create database backup"""
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            default_filename = f"backup_inventory_{timestamp}.db"
-            
-            if self.backup_path_edit.text():
-                backup_dir = self.backup_path_edit.text()
-                backup_path = os.path.join(backup_dir, default_filename)
-            else:
-                backup_path, _ = QFileDialog.getSaveFileName(
-                    self, "Save Backup", default_filename, "Database Files (*.db)"
-                )
-            
-            if backup_path:
-                shutil.copy2("inventory.db", backup_path)
-                QMessageBox.information(self, "Backup Successful", f"Database backed up to:\n{backup_path}")
-                self.status_label.setText("Backup created successfully")
-                
-        except Exception as e:
-            QMessageBox.warning(self, "Backup Error", f"Failed to create backup: {str(e)}")
+        """Back up the live database in the background with SQLite's online backup API"""
+        if self.queries.is_busy('backup'):
+            return
+        
+        compression = self.backup_compression_combo.currentData()
+        suffix = BACKUP_COMPRESSIONS[compression]['suffix']
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        default_filename = f"backup_inventory_{timestamp}{suffix}"
+        
+        if self.backup_path_edit.text():
+            backup_dir = self.backup_path_edit.text()
+            backup_path = os.path.join(backup_dir, default_filename)
+        else:
+            backup_path, _ = QFileDialog.getSaveFileName(
+                self, "Save Backup", default_filename, f"Database Backups (*{suffix})"
+            )
+        if not backup_path:
+            return
+        
+        self.backup_button.setEnabled(False)
+        self.db_progress.setVisible(True)
+        self.db_progress.setRange(0, 0)
+        self.status_label.setText("Creating backup...")
+        self.queries.submit('backup', backup_database, self.db_manager, backup_path, compression,
+                            background=True, progress_callback=self.on_backup_progress,
+                            callback=self.on_backup_finished, error_callback=self.on_backup_error)
+    
+    def on_backup_progress(self, phase, done, total):
+        """Show how far the page copy or the compression has got"""
+        if total:
+            self.db_progress.setRange(0, total)
+            self.db_progress.setValue(done)
+        if phase == 'copy':
+            self.status_label.setText(f"Backing up database: {done:,} of {total:,} pages")
+        else:
+            self.status_label.setText(f"Compressing backup: {done // (1024 * 1024):,} of "
+                                      f"{total // (1024 * 1024):,} MB")
+    
+    def on_backup_finished(self, result):
+        """Report a completed backup"""
+        self.backup_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        size_mb = result['size'] / (1024 * 1024)
+        self.status_label.setText(f"Backup created in {result['total_seconds']:.1f} s")
+        QMessageBox.information(self, "Backup Successful",
+                                f"Database backed up to:\n{result['path']}\n({size_mb:.1f} MB)")
+    
+    def on_backup_error(self, error):
+        """Report a failed backup"""
+        self.backup_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        self.status_label.setText("Backup failed")
+        QMessageBox.warning(self, "Backup Error", f"Failed to create backup: {str(error)}")
+    
+    def snapshot_dir(self):
+        """Where automatic backups go: the backup location, else a backups folder beside the database"""
+        backup_dir = self.backup_path_edit.text() or os.path.join(
+            os.path.dirname(os.path.abspath(self.db_manager.db_path)), "backups")
+        return os.path.join(backup_dir, "snapshots")
+    
+    def apply_backup_schedule(self):
+        """Start or stop the automatic backup timer to match the settings"""
+        if self.backup_checkbox.isChecked():
+            self.backup_timer.start(self.backup_interval_spin.value() * 60 * 1000)
+        else:
+            self.backup_timer.stop()
+    
+    def run_scheduled_backup(self):
+        """Take an incremental snapshot in the background, unless a backup is already running"""
+        if any(self.queries.is_busy(key) for key in ('snapshot', 'backup', 'restore')):
+            return
+        # One chain (a full copy and its increments) per day; chains older than the chosen number of days go
+        snapshots_per_day = max(1, 1440 // self.backup_interval_spin.value())
+        self.queries.submit('snapshot', take_snapshot, self.db_manager, self.snapshot_dir(),
+                            self.backup_compression_combo.currentData(), snapshots_per_day,
+                            keep_days=self.backup_keep_spin.value(),
+                            background=True, callback=self.on_snapshot_taken, error_callback=self.on_snapshot_error)
+    
+    def on_snapshot_taken(self, snapshot):
+        """Note a completed automatic backup"""
+        kind = "full" if snapshot['index'] == 0 else f"{snapshot['changed_pages']:,} changed pages"
+        self.status_label.setText(f"Automatic backup taken at {datetime.now().strftime('%H:%M')} ({kind})")
+    
+    def on_snapshot_error(self, error):
+        """Note a failed automatic backup without interrupting the user"""
+        print(f"Error taking automatic backup: {error}")
+        self.status_label.setText(f"Automatic backup failed: {str(error)}")
     
     def restore_backup(self):
-        """Restore database from backup"""
-        try:
+        """Restore the database from a backup file or an automatic backup in the background"""
+        if self.queries.is_busy('restore'):
+            return
+        
+        snapshot = self.choose_snapshot()
+        if snapshot is False:
+            return
+        backup_path = None
+        if snapshot is None:
             backup_path, _ = QFileDialog.getOpenFileName(
-                self, "Select Backup File", "", "Database Files (*.db)"
+                self, "Select Backup File", "",
+                "Database Backups (*.db *.db.gz *.db.zst);;All Files (*)"
             )
-            
-            if backup_path:
-                reply = QMessageBox.question(
-                    self, "Confirm Restore", 
-                    "This will replace the current database. Are you sure?",
-                    QMessageBox.Yes | QMessageBox.No
-                )
-                
-                if reply == QMessageBox.Yes:
-                    # Create backup of current database first
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    current_backup = f"pre_restore_backup_{timestamp}.db"
-                    shutil.copy2("inventory.db", current_backup)
-                    
-                    # Restore from backup
-                    shutil.copy2(backup_path, "inventory.db")
-                    
-                    QMessageBox.information(self, "Restore Successful", 
-                                          f"Database restored from backup.\nCurrent database backed up as: {current_backup}")
-                    self.status_label.setText("Database restored successfully")
-                    
-                    # Update database info
-                    self.update_database_info()
-                    
-        except Exception as e:
-            QMessageBox.warning(self, "Restore Error", f"Failed to restore database: {str(e)}")
+            if not backup_path:
+                return
+        
+        reply = QMessageBox.question(
+            self, "Confirm Restore", 
+            "This will replace the current database. Are you sure?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        # Keep the current database in case the restore was a mistake
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safety_path = os.path.join(os.path.dirname(os.path.abspath(self.db_manager.db_path)),
+                                   f"pre_restore_backup_{timestamp}.db")
+        
+        self.restore_button.setEnabled(False)
+        self.db_progress.setVisible(True)
+        self.db_progress.setRange(0, 0)
+        self.status_label.setText("Checking backup...")
+        self.queries.submit('restore', restore_database, self.db_manager, backup_path, snapshot,
+                            safety_path, background=True, progress_callback=self.on_restore_progress,
+                            callback=self.on_restore_finished, error_callback=self.on_restore_error)
     
-    def optimize_database(self):
-        """Optimize database"""
-        try:
+    def choose_snapshot(self):
+        """Offer the automatic backups for restore
+        
+        Returns the chosen snapshot, None to pick a backup file instead, or
+        False when the user cancels.
+        """
+        snapshots = list_snapshots(self.snapshot_dir())
+        if not snapshots:
+            return None
+        
+        from_file = "Backup file..."
+        labels = [datetime.fromisoformat(snapshot['created']).strftime("%Y-%m-%d %H:%M:%S")
+                  for snapshot in reversed(snapshots)]
+        choice, ok = QInputDialog.getItem(self, "Restore Database", "Restore from:",
+                                          [from_file] + labels, 0, False)
+        if not ok:
+            return False
+        if choice == from_file:
+            return None
+        return snapshots[len(snapshots) - labels.index(choice) - 1]
+    
+    def on_restore_progress(self, phase, done, total):
+        """Show which step of the restore is running"""
+        if total:
+            self.db_progress.setRange(0, total)
+            self.db_progress.setValue(done)
+        if phase == 'unpack':
+            self.status_label.setText(f"Unpacking backup: {done // (1024 * 1024):,} of "
+                                      f"{total // (1024 * 1024):,} MB")
+        elif phase == 'safety':
+            self.status_label.setText(f"Saving current database: {done:,} of {total:,} pages")
+        else:
+            self.status_label.setText(f"Restoring database: {done:,} of {total:,} pages")
+    
+    def on_restore_finished(self, result):
+        """Report a completed restore and have every tab reload"""
+        self.restore_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        self.status_label.setText(f"Database restored in {result['total_seconds']:.1f} s")
+        self.update_database_info()
+        self.database_restored.emit(result)
+        QMessageBox.information(self, "Restore Successful",
+                                f"Database restored from backup.\n"
+                                f"Current database backed up as: {result['safety_path']}\n\n"
+                                f"Unpacked in {result['unpack_seconds']:.1f} s, "
+                                f"checked in {result['verify_seconds']:.1f} s, "
+                                f"restored in {result['restore_seconds']:.1f} s "
+                                f"({result['pages']:,} pages)")
+    
+    def on_restore_error(self, error):
+        """Report a failed restore; the live database is unchanged"""
+        self.restore_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        self.status_label.setText("Restore failed")
+        QMessageBox.warning(self, "Restore Error", f"Failed to restore database: {str(error)}")
+    
+    def apply_maintenance_schedule(self):
+        """Start or stop watching for idle periods to match the settings"""
+        if self.idle_maintenance_checkbox.isChecked():
+            self.maintenance_timer.start(self.IDLE_CHECK_INTERVAL)
+        else:
+            self.maintenance_timer.stop()
+    
+    def maintenance_blocked(self):
+        """Whether a backup, restore or maintenance run already has the database"""
+        return any(self.queries.is_busy(key) for key in ('maintenance', 'backup', 'snapshot', 'restore'))
+    
+    def check_idle_maintenance(self):
+        """Look for changes since the last check; maintenance runs once per quiet spell"""
+        if not self.maintenance_blocked():
+            self.queries.submit('idle_check', self.db_manager.get_change_versions,
+                                callback=self.on_idle_check)
+    
+    def on_idle_check(self, versions):
+        """Start maintenance if nothing changed for a whole interval and it has not run since"""
+        idle = versions == self.seen_versions
+        self.seen_versions = versions
+        if idle and versions != self.maintained_versions and not self.maintenance_blocked():
+            self.maintained_versions = versions
+            self.start_maintenance()
+    
+    def start_maintenance(self, analyze=False, manual=False):
+        """Run the maintenance steps in the background"""
+        if self.maintenance_blocked():
+            if manual:
+                QMessageBox.information(self, "Database Busy",
+                                        "A backup, restore or maintenance run is in progress. Try again when it finishes.")
+            return
+        if manual:
+            self.optimize_button.setEnabled(False)
+            self.vacuum_button.setEnabled(False)
             self.db_progress.setVisible(True)
-            self.db_progress.setValue(0)
-            
-            conn = sqlite3.connect("inventory.db")
-            cursor = conn.cursor()
-            
-            # Analyze tables
-            self.db_progress.setValue(25)
-            cursor.execute("ANALYZE")
-            
-            # Update statistics
-            self.db_progress.setValue(50)
-            cursor.execute("UPDATE sqlite_stat1 SET stat = (SELECT COUNT(*) FROM sqlite_master WHERE type='table')")
-            
-            # Commit changes
-            self.db_progress.setValue(75)
-            conn.commit()
-            conn.close()
-            
-            self.db_progress.setValue(100)
-            QMessageBox.information(self, "Optimization Complete", "Database optimization completed successfully")
-            self.status_label.setText("Database optimized successfully")
-            
-            # Hide progress bar after delay
-            QTimer.singleShot(2000, lambda: self.db_progress.setVisible(False))
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Optimization Error", f"Failed to optimize database: {str(e)}")
+            self.db_progress.setRange(0, 0)
+            self.status_label.setText("Running database maintenance...")
+        self.queries.submit('maintenance', run_maintenance, self.db_manager, analyze,
+                            background=True, progress_callback=self.on_maintenance_progress if manual else None,
+                            callback=lambda result: self.on_maintenance_finished(result, manual),
+                            error_callback=lambda error: self.on_maintenance_error(error, manual))
+    
+    def on_maintenance_progress(self, phase, done, total):
+        """Show which maintenance step is running"""
+        if phase == 'vacuum':
+            self.db_progress.setRange(0, total)
+            self.db_progress.setValue(done)
+            self.status_label.setText(f"Reclaiming free space: {done:,} of {total:,} pages")
+        elif phase == 'analyze':
+            self.status_label.setText("Updating query planner statistics...")
+        else:
+            self.status_label.setText("Checkpointing the write-ahead log...")
+    
+    def show_free_space(self, usage):
+        """Show free pages and fragmentation from a get_space_usage result"""
+        text = (f"{usage['freelist_count']:,} free pages ({usage['free_bytes'] / (1024 * 1024):.1f} MB) "
+                f"of {usage['page_count']:,}")
+        if usage.get('fragmentation') is not None:
+            text += f", {usage['fragmentation']:.0%} of pages out of order"
+        if usage['auto_vacuum'] != 'INCREMENTAL':
+            text += "\nVacuum once so maintenance can reclaim free pages"
+        self.free_space_label.setText(text)
+    
+    def on_maintenance_finished(self, result, manual):
+        """Report what a maintenance run did"""
+        self.show_free_space(result['after'])
+        freed_mb = result['freed_pages'] * result['after']['page_size'] / (1024 * 1024)
+        summary = f"Maintenance finished in {result['seconds']:.1f} s, {freed_mb:.1f} MB reclaimed"
+        self.status_label.setText(summary)
+        if not manual:
+            return
+        
+        self.optimize_button.setEnabled(True)
+        self.vacuum_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        checkpoint = ("complete" if result['checkpoint_complete'] else
+                      f"{result['checkpointed_frames']:,} of {result['wal_frames']:,} frames, "
+                      "the rest once readers finish")
+        QMessageBox.information(self, "Maintenance Complete",
+                                f"{summary}.\n\n"
+                                f"Statistics: {'rebuilt with ANALYZE' if result['analyzed'] else 'refreshed where stale'}\n"
+                                f"Log checkpoint: {checkpoint}\n"
+                                f"Free space: {self.free_space_label.text()}")
+    
+    def on_maintenance_error(self, error, manual):
+        """Report a failed maintenance run"""
+        print(f"Error running database maintenance: {error}")
+        self.status_label.setText(f"Database maintenance failed: {str(error)}")
+        if manual:
+            self.optimize_button.setEnabled(True)
+            self.vacuum_button.setEnabled(True)
+            self.db_progress.setRange(0, 100)
             self.db_progress.setVisible(False)
+            QMessageBox.warning(self, "Maintenance Error", f"Database maintenance failed: {str(error)}")
+    
+    def optimize_database(self):
+        """Rebuild the query planner statistics and run the other maintenance steps"""
+        self.start_maintenance(analyze=True, manual=True)
     
     def vacuum_database(self):
-        """Vacuum database to reclaim space"""
-        try:
-            reply = QMessageBox.question(
-                self, "Confirm Vacuum", 
-                "This operation will reclaim unused space but may take some time. Continue?",
-                QMessageBox.Yes | QMessageBox.No
-            )
-            
-            if reply == QMessageBox.Yes:
-                self.db_progress.setVisible(True)
-                self.db_progress.setValue(0)
-                
-                conn = sqlite3.connect("inventory.db")
-                cursor = conn.cursor()
-                
-                # Vacuum database
-                self.db_progress.setValue(50)
-                cursor.execute("VACUUM")
-                
-                conn.close()
-                
-                self.db_progress.setValue(100)
-                QMessageBox.information(self, "Vacuum Complete", "Database vacuum completed successfully")
-                self.status_label.setText("Database vacuum completed")
-                
-                # Update database info
-                self.update_database_info()
-                
-                # Hide progress bar after delay
-                QTimer.singleShot(2000, lambda: self.db_progress.setVisible(False))
-                
-        except Exception as e:
-            QMessageBox.warning(self, "Vacuum Error", f"Failed to vacuum database: {str(e)}")
-            self.db_progress.setVisible(False)
+        """Reclaim free space, converting older databases to incremental vacuum first"""
+        usage = self.db_manager.get_space_usage()
+        if usage.get('auto_vacuum') == 'INCREMENTAL':
+            self.start_maintenance(manual=True)
+            return
+        if self.maintenance_blocked():
+            return
+        
+        reply = QMessageBox.question(
+            self, "Confirm Vacuum", 
+            "This database must be rebuilt once so free space can be reclaimed in the background "
+            "from now on. Sales wait until the rebuild finishes. Continue?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.optimize_button.setEnabled(False)
+        self.vacuum_button.setEnabled(False)
+        self.db_progress.setVisible(True)
+        self.db_progress.setRange(0, 0)
+        self.status_label.setText("Rebuilding database...")
+        self.queries.submit('maintenance', convert_to_incremental_vacuum, self.db_manager,
+                            background=True, callback=self.on_vacuum_finished,
+                            error_callback=lambda error: self.on_maintenance_error(error, True))
+    
+    def on_vacuum_finished(self, result):
+        """Report a completed rebuild"""
+        self.optimize_button.setEnabled(True)
+        self.vacuum_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        self.show_free_space(result['after'])
+        before_mb = result['before']['page_count'] * result['before']['page_size'] / (1024 * 1024)
+        after_mb = result['after']['page_count'] * result['after']['page_size'] / (1024 * 1024)
+        self.status_label.setText(f"Database rebuilt in {result['seconds']:.1f} s")
+        self.update_database_info()
+        QMessageBox.information(self, "Vacuum Complete",
+                                f"Database rebuilt in {result['seconds']:.1f} s: "
+                                f"{before_mb:.1f} MB to {after_mb:.1f} MB.\n"
+                                "Free space is now reclaimed during idle maintenance.")
+    
+    def rebuild_report_totals(self):
+        """Recompute the daily sales rollup in the background"""
+        self.rebuild_rollup_button.setEnabled(False)
+        self.db_progress.setVisible(True)
+        self.db_progress.setRange(0, 0)  # busy indicator, the rebuild is a single statement
+        self.queries.submit('rebuild_rollup', self.db_manager.rebuild_sales_rollup,
+                            background=True, callback=self.on_report_totals_rebuilt,
+                            error_callback=lambda e: self.on_report_totals_rebuilt(False))
+    
+    def on_report_totals_rebuilt(self, success):
+        """Report the outcome of a rollup rebuild"""
+        self.rebuild_rollup_button.setEnabled(True)
+        self.db_progress.setRange(0, 100)
+        self.db_progress.setVisible(False)
+        if success:
+            self.status_label.setText("Report totals rebuilt")
+        else:
+            QMessageBox.warning(self, "Rebuild Error", "Failed to rebuild report totals")
     
     def browse_export_path(self):
         """Browse for export directory"""
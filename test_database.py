@@ -0,0 +1,720 @@
+#!/usr/bin/env python3
+"""
+Test Database Layer
+Runs against throwaway databases; works under pytest or as a script
+"""
+
+import atexit
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from src.database import DatabaseManager, MIGRATIONS, COUNTED_TABLES, STORAGE_PROFILES, Product
+from src.sales_frame import load_sales_frame
+from src.product_import import import_products
+from src.report_export import report_sheets, export_reports, OPENPYXL_AVAILABLE
+from src.maintenance import run_maintenance, statistics_are_stale, VACUUM_PAGES_PER_STEP
+from src.backup import (backup_database, take_snapshot, restore_snapshot, list_snapshots,
+                        list_snapshot_chains, restore_database)
+
+def new_database():
+    """Create an empty database in a temporary file, deleted when the run ends"""
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    atexit.register(remove_database_files, db_path)
+    return DatabaseManager(db_path)
+
+def remove_database_files(db_path):
+    """Delete a test database with its WAL, shared-memory and journal files"""
+    for path in (db_path, db_path + "-wal", db_path + "-shm", db_path + "-journal"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def add_test_product(db, barcode="TEST001", quantity=100):
+    """Add a product and return its row"""
+    db.add_product({
+        'barcode': barcode,
+        'name': f"Product {barcode}",
+        'category': "Other",
+        'cost_price': 5.0,
+        'selling_price': 8.0,
+        'quantity': quantity,
+    })
+    return db.get_product_by_barcode(barcode)
+
+def hammer(db, product_id, threads, sales_per_thread):
+    """Sell one unit at a time from several threads; returns the success count"""
+    successes = []
+    
+    def register():
+        sold = sum(1 for _ in range(sales_per_thread) if db.add_sale(product_id, 1, 8.0))
+        successes.append(sold)
+    
+    workers = [threading.Thread(target=register) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(successes)
+
+def sale_count(db, product_id):
+    """Number of sale rows recorded for a product"""
+    conn = db.get_connection()
+    return conn.execute('SELECT COUNT(*) FROM sales WHERE product_id = ?', (product_id,)).fetchone()[0]
+
+def test_each_thread_keeps_one_connection():
+    """A thread reuses its connection across calls, other threads get their own, close releases them all"""
+    db = new_database()
+    conn = db.get_connection()
+    assert db.get_connection() is conn
+    
+    others = []
+    thread = threading.Thread(target=lambda: others.extend([db.get_connection(), db.get_connection()]))
+    thread.start()
+    thread.join()
+    assert others[0] is others[1] and others[0] is not conn
+    assert db.connections.open_count == 2
+    
+    db.close()
+    assert db.connections.open_count == 0
+    assert db.get_connection() is not conn  # reopened lazily after close
+    db.close()
+
+def test_migrations_run_once():
+    """A new database is migrated to the latest version and reopening is a no-op"""
+    db = new_database()
+    assert db.get_schema_version() == len(MIGRATIONS)
+    db.close()
+    
+    reopened = DatabaseManager(db.db_path)
+    assert reopened.get_schema_version() == len(MIGRATIONS)
+    reopened.close()
+
+def test_storage_profiles_apply_their_pragmas():
+    """Each storage profile sets its journal mode, sync level and cache on every connection"""
+    synchronous_levels = {'OFF': 0, 'NORMAL': 1, 'FULL': 2}
+    for name, profile in STORAGE_PROFILES.items():
+        db = new_database()
+        db.set_storage_profile(name)
+        conn = db.get_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == profile['journal_mode'].lower()
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == synchronous_levels[profile['synchronous']]
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == profile['cache_size']
+        db.close()
+
+def test_query_plans_use_indexes():
+    """Hot lookup and report queries never fall back to full table scans"""
+    db = new_database()
+    assert db.verify_query_plans() == {}
+    db.close()
+
+def test_concurrent_sales_keep_exact_stock():
+    """Many registers selling the same product never lose a stock update"""
+    db = new_database()
+    product = add_test_product(db, quantity=1000)
+    
+    sold = hammer(db, product['id'], threads=8, sales_per_thread=50)
+    
+    assert sold == 400
+    assert db.get_product_by_barcode("TEST001")['quantity'] == 600
+    assert sale_count(db, product['id']) == 400
+    db.close()
+
+def test_concurrent_sales_never_oversell():
+    """Once stock runs out further sales are refused and nothing is recorded"""
+    db = new_database()
+    product = add_test_product(db, quantity=50)
+    
+    sold = hammer(db, product['id'], threads=8, sales_per_thread=20)
+    
+    assert sold == 50
+    assert db.get_product_by_barcode("TEST001")['quantity'] == 0
+    assert sale_count(db, product['id']) == 50
+    db.close()
+
+def test_oversell_allowed_when_requested():
+    """check_stock=False lets stock go negative, e.g. for back-orders"""
+    db = new_database()
+    product = add_test_product(db, quantity=1)
+    
+    assert not db.add_sale(product['id'], 3, 8.0)
+    assert db.add_sale(product['id'], 3, 8.0, check_stock=False)
+    assert db.get_product_by_barcode("TEST001")['quantity'] == -2
+    assert not db.add_sale(product['id'] + 1, 1, 8.0, check_stock=False)
+    db.close()
+
+def test_basket_commits_all_lines():
+    """A basket records one transaction header and a sales row per line"""
+    db = new_database()
+    first = add_test_product(db, "BASKET1", quantity=10)
+    second = add_test_product(db, "BASKET2", quantity=10)
+    
+    transaction_id = db.add_sale_batch([
+        {'product_id': first['id'], 'quantity': 2, 'unit_price': 8.0},
+        {'product_id': second['id'], 'quantity': 3, 'unit_price': 4.0},
+    ], notes="Customer 42")
+    
+    assert transaction_id is not None
+    conn = db.get_connection()
+    header = conn.execute('SELECT item_count, total_amount, notes FROM transactions WHERE id = ?',
+                          (transaction_id,)).fetchone()
+    assert header == (5, 28.0, "Customer 42")
+    lines = conn.execute('SELECT COUNT(*) FROM sales WHERE transaction_id = ?', (transaction_id,)).fetchone()[0]
+    assert lines == 2
+    assert db.get_product_by_barcode("BASKET1")['quantity'] == 8
+    assert db.get_product_by_barcode("BASKET2")['quantity'] == 7
+    assert [sale['notes'] for sale in db.get_sales_page()] == ["Customer 42", "Customer 42"]
+    db.add_sale(first['id'], 1, 8.0)
+    assert db.get_sales_data()[0]['notes'] == ''
+    db.close()
+
+def test_basket_rolls_back_when_a_line_is_short():
+    """One out-of-stock line leaves stock, sales and transactions untouched"""
+    db = new_database()
+    first = add_test_product(db, "BASKET1", quantity=10)
+    second = add_test_product(db, "BASKET2", quantity=1)
+    
+    transaction_id = db.add_sale_batch([
+        {'product_id': first['id'], 'quantity': 2, 'unit_price': 8.0},
+        {'product_id': second['id'], 'quantity': 3, 'unit_price': 4.0},
+    ])
+    
+    assert transaction_id is None
+    conn = db.get_connection()
+    assert conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0] == 0
+    assert conn.execute('SELECT COUNT(*) FROM sales').fetchone()[0] == 0
+    assert db.get_product_by_barcode("BASKET1")['quantity'] == 10
+    db.close()
+
+def test_product_cache_is_written_through():
+    """Cached lookups see stock and product changes made through the manager"""
+    db = new_database()
+    product = add_test_product(db, quantity=10)
+    
+    assert db.get_product_by_barcode("TEST001")['quantity'] == 10
+    assert db.product_cache.stats()['hits'] >= 1
+    
+    db.add_sale(product['id'], 4, 8.0)
+    assert db.get_product_by_barcode("TEST001")['quantity'] == 6
+    
+    db.update_product(dict(product, name="Renamed", quantity=6))
+    assert db.get_product_by_id(product['id'])['name'] == "Renamed"
+    
+    db.delete_product(product['id'])
+    assert db.get_product_by_barcode("TEST001") is None
+    db.close()
+
+def test_product_search_follows_product_changes():
+    """Prefix search ranks name matches first and tracks edits and deletes"""
+    db = new_database()
+    add_test_product(db, "SRCH001")
+    db.update_product(dict(db.get_product_by_barcode("SRCH001"), name="Wireless Mouse", quantity=100))
+    db.add_product({'barcode': "SRCH002", 'name': "Mouse Pad", 'category': "Other",
+                    'description': "Pairs with any wireless mouse", 'cost_price': 1.0, 'selling_price': 2.0})
+    
+    assert {p['barcode'] for p in db.search_products("mou")} == {"SRCH001", "SRCH002"}
+    assert [p['barcode'] for p in db.search_products("wireless")] == ["SRCH001", "SRCH002"]
+    assert [p['barcode'] for p in db.search_products("wireless", limit=1, offset=1)] == ["SRCH002"]
+    assert [p['barcode'] for p in db.search_products("srch002")] == ["SRCH002"]
+    assert [p['barcode'] for p in db.search_products('"wireless mouse', category="Other")] == ["SRCH001", "SRCH002"]
+    assert db.search_products("wireless", category="Books") == []
+    # Part of a barcode matches anywhere in it, with LIKE wildcards taken literally
+    assert {p['barcode'] for p in db.search_products("RCH00")} == {"SRCH001", "SRCH002"}
+    assert db.search_products("RCH_0") == []
+    assert [p['barcode'] for p in db.search_products("pairs")] == ["SRCH002"]  # description only
+    
+    db.delete_product(db.get_product_by_barcode("SRCH002")['id'])
+    assert [p['barcode'] for p in db.search_products("pad")] == []
+    db.close()
+
+def test_change_tracking_returns_only_new_changes():
+    """Versions stay put when nothing changes and deltas cover edits, sales and deletes"""
+    db = new_database()
+    first = add_test_product(db, "DELTA1")
+    second = add_test_product(db, "DELTA2")
+    
+    versions = db.get_change_versions()
+    assert db.get_change_versions() == versions
+    assert db.get_product_changes(versions['products']) == ([], [])
+    
+    db.add_sale(first['id'], 1, 8.0)
+    db.delete_product(second['id'])
+    changed, deleted = db.get_product_changes(versions['products'])
+    assert [row[0] for row in changed] == [first['id']]
+    assert changed[0][6] == 99
+    assert deleted == [second['id']]
+    
+    latest = db.get_change_versions()
+    assert latest['sales'] == versions['sales'] + 1
+    assert db.get_product_changes(latest['products']) == ([], [])
+    assert len(db.get_sales_data(after_id=0)) == 1
+    db.close()
+
+def test_report_summaries_group_in_sql():
+    """Per-product and per-day summaries match the raw sales they aggregate"""
+    db = new_database()
+    first = add_test_product(db, "REPORT1", quantity=10)
+    second = add_test_product(db, "REPORT2", quantity=10)
+    db.add_sale(first['id'], 2, 8.0)
+    db.add_sale(first['id'], 1, 9.0)
+    db.add_sale(second['id'], 4, 6.0)
+    conn = db.get_connection()
+    with conn:
+        conn.execute("UPDATE sales SET sale_date = '2024-01-02T10:00:00' WHERE id = 3")
+    
+    products = db.get_product_sales_summary()
+    assert [p['product_id'] for p in products] == [first['id'], second['id']]
+    assert (products[0]['total_sold'], products[0]['revenue'], products[0]['cost']) == (3, 25.0, 15.0)
+    assert products[0]['stock_level'] == 7
+    assert products[1]['profit'] == 4.0
+    
+    days = db.get_daily_sales_summary()
+    assert [(d['date'], d['orders'], d['revenue'], d['cost']) for d in days][0] == ('2024-01-02', 1, 24.0, 20.0)
+    assert sum(d['revenue'] for d in days) == 49.0
+    assert db.get_daily_sales_summary('2024-01-01', '2024-01-03')[0]['profit'] == 4.0
+    
+    # Days keep their sales after the product is gone
+    db.delete_product(second['id'])
+    assert sum(d['revenue'] for d in db.get_daily_sales_summary()) == 49.0
+    db.close()
+
+def test_sales_rollup_matches_rebuild():
+    """Trigger-maintained daily totals equal a rebuild from raw sales, including deletes"""
+    db = new_database()
+    first = add_test_product(db, "ROLLUP1")
+    second = add_test_product(db, "ROLLUP2")
+    db.add_sale(first['id'], 2, 8.0)
+    db.add_sale(first['id'], 1, 8.0)
+    db.add_sale_batch([{'product_id': second['id'], 'quantity': 3, 'unit_price': 7.0}])
+    conn = db.get_connection()
+    with conn:
+        conn.execute("DELETE FROM sales WHERE id = 1")
+    
+    rollup = 'SELECT * FROM daily_product_sales ORDER BY sale_day, product_id'
+    maintained = conn.execute(rollup).fetchall()
+    assert [row[1:4] for row in maintained] == [(first['id'], 1, 1), (second['id'], 1, 3)]
+    assert db.rebuild_sales_rollup()
+    assert conn.execute(rollup).fetchall() == maintained
+    
+    with conn:
+        conn.execute("DELETE FROM sales")
+    assert conn.execute('SELECT COUNT(*) FROM daily_product_sales').fetchone()[0] == 0
+    db.close()
+
+def test_sale_cost_is_snapshot_at_sale_time():
+    """Changing a product's cost later leaves the cost and profit of past sales alone"""
+    db = new_database()
+    product = add_test_product(db, "COST001")
+    db.add_sale(product['id'], 2, 8.0)
+    db.update_product(dict(product, cost_price=7.0, quantity=98))
+    db.add_sale(product['id'], 1, 8.0)
+    
+    assert [sale['cost_price'] for sale in db.get_sales_data()] == [7.0, 5.0]
+    assert sum(sale['profit'] for sale in db.get_sales_data()) == 7.0
+    assert db.get_product_sales_summary()[0]['cost'] == 17.0
+    assert db.rebuild_sales_rollup()
+    assert db.get_product_sales_summary()[0]['cost'] == 17.0
+    
+    plan = db.explain_query_plan(
+        "SELECT SUM(total_amount - quantity * unit_cost) FROM sales WHERE sale_date >= ?", ('2000-01-01',))
+    assert any('COVERING INDEX' in detail for detail in plan)
+    db.close()
+
+def test_sales_frame_agrees_with_sql_summaries():
+    """The columnar frame's group-bys match the database's own report totals"""
+    db = new_database()
+    first = add_test_product(db, "FRAME1")
+    second = add_test_product(db, "FRAME2")
+    db.add_sale(first['id'], 2, 8.0)
+    db.add_sale(second['id'], 1, 9.0)
+    db.add_sale(first['id'], 1, 7.5)
+    conn = db.get_connection()
+    with conn:
+        conn.execute("UPDATE sales SET sale_date = '2024-01-02T10:00:00' WHERE id = 2")
+    
+    sales = load_sales_frame(db)
+    assert len(sales) == 3
+    assert sales.totals() == {'revenue': 32.5, 'cost': 20.0, 'profit': 12.5, 'orders': 3}
+    
+    dates, revenue, cost = sales.by_day()
+    days = db.get_daily_sales_summary()
+    assert [d.isoformat() for d in dates] == [day['date'] for day in days]
+    assert (revenue, cost) == ([day['revenue'] for day in days], [day['cost'] for day in days])
+    
+    names, quantity, revenue, cost = sales.by_product()
+    assert (names, quantity, revenue) == (["Product FRAME1", "Product FRAME2"], [3.0, 1.0], [23.5, 9.0])
+    assert [row[1:] for row in sales.table_rows()][-1] == ("Product FRAME2", 1, 9.0, 9.0, 4.0)
+    assert len(load_sales_frame(db, '2024-01-01', '2024-01-02')) == 1
+    
+    with conn:
+        conn.execute("UPDATE sales SET sale_date = NULL WHERE id = 3")
+    assert [row[1] for row in load_sales_frame(db).table_rows()] == ["Product FRAME1", "Product FRAME2"]
+    db.close()
+
+def test_iterators_stream_the_same_rows():
+    """iter_products and iter_sales yield what the list methods return, whatever the batch size"""
+    db = new_database()
+    for number in range(5):
+        product = add_test_product(db, f"ITER{number}")
+        db.add_sale(product['id'], 1 + number, 8.0)
+    
+    assert list(db.iter_products(batch_size=2)) == db.get_all_products()
+    assert list(db.iter_sales(batch_size=2)) == db.get_sales_data()
+    assert [sale['quantity'] for sale in db.iter_sales(batch_size=3, after_id=3)] == [5, 4]
+    
+    # A failing read reaches the caller instead of ending the stream early
+    db.get_connection().execute("ALTER TABLE sales RENAME TO sales_gone")
+    try:
+        list(db.iter_sales())
+        assert False, "iter_sales swallowed the error"
+    except sqlite3.OperationalError:
+        pass
+    assert db.get_sales_data() == []
+    db.close()
+
+def test_sales_pages_follow_the_keyset():
+    """get_sales_page walks a date range newest first without gaps or repeats, even across equal dates"""
+    db = new_database()
+    product = add_test_product(db, "PAGE001", quantity=100)
+    for day in (1, 2, 2, 2, 3, 4, 5):
+        db.add_sale(product['id'], day, 8.0)
+    conn = db.get_connection()
+    conn.execute("UPDATE sales SET sale_date = '2024-01-0' || quantity || ' 12:00:00'")
+    conn.commit()
+    
+    pages = []
+    after = None
+    while True:
+        page = db.get_sales_page('2024-01-02', '2024-01-04', after=after, limit=2)
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1]['sale_date'], page[-1]['id'])
+    sales = [sale for page in pages for sale in page]
+    assert [sale['quantity'] for sale in sales] == [4, 3, 2, 2, 2]
+    assert len({sale['id'] for sale in sales}) == 5
+    assert [len(page) for page in pages] == [2, 2, 1]
+    
+    totals = db.get_sales_totals('2024-01-02', '2024-01-04')
+    assert totals['orders'] == 5 and totals['quantity'] == 13
+    assert totals['revenue'] == sum(sale['total_price'] for sale in sales)
+    assert len(db.get_sales_page(limit=100)) == db.get_sales_totals()['orders'] == 7
+    
+    # Deleting a product does not rewrite the sales history totals
+    db.delete_product(product['id'])
+    assert db.get_sales_totals('2024-01-02', '2024-01-04') == totals
+    db.close()
+
+def test_product_records_read_like_dicts():
+    """Slotted Product records keep the dict-style access existing callers use"""
+    db = new_database()
+    add_test_product(db, "REC001", quantity=3)
+    
+    product = db.get_product_by_barcode("REC001")
+    assert isinstance(product, Product) and not hasattr(product, '__dict__')
+    assert product['quantity'] == product.quantity == 3
+    assert product.get('missing', 'default') == 'default'
+    assert dict(product)['name'] == "Product REC001"
+    assert product == dict(product)
+    assert db.get_low_stock_products() == [] and db.search_products("rec001") == [product]
+    assert db.get_sales_data() == []
+    db.close()
+
+def test_product_import_upserts_by_barcode():
+    """CSV import inserts new barcodes, updates known ones in the listed columns only and reports bad rows"""
+    db = new_database()
+    add_test_product(db, "IMP001", quantity=7)
+    schema_version = db.get_connection().execute("PRAGMA schema_version").fetchone()[0]
+    
+    fd, csv_path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, 'w', newline='') as file:
+        file.write("Barcode,Name,Category,Cost Price,Selling Price\n"
+                   "IMP001,Renamed,Snacks,4.5,9\n"
+                   "IMP002,New product,Snacks,1,2\n"
+                   "\n"
+                   ",No barcode,Snacks,1,2\n"
+                   "IMP003,Bad price,Snacks,cheap,2\n")
+    progress = []
+    result = import_products(db, csv_path, chunk_size=1, progress=lambda *values: progress.append(values))
+    os.remove(csv_path)
+    
+    assert result['rows'] == 4 and result['imported'] == 2
+    assert [line for line, reason in result['errors']] == [5, 6]
+    assert progress and progress[-1] == (4, 5)
+    updated = db.get_product_by_barcode("IMP001")
+    assert updated['name'] == "Renamed" and updated['selling_price'] == 9.0
+    assert updated['quantity'] == 7  # no quantity column, so stock is untouched
+    assert db.get_product_by_barcode("IMP002")['quantity'] == 0
+    assert db.get_product_by_barcode("IMP003") is None
+    assert db.search_products("renamed") == [updated]
+    assert {p['barcode'] for p in db.search_products("snack")} == {"IMP001", "IMP002"}
+    # The import changed rows only, so no connection has to re-prepare its statements
+    assert db.get_connection().execute("PRAGMA schema_version").fetchone()[0] == schema_version
+    db.close()
+
+def test_report_export_writes_typed_cells():
+    """Report sheets carry dates and numbers, and the export round-trips through openpyxl"""
+    db = new_database()
+    product = add_test_product(db, "EXP001")
+    db.add_sale(product['id'], 2, 8.0)
+    db.add_sale(product['id'], 1, 8.0)
+    
+    sheets = {title: (header, list(rows)) for title, header, widths, rows in report_sheets(db, currency_code="EUR")}
+    header, sales = sheets["Sales Report"]
+    assert header[3] == "Unit Price (EUR)" and len(sales) == 2
+    assert isinstance(sales[0][0], datetime.date) and sales[0][1:] == ("Product EXP001", 1, 8.0, 8.0, 3.0)
+    assert sheets["Product Performance"][1] == [("Product EXP001", 3, 24.0, 15.0, 9.0, 37.5, 97)]
+    
+    if OPENPYXL_AVAILABLE:
+        from openpyxl import load_workbook
+        fd, xlsx_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        assert export_reports(db, xlsx_path) == 2 + 1 + 1
+        workbook = load_workbook(xlsx_path, read_only=True)
+        rows = list(workbook["Sales Report"].iter_rows(values_only=True))
+        workbook.close()
+        os.remove(xlsx_path)
+        assert rows[1][2:] == (1, 8, 8, 3)
+    
+    # An undated sale is still exported, with an empty date cell
+    with db.get_connection() as conn:
+        conn.execute("UPDATE sales SET sale_date = NULL WHERE id = 1")
+    sales = list(report_sheets(db)[0][3])
+    assert sorted(sale[0] is None for sale in sales) == [False, True]
+    if OPENPYXL_AVAILABLE:
+        export_reports(db, xlsx_path)
+        os.remove(xlsx_path)
+    db.close()
+
+def test_backup_copies_a_consistent_snapshot():
+    """A stepped backup keeps the snapshot it started from while the register keeps selling"""
+    db = new_database()
+    product = add_test_product(db, "BAK001")
+    for _ in range(50):
+        db.add_sale(product['id'], 1, 8.0)
+    
+    steps = []
+    
+    def sell_during_backup(phase, done, total):
+        if not steps:
+            assert db.add_sale(product['id'], 1, 8.0)  # must not wait for the backup
+        steps.append((phase, done))
+    
+    backup_dir = tempfile.mkdtemp()
+    plain_path = os.path.join(backup_dir, "backup.db")
+    result = backup_database(db, plain_path, pages_per_step=1, progress=sell_during_backup)
+    copied = [done for phase, done in steps if phase == 'copy']
+    assert copied == sorted(copied) and copied[-1] == result['pages'] > 1
+    
+    backup = sqlite3.connect(plain_path)
+    assert backup.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    assert backup.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 50
+    backup.close()
+    assert sale_count(db, product['id']) == 51
+    
+    packed_path = os.path.join(backup_dir, "backup.db.gz")
+    backup_database(db, packed_path, compression='gzip')
+    with gzip.open(packed_path, 'rb') as packed:
+        assert packed.read(16) == b"SQLite format 3\x00"
+    assert sorted(os.listdir(backup_dir)) == ["backup.db", "backup.db.gz"]
+    for name in os.listdir(backup_dir):
+        os.remove(os.path.join(backup_dir, name))
+    os.rmdir(backup_dir)
+    db.close()
+
+def test_snapshots_store_changed_pages_and_restore():
+    """Incremental snapshots hold only changed pages, prune chains by age and rebuild exactly"""
+    db = new_database()
+    product = add_test_product(db, "SNAP001")
+    snapshot_dir = tempfile.mkdtemp()
+    
+    taken = []
+    for _ in range(5):
+        db.add_sale(product['id'], 1, 8.0)
+        taken.append(take_snapshot(db, snapshot_dir, 'gzip', chain_length=2, keep_days=7))
+    assert [snapshot['index'] for snapshot in taken] == [0, 1, 0, 1, 0]
+    assert taken[1]['changed_pages'] < taken[1]['page_count']
+    assert taken[0]['changed_pages'] == taken[0]['page_count']
+    
+    # Age the first chain past the retention period; the next snapshot drops it
+    first_chain = list_snapshot_chains(snapshot_dir)[0]
+    with open(os.path.join(first_chain, "manifest.json"), encoding='utf-8') as file:
+        manifest = json.load(file)
+    for snapshot in manifest['snapshots']:
+        snapshot['created'] = (datetime.datetime.now() - datetime.timedelta(days=8)).isoformat()
+    with open(os.path.join(first_chain, "manifest.json"), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    db.add_sale(product['id'], 1, 8.0)
+    take_snapshot(db, snapshot_dir, 'gzip', chain_length=2, keep_days=7)
+    
+    snapshots = list_snapshots(snapshot_dir)
+    assert first_chain not in list_snapshot_chains(snapshot_dir)
+    assert len(list_snapshot_chains(snapshot_dir)) == 2 and len(snapshots) == 4
+    
+    restored_path = os.path.join(snapshot_dir, "restored.db")
+    for sales, snapshot in zip((3, 4, 5, 6), snapshots):
+        restore_snapshot(snapshot['chain'], snapshot['index'], restored_path)
+        restored = sqlite3.connect(restored_path)
+        assert restored.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == sales
+        restored.close()
+    
+    shutil.rmtree(snapshot_dir)
+    db.close()
+
+def test_restore_swaps_in_a_verified_backup():
+    """A restore checks the backup first, then replaces the data under every open connection"""
+    db = new_database()
+    product = add_test_product(db, "RES001")
+    for _ in range(10):
+        db.add_sale(product['id'], 1, 8.0)
+    backup_dir = tempfile.mkdtemp()
+    packed_path = os.path.join(backup_dir, "backup.db.gz")
+    backup_database(db, packed_path, compression='gzip')
+    for _ in range(5):
+        db.add_sale(product['id'], 1, 8.0)
+    
+    counts = []
+    other_thread = threading.Thread(target=lambda: counts.append(sale_count(db, product['id'])))
+    other_thread.start()
+    other_thread.join()
+    
+    junk_path = os.path.join(backup_dir, "junk.db")
+    with open(junk_path, 'wb') as junk:
+        junk.write(b"\0" * 8192)
+    try:
+        restore_database(db, junk_path)
+        assert False, "a damaged backup must not be restored"
+    except ValueError:
+        pass
+    assert sale_count(db, product['id']) == 15
+    
+    safety_path = os.path.join(backup_dir, "before.db")
+    result = restore_database(db, packed_path, safety_path=safety_path)
+    assert result['pages'] > 1 and result['total_seconds'] >= result['restore_seconds']
+    assert sale_count(db, product['id']) == 10
+    assert db.get_product_by_id(product['id'])['quantity'] == 90
+    
+    # The pool thread's connection sees the restored data without reopening
+    other_thread = threading.Thread(target=lambda: counts.append(sale_count(db, product['id'])))
+    other_thread.start()
+    other_thread.join()
+    assert counts == [15, 10]
+    
+    safety = sqlite3.connect(safety_path)
+    assert safety.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 15
+    safety.close()
+    assert sorted(os.listdir(backup_dir)) == ["backup.db.gz", "before.db", "junk.db"]
+    shutil.rmtree(backup_dir)
+    db.close()
+
+def test_maintenance_reclaims_free_pages_and_repairs_statistics():
+    """Idle maintenance returns deleted pages to the OS and replaces bogus planner statistics"""
+    db = new_database()
+    product = add_test_product(db, "MNT001")
+    with db.transaction() as cursor:
+        cursor.executemany('''
+            INSERT INTO sales (product_id, quantity, unit_price, total_amount, sale_date)
+            VALUES (?, 1, 8.0, 8.0, '2024-01-01 10:00:00')
+        ''', [(product['id'],)] * 20000)
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM sales")
+    
+    # What the old Optimize button left behind: one number per index
+    conn = db.get_connection()
+    conn.execute("ANALYZE")
+    conn.execute("UPDATE sqlite_stat1 SET stat = '7'")
+    conn.commit()
+    assert statistics_are_stale(db)
+    usage = db.get_space_usage()
+    assert usage['auto_vacuum'] == 'INCREMENTAL' and usage['freelist_count'] > VACUUM_PAGES_PER_STEP
+    
+    steps = []
+    result = run_maintenance(db, progress=lambda phase, done, total: steps.append(phase))
+    assert result['analyzed'] and not statistics_are_stale(db)
+    assert result['freed_pages'] == usage['freelist_count']
+    assert result['after']['freelist_count'] == 0
+    assert result['after']['page_count'] == usage['page_count'] - usage['freelist_count']
+    assert 0.0 <= result['after']['fragmentation'] <= 1.0
+    assert steps.count('vacuum') > 1  # free pages go back a step at a time
+    
+    assert db.add_sale(product['id'], 1, 8.0)
+    db.close()
+
+def test_row_counters_match_table_scans():
+    """Trigger-kept row counts stay exact through sales, baskets, imports, deletes and rebuilds"""
+    db = new_database()
+    first = add_test_product(db, "CNT001")
+    second = add_test_product(db, "CNT002")
+    for _ in range(5):
+        db.add_sale(first['id'], 1, 8.0)
+    db.add_sale_batch([{'product_id': first['id'], 'quantity': 1, 'unit_price': 8.0},
+                       {'product_id': second['id'], 'quantity': 2, 'unit_price': 8.0}])
+    db.upsert_products([("CNT002", "Renamed", "", "", 5.0, 8.0, 10, 1),
+                        ("CNT003", "New", "", "", 5.0, 8.0, 10, 1)], ['name'])
+    conn = db.get_connection()
+    with conn:
+        conn.execute("DELETE FROM sales WHERE id <= 2")
+    assert db.delete_product(db.get_product_by_barcode("CNT003")['id'])
+    assert db.rebuild_sales_rollup()
+    
+    stats = db.get_database_stats()
+    for table in COUNTED_TABLES:
+        scanned = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        assert stats['record_counts'][table] == scanned, table
+    assert stats['record_counts']['sales'] == 5 and stats['record_counts']['products'] == 2
+    assert stats['page_count'] > 0 and stats['file_bytes'] > 0
+    assert stats['wal_bytes'] > 0 and stats['freelist_count'] >= 0
+    db.close()
+
+def test_record_counts_cover_application_tables_only():
+    """Record counts list each application table once and skip the search index"""
+    db = new_database()
+    add_test_product(db)
+    
+    counts = db.get_record_counts()
+    assert counts['products'] == 1
+    assert counts['sales'] == 0
+    assert not [table for table in counts if table.startswith(('sqlite_', 'products_fts'))]
+    db.close()
+
+def test_profile_switch_leaves_other_threads_connections_open():
+    """Switching profile never closes another thread's connection; each thread reopens on its next get"""
+    db = new_database()
+    product = add_test_product(db)
+    opened = threading.Event()
+    switched = threading.Event()
+    results = []
+    
+    def worker():
+        conn = db.get_connection()
+        opened.set()
+        switched.wait()
+        # The connection this thread was using still works until it asks again
+        results.append(conn.execute("SELECT quantity FROM products WHERE id = ?", (product['id'],)).fetchone()[0])
+        results.append(db.get_connection() is conn)
+        results.append(db.get_connection().execute("PRAGMA synchronous").fetchone()[0])
+    
+    thread = threading.Thread(target=worker)
+    thread.start()
+    opened.wait()
+    db.set_storage_profile('compatibility')
+    switched.set()
+    thread.join()
+    assert results == [100, False, 2]  # synchronous=FULL under the new profile
+    db.close()
+
+def main():
+    """Run every test in this module"""
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"🎉 {len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()